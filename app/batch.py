@@ -0,0 +1,392 @@
+# app/batch.py
+"""
+Vectorized `compute_footprint` over flat project columns.
+
+Rows use the flat layout of the saved history (`flatten_inputs`: nested
+sections become `section_field`). Text fields are encoded once into integer
+codes against `FactorTables`, then every phase is computed with numpy array
+operations in the same order as the scalar calculator, so results match
+`compute_footprint` exactly.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from app.constants import HARDWARE_DICT, INFRASTRUCTURE_PROFILES, HOURS_PER_YEAR, DEFAULT_GRID_INTENSITY, API_MODELS, TRAFFIC_PROFILES, AUTOSCALING_POLICIES, QUANTIZATION_PROFILES
+from app.capacity import replica_hours_arrays
+from app.throughput import serving_arrays
+from app.models import Assumptions, ProjectInputs
+from app.utils import flatten_inputs
+from app.calculator import WHAT_IF_LEVERS
+from app.instrumentation import timed
+
+# Training runs per project year (One-off: a single run)
+RUNS_PER_YEAR = {"One-off": 0, "Weekly": 52, "Monthly": 12, "Daily": 365}
+
+# Result columns, named like the saved history / FootprintResult fields
+RESULT_COLUMNS = [
+    "total_co2_kg", "total_energy_kwh", "total_water_m3",
+    "co2_dev", "co2_training_usage", "co2_training_embodied",
+    "co2_inference_usage", "co2_inference_embodied", "co2_storage_network",
+    "annual_co2_kg",
+]
+
+GRADE_LABELS = np.array(["A", "B", "C", "D", "E", "F", "G"])
+GRADE_THRESHOLDS = np.array([50, 250, 1000, 5000, 20000, 100000], dtype=np.float64)
+
+
+@dataclass
+class FactorTables:
+    """
+    Lookup arrays indexed by integer codes. Each array carries one extra
+    trailing entry: the fallback the scalar calculator uses for unknown keys,
+    reached with code -1.
+    """
+    hardware_ids: list
+    hardware_watts: np.ndarray
+    hardware_gwp: np.ndarray
+    infra_types: list
+    infra_pue: np.ndarray  # unknown infra: NaN (compute_footprint raises KeyError)
+    regions: list
+    grid_kg_per_kwh: np.ndarray
+    api_models: list
+    api_gco2_per_1k_tokens: np.ndarray
+    frequencies: list
+    runs_per_year: np.ndarray
+    traffic_profiles: list
+    autoscaling_policies: list
+    quantizations: list
+
+    def arrays(self) -> dict:
+        return {k: v for k, v in self.__dict__.items() if isinstance(v, np.ndarray)}
+
+    def keys(self) -> dict:
+        return {k: v for k, v in self.__dict__.items() if isinstance(v, list)}
+
+
+def factor_tables() -> FactorTables:
+    """Builds the lookup arrays from app.constants."""
+    hardware_ids = list(HARDWARE_DICT)
+    infra_types = list(INFRASTRUCTURE_PROFILES)
+    regions = list(DEFAULT_GRID_INTENSITY)
+    api_models = list(API_MODELS)
+    frequencies = list(RUNS_PER_YEAR)
+    fallback_hw = HARDWARE_DICT["laptop_std"]
+    return FactorTables(
+        hardware_ids=hardware_ids,
+        hardware_watts=np.array([HARDWARE_DICT[h]["watts"] for h in hardware_ids] + [fallback_hw["watts"]], dtype=np.float64),
+        hardware_gwp=np.array([HARDWARE_DICT[h]["gwp"] for h in hardware_ids] + [fallback_hw["gwp"]], dtype=np.float64),
+        infra_types=infra_types,
+        infra_pue=np.array([INFRASTRUCTURE_PROFILES[i]["pue"] for i in infra_types] + [np.nan], dtype=np.float64),
+        regions=regions,
+        grid_kg_per_kwh=np.array([DEFAULT_GRID_INTENSITY[r] / 1000.0 for r in regions] + [475.0 / 1000.0], dtype=np.float64),
+        api_models=api_models,
+        api_gco2_per_1k_tokens=np.array([API_MODELS[m] for m in api_models] + [0.02], dtype=np.float64),
+        frequencies=frequencies,
+        runs_per_year=np.array([RUNS_PER_YEAR[f] for f in frequencies] + [0], dtype=np.float64),
+        traffic_profiles=list(TRAFFIC_PROFILES),
+        autoscaling_policies=list(AUTOSCALING_POLICIES),
+        quantizations=list(QUANTIZATION_PROFILES),
+    )
+
+
+# Flat input columns and their encoded dtype. Text columns become int16 codes
+# into the FactorTables key list named in CODED_COLUMNS.
+CODED_COLUMNS = {
+    "development_infra_type": "infra_types",
+    "development_hardware_id": "hardware_ids",
+    "training_region": "regions",
+    "training_infra_type": "infra_types",
+    "training_hardware_id": "hardware_ids",
+    "training_frequency": "frequencies",
+    "inference_region": "regions",
+    "inference_infra_type": "infra_types",
+    "inference_hardware_id": "hardware_ids",
+    "inference_api_model": "api_models",
+    "inference_traffic_profile": "traffic_profiles",
+    "inference_autoscaling": "autoscaling_policies",
+    "inference_quantization": "quantizations",
+}
+# Derived from project_type / inference_mode
+DERIVED_FLAGS = ["is_genai", "is_api_mode"]
+FLAG_COLUMNS = [
+    "training_include_training", "inference_include_inference",
+    "inference_server_24_7", "inference_capacity_model", "inference_throughput_model",
+    "storage_network_include_storage_network",
+]
+NUMERIC_COLUMNS = {
+    "project_duration_years": np.float64,
+    "development_dev_hours": np.float64,
+    "training_hardware_count": np.int64,
+    "training_duration_run_hours": np.float64,
+    "inference_hardware_count": np.int64,
+    "inference_latency_ms": np.float64,
+    "inference_req_per_day": np.int64,
+    "inference_tokens_per_req": np.int64,
+    "inference_peak_factor": np.float64,
+    "inference_p99_latency_ms": np.float64,
+    "inference_batch_size": np.int64,
+    "inference_model_params_b": np.float64,
+    "inference_traffic_growth_pct_per_year": np.float64,
+    "storage_network_dataset_gb": np.float64,
+    "storage_network_transfer_gb_per_day": np.float64,
+}
+
+
+def input_dtypes() -> dict:
+    """Column name -> dtype of an encoded input batch."""
+    dtypes = {c: np.dtype(np.int16) for c in CODED_COLUMNS}
+    dtypes.update({c: np.dtype(np.bool_) for c in DERIVED_FLAGS + FLAG_COLUMNS})
+    dtypes.update({c: np.dtype(t) for c, t in NUMERIC_COLUMNS.items()})
+    return dtypes
+
+
+def _flag(values: pd.Series) -> np.ndarray:
+    # Flags read back from CSV may be the strings "True"/"False"
+    if values.dtype == bool:
+        return values.to_numpy()
+    return values.astype(str).str.lower().isin(["true", "1"]).to_numpy()
+
+
+def _codes(values: pd.Series, keys: list) -> np.ndarray:
+    """Position of each value in `keys` (-1: unknown or missing). Only the distinct values are looked up."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    lookup = pd.Index(keys).get_indexer(pd.Index(uniques).astype(str))
+    return np.append(lookup, -1)[codes]  # factorize code -1 (missing) -> last entry
+
+
+def fill_missing(values: pd.Series, default) -> pd.Series:
+    """`values` with missing entries set to `default` (categories extended when needed)."""
+    if not values.hasnans:
+        return values
+    if isinstance(values.dtype, pd.CategoricalDtype) and default not in values.cat.categories:
+        values = values.cat.add_categories([default])
+    return values.fillna(default)
+
+
+def encode_inputs(df: pd.DataFrame, tables: FactorTables, out: dict | None = None) -> dict:
+    """
+    Encodes flat input columns into numpy arrays. Missing columns and missing
+    values (rows saved before a field existed) take the `ProjectInputs`
+    defaults, as `unflatten_inputs` does for the scalar calculator. When `out`
+    is given (e.g. shared memory views of the right length), arrays are
+    written into it instead of allocated.
+    """
+    defaults = flatten_inputs(ProjectInputs().model_dump())
+    keys = tables.keys()
+    dtypes = input_dtypes()
+    out = out if out is not None else {c: np.empty(len(df), dtype=t) for c, t in dtypes.items()}
+
+    def column(name):
+        if name not in df.columns:
+            return pd.Series(defaults[name], index=df.index)
+        return fill_missing(df[name], defaults[name])
+
+    for col, key_list in CODED_COLUMNS.items():
+        out[col][:] = _codes(column(col), keys[key_list])
+    out["is_genai"][:] = _codes(column("project_type"), ["genai"]) == 0
+    out["is_api_mode"][:] = _codes(column("inference_mode"), ["SaaS / API"]) == 0
+    for col in FLAG_COLUMNS:
+        out[col][:] = _flag(column(col))
+    for col, dtype in NUMERIC_COLUMNS.items():
+        out[col][:] = pd.to_numeric(column(col)).to_numpy(dtype=dtype)
+    return out
+
+
+def _check_infra(pue: np.ndarray, used: np.ndarray):
+    unknown = used & np.isnan(pue)
+    if unknown.any():
+        raise KeyError(f"Unknown infra_type in {int(unknown.sum())} row(s)")
+
+
+def inference_active_hours(cols: dict, tables: FactorTables, is_compute: np.ndarray) -> tuple:
+    """
+    Active hours per year of the compute-mode inference devices (all
+    `inference_hardware_count` of them busy together). Returns the hours, the
+    throughput-model row mask and its `serving_arrays` result (None if unused).
+    """
+    t_active_annual = (cols["inference_req_per_day"] * (cols["inference_latency_ms"] / 1000.0) / 3600.0) * 365.0
+    tokens = is_compute & cols["is_genai"] & cols["inference_throughput_model"]
+    if not tokens.any():
+        return t_active_annual, tokens, None
+    inf_hw = cols["inference_hardware_id"][tokens]
+    serving = serving_arrays(
+        inf_hw, cols["inference_batch_size"][tokens], cols["inference_quantization"][tokens],
+        cols["inference_model_params_b"][tokens], tables.hardware_watts[inf_hw],
+        tables.hardware_ids, tables.quantizations,
+    )
+    annual_tokens = cols["inference_req_per_day"][tokens] * cols["inference_tokens_per_req"][tokens] * 365.0
+    t_active_annual[tokens] = annual_tokens / (serving[0] * cols["inference_hardware_count"][tokens]) / 3600.0
+    return t_active_annual, tokens, serving
+
+
+def compute_footprint_arrays(cols: dict, tables: FactorTables, assumptions: Assumptions, out: dict | None = None) -> dict:
+    """
+    Vectorized `compute_footprint` over encoded input arrays (`encode_inputs`).
+    Returns (or fills `out` with) one float64 array per RESULT_COLUMNS entry.
+    """
+    n = len(cols["project_duration_years"])
+    water_factor = assumptions.water_m3_per_mwh / 1000.0
+    project_years = cols["project_duration_years"]
+    lifespan = assumptions.hardware_lifespan_years
+    zeros = np.zeros(n)
+
+    # --- A. Development (training region as proxy for the dev location) ---
+    grid_dev = tables.grid_kg_per_kwh[cols["training_region"]]
+    dev_hw = cols["development_hardware_id"]
+    pue_dev = tables.infra_pue[cols["development_infra_type"]]
+    _check_infra(pue_dev, np.ones(n, dtype=bool))
+
+    dev_energy = (tables.hardware_watts[dev_hw] / 1000.0) * 1 * cols["development_dev_hours"] * pue_dev
+    dev_co2_usage = dev_energy * grid_dev
+    dev_amortization = cols["development_dev_hours"] / (lifespan * HOURS_PER_YEAR)
+    dev_co2_embodied = 1 * tables.hardware_gwp[dev_hw] * dev_amortization
+    total_co2_dev = dev_co2_usage + dev_co2_embodied
+
+    # --- B. Training ---
+    train = cols["training_include_training"]
+    train_hw = cols["training_hardware_id"]
+    pue_train = tables.infra_pue[cols["training_infra_type"]]
+    _check_infra(pue_train, train)
+    runs = tables.runs_per_year[cols["training_frequency"]]
+    n_runs = np.where(runs > 0, runs * project_years, 1.0)
+    total_train_hours = cols["training_duration_run_hours"] * n_runs
+
+    train_energy = (tables.hardware_watts[train_hw] / 1000.0) * cols["training_hardware_count"] * total_train_hours * pue_train
+    train_co2_usage = train_energy * tables.grid_kg_per_kwh[cols["training_region"]]
+    train_amortization = total_train_hours / (lifespan * HOURS_PER_YEAR)
+    train_co2_embodied = cols["training_hardware_count"] * tables.hardware_gwp[train_hw] * train_amortization
+    train_energy = np.where(train, train_energy, zeros)
+    train_co2_usage = np.where(train, train_co2_usage, zeros)
+    train_co2_embodied = np.where(train, train_co2_embodied, zeros)
+
+    # --- C. Inference ---
+    inf = cols["inference_include_inference"]
+    grid_inf = tables.grid_kg_per_kwh[cols["inference_region"]]
+    is_api = inf & cols["is_genai"] & cols["is_api_mode"]
+    is_compute = inf & ~is_api
+
+    # GenAI API
+    annual_reqs = cols["inference_req_per_day"] * 365
+    model_factor = tables.api_gco2_per_1k_tokens[cols["inference_api_model"]]
+    annual_gco2 = annual_reqs * cols["inference_tokens_per_req"] * (model_factor / 1000.0)
+    api_co2_usage = (annual_gco2 / 1000.0) * project_years
+    api_energy_annual = annual_reqs * assumptions.api_energy_kwh_per_query
+
+    # Compute mode (ML Classic, DL, Self-Hosted GenAI)
+    inf_hw = cols["inference_hardware_id"]
+    inf_infra = cols["inference_infra_type"]
+    pue_inf = tables.infra_pue[inf_infra]
+    _check_infra(pue_inf, is_compute)
+    t_active_annual, tokens, serving = inference_active_hours(cols, tables, is_compute)
+    serverless = inf_infra == tables.infra_types.index("cloud_serverless")
+    t_total_annual = np.where(cols["inference_server_24_7"] & ~serverless, float(HOURS_PER_YEAR), t_active_annual)
+    sized = is_compute & cols["inference_capacity_model"]
+    if sized.any():
+        t_total_annual[sized] = replica_hours_arrays(
+            cols["inference_req_per_day"][sized], cols["inference_latency_ms"][sized],
+            cols["inference_peak_factor"][sized], cols["inference_p99_latency_ms"][sized],
+            cols["inference_traffic_profile"][sized], cols["inference_autoscaling"][sized],
+            tables.traffic_profiles, tables.autoscaling_policies,
+        )
+    compute_energy_annual = (tables.hardware_watts[inf_hw] / 1000.0) * cols["inference_hardware_count"] * t_total_annual * pue_inf
+    if tokens.any():
+        _, idle_watts, active_watts = serving
+        t_busy_annual = np.minimum(t_active_annual[tokens], t_total_annual[tokens])
+        device_kwh = (active_watts * t_busy_annual + idle_watts * (t_total_annual[tokens] - t_busy_annual)) / 1000.0
+        compute_energy_annual[tokens] = device_kwh * cols["inference_hardware_count"][tokens] * pue_inf[tokens]
+    compute_co2_usage = compute_energy_annual * grid_inf * project_years
+    inf_amortization = (t_total_annual * project_years) / (lifespan * HOURS_PER_YEAR)
+    compute_co2_embodied = cols["inference_hardware_count"] * tables.hardware_gwp[inf_hw] * inf_amortization
+
+    inf_energy_annual = np.where(is_api, api_energy_annual, np.where(is_compute, compute_energy_annual, zeros))
+    inf_co2_usage = np.where(is_api, api_co2_usage, np.where(is_compute, compute_co2_usage, zeros))
+    inf_co2_embodied = np.where(is_compute, compute_co2_embodied, zeros)
+
+    # --- D. Storage & Network ("World Average" is not a region key: 475 g/kWh) ---
+    sn = cols["storage_network_include_storage_network"]
+    grid_avg = DEFAULT_GRID_INTENSITY.get("World Average", 475.0) / 1000.0
+    storage_kwh_year = cols["storage_network_dataset_gb"] * assumptions.default_kwh_per_gb_year_storage * 1.2
+    transfer_gco2_year = cols["storage_network_transfer_gb_per_day"] * 365 * assumptions.default_gco2_per_gb_transfer
+    sn_energy_annual = np.where(sn, storage_kwh_year, zeros)
+    sn_co2 = np.where(sn, (storage_kwh_year * grid_avg * project_years) + ((transfer_gco2_year / 1000.0) * project_years), zeros)
+
+    # --- Totals ---
+    out = out if out is not None else {c: np.empty(n) for c in RESULT_COLUMNS}
+    total_co2 = total_co2_dev + train_co2_usage + train_co2_embodied + inf_co2_usage + inf_co2_embodied + sn_co2
+    total_energy = dev_energy + train_energy + (inf_energy_annual * project_years) + (sn_energy_annual * project_years)
+    out["total_co2_kg"][:] = total_co2
+    out["total_energy_kwh"][:] = total_energy
+    out["total_water_m3"][:] = total_energy * water_factor
+    out["co2_dev"][:] = total_co2_dev
+    out["co2_training_usage"][:] = train_co2_usage
+    out["co2_training_embodied"][:] = train_co2_embodied
+    out["co2_inference_usage"][:] = inf_co2_usage
+    out["co2_inference_embodied"][:] = inf_co2_embodied
+    out["co2_storage_network"][:] = sn_co2
+    out["annual_co2_kg"][:] = total_co2 / np.maximum(0.1, project_years)
+    return out
+
+
+def grade_codes(total_co2_kg: np.ndarray) -> np.ndarray:
+    """Index of each grade in GRADE_LABELS (0 = A)."""
+    return np.searchsorted(GRADE_THRESHOLDS, total_co2_kg, side="left")
+
+
+def score_100_array(total_co2_kg: np.ndarray, total_water_m3: np.ndarray) -> np.ndarray:
+    """Vectorized `calculate_score` score (/100, int64)."""
+    co2_val = np.maximum(1.0, total_co2_kg)
+    co2_score = np.clip(125 - (np.log10(co2_val) * 22), 0, 100)
+    water_val = np.maximum(0.1, total_water_m3)
+    water_score = np.clip(125 - (np.log10(np.maximum(1.0, water_val * 10)) * 22), 0, 100)
+    return (0.7 * co2_score + 0.3 * water_score).astype(np.int64)
+
+
+def score_arrays(total_co2_kg: np.ndarray, total_water_m3: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized `calculate_score`: (score_100 as int64, grade letters)."""
+    return score_100_array(total_co2_kg, total_water_m3), GRADE_LABELS[grade_codes(total_co2_kg)]
+
+
+def simulate_what_if_arrays(res: dict, levers: dict) -> dict:
+    """
+    Vectorized `simulate_what_if` over footprint arrays (`compute_footprint_arrays`
+    output); `levers` maps WHAT_IF_LEVERS names to arrays of percentages
+    (missing levers: 0). Reductions are applied in the same order.
+    """
+    inference_usage = res["co2_inference_usage"]
+    infra_usage = res["co2_training_usage"] + res["co2_inference_usage"] + res["co2_storage_network"]
+    coefficients = {
+        "token_reduction_pct": inference_usage,
+        "traffic_reduction_pct": inference_usage,
+        "region_gain_pct": infra_usage,
+        "pue_improvement_pct": infra_usage,
+        "training_freq_reduction_pct": res["co2_training_usage"],
+    }
+    baseline = res["total_co2_kg"]
+    co2_after = baseline.copy()
+    for lever in WHAT_IF_LEVERS:
+        if lever in levers:
+            co2_after = co2_after - coefficients[lever] * (np.asarray(levers[lever], dtype=np.float64) / 100)
+    co2_after = np.maximum(0.0, co2_after)
+    reduction = baseline - co2_after
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative = np.where(baseline > 0, reduction / baseline * 100, 0.0)
+    return {
+        "baseline_co2_kg": baseline,
+        "optimized_co2_kg": co2_after,
+        "absolute_reduction_kg": reduction,
+        "relative_reduction_pct": relative,
+    }
+
+
+@timed("compute_footprint_batch")
+def compute_footprint_batch(df: pd.DataFrame, assumptions: Assumptions, tables: FactorTables | None = None) -> pd.DataFrame:
+    """Footprint (and score) of every row of a flat inputs DataFrame, indexed like `df`."""
+    tables = tables or factor_tables()
+    res = compute_footprint_arrays(encode_inputs(df, tables), tables, assumptions)
+    res["score_100"], res["score_grade"] = score_arrays(res["total_co2_kg"], res["total_water_m3"])
+    return pd.DataFrame(res, index=df.index)
@@ -0,0 +1,268 @@
+# app/budgets.py
+"""
+Annual CO₂ budgets per owner and per project, checked on every save.
+
+A group's usage is the annual CO₂ (`utils.annual_co2`: the stored
+`annual_co2_kg`, else `total_co2_kg / project_duration_years`) of the latest
+saved version of its projects; owner totals leave aggregated projects out, as
+they repeat their parts. Budgets live next to the project store (`budgets.json`).
+
+`BudgetTracker` keeps the latest usage of every project and the owner totals.
+The project writer calls `on_store_write` after each flush, under the store
+lock: the saved and deleted projects update the tracker, and only the budgets
+of the groups they touch are checked, so a save costs O(changed groups)
+whatever the history size. The tracker is rebuilt from the history only when
+another process wrote in between. A budget whose status (ok / warning / over)
+changes raises an alert, appended to `budget_alerts.jsonl` and posted to the
+webhook of `ECOMETRICS_BUDGET_WEBHOOK` when set.
+"""
+import json
+import os
+import tempfile
+import threading
+import urllib.request
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app import utils
+from app.models import CarbonBudget
+from app.batch import GRADE_LABELS, grade_codes
+from app.fleet import AGGREGATED_TYPE
+from app.instrumentation import timed, incr
+
+BUDGET_SCOPES = ("owner", "project")
+OK, WARNING, OVER = "ok", "warning", "over"
+WARNING_RATIO = 0.8  # share of the budget from which a group is in warning
+WEBHOOK_ENV = "ECOMETRICS_BUDGET_WEBHOOK"
+WEBHOOK_TIMEOUT_S = 5.0
+
+def budgets_path() -> Path:
+    return utils.PROJECTS_CSV.with_name("budgets.json")
+
+
+def alerts_path() -> Path:
+    return utils.PROJECTS_CSV.with_name("budget_alerts.jsonl")
+
+
+def load_budgets() -> list[CarbonBudget]:
+    path = budgets_path()
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [CarbonBudget(**b) for b in json.load(f)]
+
+
+def save_budgets(budgets: list[CarbonBudget]):
+    path = budgets_path()
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump([b.model_dump() for b in budgets], f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _owner_keys(df: pd.DataFrame) -> np.ndarray:
+    """Owner counted for each row (None: no owner, or an aggregated project)."""
+    owners = df["owner"].astype(object) if "owner" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    counted = owners.notna()
+    if "project_type" in df.columns:
+        counted &= (df["project_type"].astype(object) != AGGREGATED_TYPE)
+    return owners.where(counted, None).to_numpy(dtype=object)
+
+
+def budget_index(budgets: list[CarbonBudget]) -> dict[tuple[str, str], CarbonBudget]:
+    """Budgets by group, (scope, name)."""
+    return {(b.scope, b.name): b for b in budgets}
+
+
+def budget_status(used: float, budget: float) -> str:
+    if used > budget:
+        return OVER
+    return WARNING if used >= WARNING_RATIO * budget else OK
+
+
+class BudgetTracker:
+    """Latest annual CO₂ of every project and owner totals, kept up to date save by save."""
+
+    def __init__(self, version: str | None = None):
+        self.version = version  # project store version the tracker reflects
+        self.projects: dict[str, tuple[str | None, float]] = {}  # name -> (counted owner, annual CO₂)
+        self.owners: dict[str, float] = {}
+        self.statuses: dict[tuple[str, str], str] = {}  # (scope, name) -> last status
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, version: str | None = None) -> "BudgetTracker":
+        tracker = cls(version)
+        if df.empty or "project_name" not in df.columns:
+            return tracker
+        latest = df[df["project_name"].notna()].drop_duplicates("project_name", keep="last")  # rows are in save order
+        owners = _owner_keys(latest)
+        annual = utils.annual_co2(latest)
+        tracker.projects = dict(zip(latest["project_name"].astype(str), zip(owners, annual.tolist())))
+        tracker.owners = pd.Series(annual).groupby(owners, dropna=True).sum().to_dict()
+        return tracker
+
+    def update(self, name: str, owner: str | None, annual: float | None) -> set:
+        """Sets (or removes, when `annual` is None) the usage of a project's latest version; returns the groups it changed."""
+        changed = {("project", name)}
+        old_owner, old_annual = self.projects.pop(name, (None, 0.0))
+        if old_owner is not None:
+            self.owners[old_owner] -= old_annual
+            changed.add(("owner", old_owner))
+        if annual is not None:
+            self.projects[name] = (owner, annual)
+            if owner is not None:
+                self.owners[owner] = self.owners.get(owner, 0.0) + annual
+                changed.add(("owner", owner))
+        return changed
+
+    def delete(self, name: str) -> set:
+        return self.update(name, None, None)
+
+    def usage(self, scope: str, name: str) -> float:
+        if scope == "project":
+            return self.projects.get(name, (None, 0.0))[1]
+        return self.owners.get(name, 0.0)
+
+    def check(self, budgets: dict[tuple[str, str], CarbonBudget], groups=None) -> list[dict]:
+        """Alerts for the budgets (`budget_index`; of `groups` only, when given) whose status changed since the last check."""
+        keys = list(budgets) if groups is None else [g for g in groups if g in budgets]
+        alerts = []
+        for key in keys:
+            budget = budgets[key]
+            used = self.usage(*key)
+            status = budget_status(used, budget.annual_co2_kg)
+            previous = self.statuses.get(key, OK)
+            self.statuses[key] = status
+            if status != previous:
+                alerts.append({
+                    "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "scope": budget.scope,
+                    "name": budget.name,
+                    "status": status,
+                    "previous_status": previous,
+                    "annual_co2_kg": round(used, 3),
+                    "budget_co2_kg": budget.annual_co2_kg,
+                    "used_pct": round(100.0 * used / budget.annual_co2_kg, 1),
+                    "grade": str(GRADE_LABELS[grade_codes(np.array([used]))[0]]),
+                    "history_version": self.version,
+                })
+        return alerts
+
+    def evaluate(self, budgets: list[CarbonBudget]) -> pd.DataFrame:
+        """One row per budget: usage, status and grades (`calculate_score` thresholds on annual CO₂)."""
+        columns = ["scope", "name", "budget_co2_kg", "used_co2_kg", "used_pct", "status", "grade", "budget_grade"]
+        if not budgets:
+            return pd.DataFrame(columns=columns)
+        used = np.array([self.usage(b.scope, b.name) for b in budgets], dtype=np.float64)
+        limit = np.array([b.annual_co2_kg for b in budgets], dtype=np.float64)
+        return pd.DataFrame({
+            "scope": [b.scope for b in budgets],
+            "name": [b.name for b in budgets],
+            "budget_co2_kg": limit,
+            "used_co2_kg": used,
+            "used_pct": 100.0 * used / limit,
+            "status": [budget_status(u, l) for u, l in zip(used.tolist(), limit.tolist())],
+            "grade": GRADE_LABELS[grade_codes(used)],
+            "budget_grade": GRADE_LABELS[grade_codes(limit)],
+        }, columns=columns)
+
+
+# --- Check on save (project writer) ---
+_lock = threading.Lock()
+_tracker: BudgetTracker | None = None
+_budgets: tuple = (None, {})  # (budgets file stat, budget_index)
+
+
+def _current_budgets() -> tuple[dict, bool]:
+    """Budgets by group, reloaded when the file changed; and whether it did."""
+    global _budgets
+    try:
+        st = os.stat(budgets_path())
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        stamp = None
+    if stamp == _budgets[0]:
+        return _budgets[1], False
+    _budgets = (stamp, budget_index(load_budgets()) if stamp else {})
+    return _budgets[1], True
+
+
+@timed("budget_check")
+def on_store_write(before: pd.DataFrame, before_version: str, after_version: str, changes: list) -> list[dict]:
+    """
+    Applies a flush of the project store (`changes`: (kind, payload) in order,
+    `before`: the history it started from) and returns the budget alerts.
+    Never raises: a failure only drops the tracker, rebuilt at the next flush.
+    """
+    global _tracker
+    with _lock:
+        try:
+            budgets, reloaded = _current_budgets()
+            if not budgets:
+                _tracker = None
+                return []
+            if _tracker is None or _tracker.version != before_version:
+                # First flush, or another process wrote since: start from the stored history
+                _tracker = BudgetTracker.from_history(before, before_version)
+                _tracker.check(budgets)
+            elif reloaded:
+                _tracker.check(budgets)  # edited budgets: current statuses, no alert
+            # Saved rows, in save order: each becomes the latest version of its project
+            saved = pd.DataFrame([payload for kind, payload in changes if kind == "append"])
+            if len(saved):
+                saved = iter(zip(saved["project_name"].astype(str), _owner_keys(saved), utils.annual_co2(saved).tolist()))
+            groups = set()
+            for kind, payload in changes:
+                if kind == "append":
+                    groups |= _tracker.update(*next(saved))
+                elif kind == "delete":
+                    groups |= _tracker.delete(payload)
+                # compaction keeps the latest version of every project: usage is unchanged
+            _tracker.version = after_version
+            return _tracker.check(budgets, groups)
+        except Exception:
+            _tracker = None
+            incr("budget_check_errors")
+            return []
+
+
+def emit_alerts(alerts: list[dict]):
+    """Appends the alerts to the alert file and posts them to the webhook (in the background)."""
+    if not alerts:
+        return
+    with open(alerts_path(), "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(a) + "\n" for a in alerts))
+    incr("budget_alerts", len(alerts))
+    url = os.environ.get(WEBHOOK_ENV)
+    if url:
+        threading.Thread(target=_post_alerts, args=(url, alerts), name="ecometrics-budget-webhook", daemon=True).start()
+
+
+def _post_alerts(url: str, alerts: list[dict]):
+    request = urllib.request.Request(
+        url, data=json.dumps({"alerts": alerts}).encode("utf-8"),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    try:
+        urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT_S).close()
+    except (OSError, ValueError):
+        incr("budget_webhook_errors")
+
+
+def recent_alerts(limit: int = 20) -> list[dict]:
+    """Last `limit` alerts, most recent first."""
+    path = alerts_path()
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        lines = deque(f, maxlen=limit)
+    return [json.loads(line) for line in reversed(lines) if line.strip()]
@@ -1,8 +1,13 @@
 # app/calculator.py
 import math
+from collections import OrderedDict
 from dataclasses import dataclass
+from pydantic import BaseModel
 from app.constants import HARDWARE_DICT, INFRASTRUCTURE_PROFILES, HOURS_PER_YEAR, DEFAULT_GRID_INTENSITY, API_MODELS
 from app.models import ProjectInputs, Assumptions, FootprintResult
+from app.instrumentation import timed, incr
+from app.capacity import plan_capacity
+from app.throughput import serving_profile
 
 @dataclass
 class ScoreResult:
@@ -14,30 +19,39 @@ class ScoreResult:
 def get_hardware_specs(hw_id: str) -> dict:
     return HARDWARE_DICT.get(hw_id, HARDWARE_DICT["laptop_std"])
 
-def compute_footprint(inputs: ProjectInputs, assumptions: Assumptions) -> FootprintResult:
-    # --- 1. Common Factors ---
-    water_factor = assumptions.water_m3_per_mwh / 1000.0 # m3/MWh -> m3/kWh
-    project_years = inputs.project_duration_years
+def _partial(total_energy_kwh: float = 0.0, **co2) -> FootprintResult:
+    """Footprint of a single phase: its own CO₂ fields and lifetime energy, zero elsewhere."""
+    fields = dict.fromkeys(("co2_dev", "co2_training_usage", "co2_training_embodied", "co2_inference_usage", "co2_inference_embodied", "co2_storage_network"), 0.0)
+    fields.update(co2)
+    return FootprintResult(total_co2_kg=sum(co2.values()), total_energy_kwh=total_energy_kwh, total_water_m3=0.0, annual_co2_kg=0.0, **fields)
+
+def development_phase(inputs: ProjectInputs, assumptions: Assumptions) -> FootprintResult:
     lifespan = assumptions.hardware_lifespan_years
 
     # --- A. Development (Exploration) ---
     d_in = inputs.development
     # Use training region for dev or default to local/avg? Using Training Region as proxy for Dev location if not specified
     grid_intensity_dev = DEFAULT_GRID_INTENSITY.get(inputs.training.region, 475.0) / 1000.0
-    
+
     hw_dev = get_hardware_specs(d_in.hardware_id)
     pue_dev = INFRASTRUCTURE_PROFILES[d_in.infra_type]["pue"]
-    
+
     # Energy Dev = Watts * 1 * Hours * PUE
     dev_energy = (hw_dev["watts"] / 1000.0) * 1 * d_in.dev_hours * pue_dev
     dev_co2_usage = dev_energy * grid_intensity_dev
-    
+
     # Embodied Dev: Allocation
     dev_amortization = d_in.dev_hours / (lifespan * HOURS_PER_YEAR)
     dev_co2_embodied = 1 * hw_dev["gwp"] * dev_amortization
-    
+
     total_co2_dev = dev_co2_usage + dev_co2_embodied
 
+    return _partial(dev_energy, co2_dev=total_co2_dev)
+
+def training_phase(inputs: ProjectInputs, assumptions: Assumptions) -> FootprintResult:
+    project_years = inputs.project_duration_years
+    lifespan = assumptions.hardware_lifespan_years
+
     # --- B. Training (Recurring) ---
     train_energy = 0.0
     train_co2_usage = 0.0
@@ -48,7 +62,7 @@ def compute_footprint(inputs: ProjectInputs, assumptions: Assumptions) -> Footpr
         grid_intensity_train = DEFAULT_GRID_INTENSITY.get(t_in.region, 475.0) / 1000.0
         hw_train = get_hardware_specs(t_in.hardware_id)
         pue_train = INFRASTRUCTURE_PROFILES[t_in.infra_type]["pue"]
-        
+
         # Calculate N_runs based on frequency
         if t_in.frequency == "One-off":
             n_runs = 1
@@ -60,17 +74,23 @@ def compute_footprint(inputs: ProjectInputs, assumptions: Assumptions) -> Footpr
             n_runs = 365 * project_years
         else:
             n_runs = 1
-            
+
         total_train_hours = t_in.duration_run_hours * n_runs
-        
+
         # Energy = Watts * Count * PUE * TotalHours
         train_energy = (hw_train["watts"] / 1000.0) * t_in.hardware_count * total_train_hours * pue_train
         train_co2_usage = train_energy * grid_intensity_train
-        
+
         # Embodied: Allocation
         train_amortization = total_train_hours / (lifespan * HOURS_PER_YEAR)
         train_co2_embodied = t_in.hardware_count * hw_train["gwp"] * train_amortization
 
+    return _partial(train_energy, co2_training_usage=train_co2_usage, co2_training_embodied=train_co2_embodied)
+
+def inference_phase(inputs: ProjectInputs, assumptions: Assumptions) -> FootprintResult:
+    project_years = inputs.project_duration_years
+    lifespan = assumptions.hardware_lifespan_years
+
     # --- C. Inference (Production) ---
     inf_energy_annual = 0.0
     inf_co2_usage_total = 0.0
@@ -79,10 +99,10 @@ def compute_footprint(inputs: ProjectInputs, assumptions: Assumptions) -> Footpr
     if inputs.inference.include_inference:
         i_in = inputs.inference
         grid_intensity_inf = DEFAULT_GRID_INTENSITY.get(i_in.region, 475.0) / 1000.0
-        
+
         # Logic: GenAI API vs Compute (Self-Hosted OR ML/DL)
         is_genai_api = (inputs.project_type == "genai" and i_in.mode == "SaaS / API")
-        
+
         if is_genai_api:
             annual_reqs = i_in.req_per_day * 365
 
@@ -99,53 +119,138 @@ def compute_footprint(inputs: ProjectInputs, assumptions: Assumptions) -> Footpr
             # Compute Mode (ML Classic, DL, Self-Hosted GenAI)
             hw_inf = get_hardware_specs(i_in.hardware_id)
             pue_inf = INFRASTRUCTURE_PROFILES[i_in.infra_type]["pue"]
-            
-            # Active Time
-            t_active_annual = (i_in.req_per_day * (i_in.latency_ms / 1000.0) / 3600.0) * 365.0
-            
+
+            # Active Time (the throughput model only serves self-hosted GenAI)
+            use_throughput = i_in.throughput_model and inputs.project_type == "genai"
+            if use_throughput:
+                # Token volume served by hardware_count devices at the batch-size throughput
+                serving = serving_profile(i_in.hardware_id, i_in.batch_size, i_in.quantization, i_in.model_params_b, hw_inf["watts"])
+                annual_tokens = i_in.req_per_day * i_in.tokens_per_req * 365.0
+                t_active_annual = annual_tokens / (serving.tokens_per_s * i_in.hardware_count) / 3600.0
+            else:
+                t_active_annual = (i_in.req_per_day * (i_in.latency_ms / 1000.0) / 3600.0) * 365.0
+
             # Total Time (Billed/Powered)
+            # Capacity model: replica-hours sized for the p99 SLO (one replica = hardware_count devices)
             # If Serverless, we only count active time (Scale to Zero), ignoring the 24/7 flag
-            if i_in.server_24_7 and i_in.infra_type != "cloud_serverless":
+            if i_in.capacity_model:
+                t_total_annual = plan_capacity(
+                    i_in.req_per_day, i_in.latency_ms, i_in.peak_factor, i_in.p99_latency_ms,
+                    i_in.traffic_profile, i_in.autoscaling,
+                ).replica_hours_per_year
+            elif i_in.server_24_7 and i_in.infra_type != "cloud_serverless":
                 t_total_annual = HOURS_PER_YEAR
             else:
                 t_total_annual = t_active_annual
-            
-            inf_energy_annual = (hw_inf["watts"] / 1000.0) * i_in.hardware_count * t_total_annual * pue_inf
+
+            if use_throughput:
+                # Busy hours at the utilization-dependent draw, the rest of the powered time idle
+                t_busy_annual = min(t_active_annual, t_total_annual)
+                device_kwh = (serving.active_watts * t_busy_annual + serving.idle_watts * (t_total_annual - t_busy_annual)) / 1000.0
+                inf_energy_annual = device_kwh * i_in.hardware_count * pue_inf
+            else:
+                inf_energy_annual = (hw_inf["watts"] / 1000.0) * i_in.hardware_count * t_total_annual * pue_inf
             inf_co2_usage_total = inf_energy_annual * grid_intensity_inf * project_years
-            
+
             # Embodied: Allocation based on Total Time
             inf_amortization = (t_total_annual * project_years) / (lifespan * HOURS_PER_YEAR)
             inf_co2_embodied_total = i_in.hardware_count * hw_inf["gwp"] * inf_amortization
 
+    return _partial(inf_energy_annual * project_years, co2_inference_usage=inf_co2_usage_total, co2_inference_embodied=inf_co2_embodied_total)
+
+def storage_network_phase(inputs: ProjectInputs, assumptions: Assumptions) -> FootprintResult:
+    project_years = inputs.project_duration_years
+
     # --- D. Storage & Network ---
     sn_co2_total = 0.0
     sn_energy_annual = 0.0
-    
+
     if inputs.storage_network.include_storage_network:
         sn_in = inputs.storage_network
         grid_intensity_avg = DEFAULT_GRID_INTENSITY.get("World Average", 475.0) / 1000.0
         # Assume Cloud PUE for storage
         storage_kwh_year = sn_in.dataset_gb * assumptions.default_kwh_per_gb_year_storage * 1.2
         transfer_gco2_year = sn_in.transfer_gb_per_day * 365 * assumptions.default_gco2_per_gb_transfer
-        
+
         sn_energy_annual = storage_kwh_year
         sn_co2_total = (storage_kwh_year * grid_intensity_avg * project_years) + ((transfer_gco2_year / 1000.0) * project_years)
 
-    # --- Totals ---
-    total_co2 = total_co2_dev + train_co2_usage + train_co2_embodied + inf_co2_usage_total + inf_co2_embodied_total + sn_co2_total
-    total_energy = dev_energy + train_energy + (inf_energy_annual * project_years) + (sn_energy_annual * project_years)
+    return _partial(sn_energy_annual * project_years, co2_storage_network=sn_co2_total)
+
+def combine_phases(dev: FootprintResult, train: FootprintResult, inf: FootprintResult, sn: FootprintResult, inputs: ProjectInputs, assumptions: Assumptions) -> FootprintResult:
+    """Totals of the four phase results (same summation order as a single pass)."""
+    water_factor = assumptions.water_m3_per_mwh / 1000.0 # m3/MWh -> m3/kWh
+    project_years = inputs.project_duration_years
+
+    total_co2 = dev.co2_dev + train.co2_training_usage + train.co2_training_embodied + inf.co2_inference_usage + inf.co2_inference_embodied + sn.co2_storage_network
+    total_energy = dev.total_energy_kwh + train.total_energy_kwh + inf.total_energy_kwh + sn.total_energy_kwh
     total_water = total_energy * water_factor
     annual_co2 = total_co2 / max(0.1, project_years)
 
     return FootprintResult(
         total_co2_kg=total_co2, total_energy_kwh=total_energy, total_water_m3=total_water,
-        co2_dev=total_co2_dev,
-        co2_training_usage=train_co2_usage, co2_training_embodied=train_co2_embodied,
-        co2_inference_usage=inf_co2_usage_total, co2_inference_embodied=inf_co2_embodied_total,
-        co2_storage_network=sn_co2_total,
+        co2_dev=dev.co2_dev,
+        co2_training_usage=train.co2_training_usage, co2_training_embodied=train.co2_training_embodied,
+        co2_inference_usage=inf.co2_inference_usage, co2_inference_embodied=inf.co2_inference_embodied,
+        co2_storage_network=sn.co2_storage_network,
         annual_co2_kg=annual_co2
     )
 
+@timed("compute_footprint")
+def compute_footprint(inputs: ProjectInputs, assumptions: Assumptions) -> FootprintResult:
+    return combine_phases(
+        development_phase(inputs, assumptions),
+        training_phase(inputs, assumptions),
+        inference_phase(inputs, assumptions),
+        storage_network_phase(inputs, assumptions),
+        inputs, assumptions,
+    )
+
+# Each phase, with what its result depends on: the inputs it reads and the Assumptions fields it uses
+PHASES = {
+    "development": (development_phase, lambda i: (i.development, i.training.region), ("hardware_lifespan_years",)),
+    "training": (training_phase, lambda i: (i.training, i.project_duration_years), ("hardware_lifespan_years",)),
+    "inference": (inference_phase, lambda i: (i.inference, i.project_type, i.project_duration_years), ("hardware_lifespan_years", "api_energy_kwh_per_query")),
+    "storage_network": (storage_network_phase, lambda i: (i.storage_network, i.project_duration_years), ("default_kwh_per_gb_year_storage", "default_gco2_per_gb_transfer")),
+}
+
+def _phase_key(parts: tuple, assumptions: Assumptions, fields: tuple) -> tuple:
+    flat = tuple(tuple(p.model_dump().values()) if isinstance(p, BaseModel) else p for p in parts)
+    return flat + tuple(getattr(assumptions, f) for f in fields)
+
+class IncrementalFootprint:
+    """
+    compute_footprint that only recomputes the phases whose inputs (or the
+    Assumptions fields they use) changed. Each phase keeps its last
+    `maxsize` partial results; totals are re-derived on every call.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        self.maxsize = maxsize
+        self._cache = {phase: OrderedDict() for phase in PHASES}
+        self.recomputed = ()  # phases recomputed by the last call
+
+    @timed("compute_footprint_incremental")
+    def compute(self, inputs: ProjectInputs, assumptions: Assumptions) -> FootprintResult:
+        partials = []
+        recomputed = []
+        for phase, (fn, depends_on, fields) in PHASES.items():
+            cache = self._cache[phase]
+            key = _phase_key(depends_on(inputs), assumptions, fields)
+            partial = cache.get(key)
+            if partial is None:
+                partial = cache[key] = fn(inputs, assumptions)
+                recomputed.append(phase)
+                if len(cache) > self.maxsize:
+                    cache.popitem(last=False)
+            else:
+                cache.move_to_end(key)
+            partials.append(partial)
+        self.recomputed = tuple(recomputed)
+        incr("footprint_phases_recomputed", len(recomputed))
+        incr("footprint_phases_cached", len(PHASES) - len(recomputed))
+        return combine_phases(*partials, inputs, assumptions)
+
 def calculate_score(fp: FootprintResult) -> ScoreResult:
     co2_val = max(1.0, fp.total_co2_kg)
     # Recalibrated formula to align Score /100 with Grades (A-G)
@@ -170,6 +275,39 @@ def calculate_score(fp: FootprintResult) -> ScoreResult:
     return ScoreResult(final_score, grade, color, label)
 
 
+# What-if levers, in the order their reductions are applied
+WHAT_IF_LEVERS = [
+    "token_reduction_pct",
+    "traffic_reduction_pct",
+    "region_gain_pct",
+    "pue_improvement_pct",
+    "training_freq_reduction_pct",
+]
+
+def what_if_coefficients(fp: FootprintResult) -> dict:
+    """
+    kg CO₂ removed by each lever at 100%. The what-if model is linear:
+    optimized = max(0, baseline - sum(coef * pct / 100)).
+    """
+    # --- Inference usage levers ---
+    inference_usage = fp.co2_inference_usage
+
+    # --- Infrastructure levers (usage-based only) ---
+    infra_usage = (
+        fp.co2_training_usage +
+        fp.co2_inference_usage +
+        fp.co2_storage_network
+    )
+
+    return {
+        "token_reduction_pct": inference_usage,
+        "traffic_reduction_pct": inference_usage,
+        "region_gain_pct": infra_usage,
+        "pue_improvement_pct": infra_usage,
+        # --- Training frequency lever ---
+        "training_freq_reduction_pct": fp.co2_training_usage,
+    }
+
 def simulate_what_if(
     fp: FootprintResult,
     *,
@@ -183,28 +321,19 @@ def simulate_what_if(
     Simulate CO₂ reduction using realistic operational levers.
     Percentages are expected between 0 and 100.
     """
+    levers = {
+        "token_reduction_pct": token_reduction_pct,
+        "traffic_reduction_pct": traffic_reduction_pct,
+        "region_gain_pct": region_gain_pct,
+        "pue_improvement_pct": pue_improvement_pct,
+        "training_freq_reduction_pct": training_freq_reduction_pct,
+    }
+    coefficients = what_if_coefficients(fp)
 
     baseline = fp.total_co2_kg
     co2_after = baseline
-
-    # --- Inference usage levers ---
-    inference_usage = fp.co2_inference_usage
-
-    co2_after -= inference_usage * (token_reduction_pct / 100)
-    co2_after -= inference_usage * (traffic_reduction_pct / 100)
-
-    # --- Infrastructure levers (usage-based only) ---
-    infra_usage = (
-        fp.co2_training_usage +
-        fp.co2_inference_usage +
-        fp.co2_storage_network
-    )
-
-    co2_after -= infra_usage * (region_gain_pct / 100)
-    co2_after -= infra_usage * (pue_improvement_pct / 100)
-
-    # --- Training frequency lever ---
-    co2_after -= fp.co2_training_usage * (training_freq_reduction_pct / 100)
+    for lever in WHAT_IF_LEVERS:
+        co2_after -= coefficients[lever] * (levers[lever] / 100)
 
     co2_after = max(0.0, co2_after)
 
@@ -0,0 +1,175 @@
+# app/capacity.py
+"""
+Replica sizing for self-hosted inference (M/M/c queue, Erlang C).
+
+Each hour of the day has its own arrival rate: the daily volume spread along
+a traffic profile, multiplied by a peak factor for bursts within the hour.
+Requests are served by `c` replicas with an exponential service time of
+mean `latency_ms`. An hour gets the smallest `c` such that the queueing delay
+stays below the SLO budget (`p99_latency_ms - latency_ms`) for 99 % of the
+requests:
+
+    P(wait > t) = C(c, a) * exp(-(c - a) * t / S)
+
+with `a = λ·S` the offered load and `C` the Erlang C probability of waiting.
+The autoscaling policy turns the hourly replica counts into replica-hours,
+which replace the hand-declared always-on / active time in compute_footprint.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from app.constants import TRAFFIC_PROFILES, LATENCY_SLO_QUANTILE
+
+SECONDS_PER_HOUR = 3600.0
+# Erlang B recurrence start, in standard deviations (√a) below the offered load
+ERLANG_B_START_SIGMAS = 10.0
+
+
+@dataclass(frozen=True)
+class CapacityPlan:
+    hourly_replicas: tuple  # 24 replica counts (00h-23h)
+    peak_replicas: int
+    replica_hours_per_year: float
+    utilization: float  # busy replica-hours / provisioned replica-hours
+
+
+def profile_weights(profile: str) -> np.ndarray:
+    """Hourly weights of a traffic profile, normalized to a mean of 1 (unknown: flat)."""
+    weights = np.asarray(TRAFFIC_PROFILES.get(profile, TRAFFIC_PROFILES["flat"])["weights"], dtype=np.float64)
+    return weights * (24.0 / weights.sum())
+
+
+def erlang_c(c: int, a: float) -> float:
+    """Probability that a request waits in an M/M/c queue with offered load `a` (1 if unstable)."""
+    if c <= a:
+        return 1.0
+    b = 1.0  # Erlang B, by recurrence (numerically stable for large c)
+    for k in range(1, c + 1):
+        b = a * b / (k + a * b)
+    rho = a / c
+    return b / (1.0 - rho * (1.0 - b))
+
+
+def replicas_for_slo(arrival_rate: float, service_s: float, p99_s: float, quantile: float = LATENCY_SLO_QUANTILE) -> int:
+    """
+    Smallest replica count meeting the latency SLO at `arrival_rate` requests/s.
+    A target at or below the service time leaves no queueing budget: the
+    probability of waiting at all must then stay below 1 - quantile.
+    """
+    return int(replicas_for_slo_arrays(np.array([arrival_rate], dtype=np.float64), service_s, p99_s, quantile)[0])
+
+
+def replicas_for_slo_arrays(arrival_rate, service_s, p99_s, quantile: float = LATENCY_SLO_QUANTILE) -> np.ndarray:
+    """
+    Vectorized `replicas_for_slo` (arguments broadcast together).
+
+    The Erlang B recurrence B(k) = a·B(k-1) / (k + a·B(k-1)) contracts towards
+    1 - k/a below the load: started from that value ERLANG_B_START_SIGMAS
+    standard deviations (√a) below the load it reaches the same B as from
+    k = 0, in O(√a) steps instead of O(a). Square-root staffing puts the
+    answer at a + O(√a), so each cell runs O(√a) steps; cells are dropped
+    from the arrays as soon as they are sized.
+    """
+    rate, service, p99 = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (arrival_rate, service_s, p99_s)))
+    out = np.zeros(rate.shape, dtype=np.int64)
+    flat_out = out.reshape(-1)
+    cells = np.flatnonzero(rate.reshape(-1) > 0)
+    service = service.reshape(-1)[cells]
+    a = rate.reshape(-1)[cells] * service
+    budget = np.maximum(0.0, p99.reshape(-1)[cells] - service)
+    tail = 1.0 - quantile
+
+    c_min = np.floor(a) + 1  # stability: c > a
+    k = np.maximum(0.0, np.floor(a - ERLANG_B_START_SIGMAS * np.sqrt(a)))
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        b = np.where(k == 0, 1.0, 1.0 - k / a)
+        # Up to c_min - 1: recurrence only (no replica count below c_min is stable),
+        # cells sorted by decreasing length so each step updates a prefix
+        warm = c_min - 1 - k
+        order = np.argsort(-warm, kind="stable")
+        cells, a, b, k, warm, budget, service = (x[order] for x in (cells, a, b, k, warm, budget, service))
+        running = np.searchsorted(-warm, -np.arange(int(warm[0]) if warm.size else 0), side="left")  # cells with warm > step
+        for n in running:
+            k[:n] += 1
+            ab = a[:n] * b[:n]
+            b[:n] = ab / (k[:n] + ab)
+        # From c_min: smallest c meeting the SLO
+        while cells.size:
+            k += 1
+            ab = a * b
+            b = ab / (k + ab)
+            p_wait = b / (1.0 - (a / k) * (1.0 - b))
+            sized = p_wait * np.exp(-(k - a) * budget / service) <= tail
+            if sized.any():
+                flat_out[cells[sized]] = k[sized]
+                keep = ~sized
+                cells, a, b, k, budget, service = (x[keep] for x in (cells, a, b, k, budget, service))
+    return out
+
+
+def hourly_replicas(req_per_day, latency_ms, peak_factor, p99_latency_ms, weights: np.ndarray) -> np.ndarray:
+    """Replica counts, shape (deployments, 24), of deployments with hourly traffic `weights` (deployments, 24)."""
+    col = lambda x: np.asarray(x, dtype=np.float64).reshape(-1, 1)  # noqa: E731
+    service_s = np.maximum(col(latency_ms), 1e-3) / 1000.0
+    rates = col(req_per_day) / (24 * SECONDS_PER_HOUR) * weights
+    return replicas_for_slo_arrays(rates * col(peak_factor), service_s, col(p99_latency_ms) / 1000.0)
+
+
+def replica_hours_per_day(hourly: np.ndarray, policies) -> np.ndarray:
+    """Daily replica-hours of each row of `hourly` under its autoscaling policy."""
+    policies = np.asarray(policies, dtype=object).reshape(-1)
+    peak = hourly.max(axis=1)
+    return np.select(
+        [policies == "fixed", policies == "scale_to_zero"],
+        [peak * 24, hourly.sum(axis=1)],
+        np.maximum(1, hourly).sum(axis=1),  # "hourly" (and unknown policies)
+    ).astype(np.float64)
+
+
+@lru_cache(maxsize=4096)
+def plan_capacity(req_per_day: float, latency_ms: float, peak_factor: float, p99_latency_ms: float, profile: str, policy: str) -> CapacityPlan:
+    """Hourly replica counts and yearly replica-hours for one inference deployment."""
+    service_s = max(latency_ms, 1e-3) / 1000.0
+    hourly = hourly_replicas(req_per_day, latency_ms, peak_factor, p99_latency_ms, profile_weights(profile)[None, :])[0].tolist()
+    peak = max(hourly)
+
+    # Same rules as replica_hours_per_day
+    if policy == "fixed":
+        hourly = [peak] * 24
+    elif policy != "scale_to_zero":  # "hourly" (and unknown policies)
+        hourly = [max(1, c) for c in hourly]
+
+    replica_hours_day = float(sum(hourly))
+    busy_hours_day = req_per_day * service_s / SECONDS_PER_HOUR
+    return CapacityPlan(
+        hourly_replicas=tuple(hourly),
+        peak_replicas=peak,
+        replica_hours_per_year=replica_hours_day * 365.0,
+        utilization=busy_hours_day / replica_hours_day if replica_hours_day else 0.0,
+    )
+
+
+def replica_hours_arrays(req_per_day, latency_ms, peak_factor, p99_latency_ms, profile_codes, policy_codes, profiles: list, policies: list) -> np.ndarray:
+    """
+    Vectorized `plan_capacity(...).replica_hours_per_year`. Sizing runs once
+    per distinct deployment, all deployments × hours at once; codes index
+    `profiles` / `policies` (-1: unknown).
+    """
+    keys = np.column_stack([
+        np.asarray(req_per_day, dtype=np.float64), np.asarray(latency_ms, dtype=np.float64),
+        np.asarray(peak_factor, dtype=np.float64), np.asarray(p99_latency_ms, dtype=np.float64),
+        np.asarray(profile_codes, dtype=np.float64), np.asarray(policy_codes, dtype=np.float64),
+    ])
+    if len(keys) == 0:
+        return np.zeros(0)
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    req, lat, peak, p99, prof, pol = unique.T
+    # Weights of each known profile, then the flat fallback for unknown codes (-1)
+    profile_table = np.vstack([profile_weights(p) for p in profiles] + [profile_weights("")])
+    weights = profile_table[np.where(prof >= 0, prof, len(profiles)).astype(np.intp)]
+    policy_names = np.array(list(policies) + [""], dtype=object)[np.where(pol >= 0, pol, len(policies)).astype(np.intp)]
+    hourly = hourly_replicas(req, lat, peak, p99, weights)
+    hours = replica_hours_per_day(hourly, policy_names) * 365.0
+    return hours[inverse.reshape(-1)]
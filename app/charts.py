@@ -0,0 +1,129 @@
+# app/charts.py
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from app.models import FootprintResult
+from app.instrumentation import timed
+
+# Shared transparent layout for the dashboard charts
+BASE_LAYOUT = dict(
+    paper_bgcolor="rgba(0,0,0,0)",
+    plot_bgcolor="rgba(0,0,0,0)",
+    font_color="#333333",
+    title_font_color="#0b1220",
+    showlegend=False
+)
+
+@timed("figure_waterfall")
+def build_waterfall_figure(res: FootprintResult):
+    wf_df = pd.DataFrame({
+        "Phase": [
+            "Development",
+            "Training (Usage)",
+            "Training (Embodied)",
+            "Inference (Usage)",
+            "Inference (Embodied)",
+            "Storage & Network"
+        ],
+        "CO₂ (kg)": [
+            res.co2_dev,
+            res.co2_training_usage,
+            res.co2_training_embodied,
+            res.co2_inference_usage,
+            res.co2_inference_embodied,
+            res.co2_storage_network
+        ]
+    })
+
+    wf_df = wf_df[wf_df["CO₂ (kg)"] > 0]
+
+    fig_wf = px.bar(
+        wf_df,
+        x="Phase",
+        y="CO₂ (kg)",
+        color="Phase",
+        title="CO₂ Contribution by Phase"
+    )
+    fig_wf.update_layout(**BASE_LAYOUT)
+    return fig_wf
+
+@timed("figure_simulator")
+def build_simulator_figure(res: FootprintResult, what_if: dict, project_years: float):
+    sim_df = pd.DataFrame({
+        "Scenario": ["Current", "After optimization"],
+        "Annual CO₂ (kg)": [
+            res.annual_co2_kg,
+            what_if["optimized_co2_kg"] / project_years
+        ]
+    })
+
+    fig_sim = px.bar(
+        sim_df,
+        x="Scenario",
+        y="Annual CO₂ (kg)",
+        color="Scenario",
+        text_auto=".2s",
+        title="Annual CO₂ Impact — What-If Scenario",
+        color_discrete_map={
+            "Current": "#7f8c8d",            # gris (baseline)
+            "After optimization": "#2ecc71"  # vert (gain)
+        }
+    )
+
+    fig_sim.update_traces(
+        textfont=dict(
+            size=20,              # plus lisible mais pas agressif
+            color="white",        # contraste propre dans les barres
+            family="sans-serif",  # police neutre (proche Power BI)
+        ),
+        textposition="inside",
+        insidetextanchor="middle"
+    )
+    fig_sim.update_layout(**BASE_LAYOUT)
+    return fig_sim
+
+@timed("figure_matrix")
+def build_matrix_figure(matrix: pd.DataFrame, hardware_names: dict | None = None, infra_names: dict | None = None):
+    """Heatmap of total CO₂ per region x hardware, one panel per infrastructure; cells show the grade."""
+    hardware_names = hardware_names or {}
+    infra_names = infra_names or {}
+    regions = list(dict.fromkeys(matrix["region"]))
+    hardware = list(dict.fromkeys(matrix["hardware_id"]))
+    infras = list(dict.fromkeys(matrix["infra_type"]))
+    shape = (len(regions), len(hardware), len(infras))
+    # Rows come region-major, then hardware, then infra (comparison_matrix order)
+    co2 = matrix["total_co2_kg"].to_numpy().reshape(shape).transpose(2, 0, 1)
+    grades = matrix["score_grade"].to_numpy().reshape(shape).transpose(2, 0, 1)
+
+    fig = px.imshow(
+        np.log10(np.maximum(co2, 1.0)),
+        facet_col=0,
+        facet_col_wrap=2,
+        x=[hardware_names.get(h, h) for h in hardware],
+        y=regions,
+        color_continuous_scale="RdYlGn_r",
+        aspect="auto",
+        title="Total CO₂ by Region × Hardware × Infrastructure",
+    )
+    for i, trace in enumerate(fig.data):
+        trace.text = grades[i]
+        trace.customdata = co2[i]
+        trace.texttemplate = "%{text}"
+        trace.hovertemplate = "%{y} · %{x}<br>%{customdata:,.0f} kg CO₂ (%{text})<extra></extra>"
+    for annotation in fig.layout.annotations:
+        annotation.text = infra_names.get(infras[int(annotation.text.split("=")[-1])], "")
+    fig.update_layout(**{**BASE_LAYOUT, "height": 300 * ((len(infras) + 1) // 2)})
+    fig.update_coloraxes(colorbar_title="log₁₀ kg", showscale=True)
+    return fig
+
+@timed("figure_timeline")
+def build_timeline_figure(monthly: pd.DataFrame, title: str, stacked: bool = True):
+    """Cumulative kg CO₂ over the months of `monthly` (one series per column): stacked areas or lines."""
+    cumulative = monthly.cumsum()
+    cumulative.index = cumulative.index.to_timestamp()
+    long_df = cumulative.rename_axis("Month").reset_index().melt(id_vars="Month", var_name="Series", value_name="Cumulative CO₂ (kg)")
+    plot = px.area if stacked else px.line
+    fig = plot(long_df, x="Month", y="Cumulative CO₂ (kg)", color="Series", title=title)
+    fig.update_layout(**{**BASE_LAYOUT, "showlegend": True, "legend_title_text": ""})
+    return fig
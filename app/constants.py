@@ -1,5 +1,8 @@
 # app/constants.py
+import csv
+import hashlib
 import json
+import os
 from pathlib import Path
 
 # Relative paths definition
@@ -41,6 +44,46 @@ HARDWARE_CATALOG = [
     { "id": "gpu_h100", "name": "NVIDIA H100 (HPC)", "type": "gpu", "watts": 700, "gwp": 2500 }
 ]
 
+# External SKU files (JSON list or CSV with id, name, type, watts, gwp and an
+# optional "uses" list: dev, training, inference), e.g. a cloud instance export.
+# Optional idle_watts and tokens_per_s (batch size -> tokens/s, "1:25|8:150" in
+# CSV) give the SKU a throughput curve (HARDWARE_THROUGHPUT, app/throughput.py).
+# Paths (files or directories) separated by os.pathsep; built-in ids can be overridden.
+HARDWARE_SKUS_ENV = "ECOMETRICS_HARDWARE_SKUS"
+
+def load_hardware_skus(paths: str) -> list:
+    """Reads SKU records from the given files / directories (*.json, *.csv)."""
+    files = []
+    for entry in filter(None, paths.split(os.pathsep)):
+        p = Path(entry)
+        files.extend(sorted(p.glob("*.json")) + sorted(p.glob("*.csv")) if p.is_dir() else [p])
+    skus = []
+    for f in files:
+        if f.suffix == ".csv":
+            with open(f, "r", encoding="utf-8", newline="") as fh:
+                rows = list(csv.DictReader(fh))
+            for row in rows:
+                row["uses"] = [u for u in (row.get("uses") or "").split("|") if u]
+                row["tokens_per_s"] = dict(point.split(":") for point in (row.get("tokens_per_s") or "").split("|") if point)
+        else:
+            with open(f, "r", encoding="utf-8") as fh:
+                rows = json.load(fh)
+        skus.extend(
+            {"id": str(r["id"]), "name": str(r.get("name") or r["id"]), "type": str(r.get("type") or "gpu"),
+             "watts": float(r["watts"]), "gwp": float(r["gwp"]), **({"uses": list(r["uses"])} if r.get("uses") else {}),
+             **({"idle_watts": float(r["idle_watts"])} if r.get("idle_watts") not in (None, "") else {}),
+             **({"tokens_per_s": {int(b): float(t) for b, t in r["tokens_per_s"].items()}} if r.get("tokens_per_s") else {})}
+            for r in rows
+        )
+    for sku in skus:
+        if "tokens_per_s" in sku and "idle_watts" not in sku:
+            raise ValueError(f"SKU {sku['id']!r}: tokens_per_s requires idle_watts")
+    return skus
+
+if os.environ.get(HARDWARE_SKUS_ENV):
+    _skus = {sku["id"]: sku for sku in load_hardware_skus(os.environ[HARDWARE_SKUS_ENV])}
+    HARDWARE_CATALOG = [_skus.pop(hw["id"], hw) for hw in HARDWARE_CATALOG] + list(_skus.values())
+
 # Helper for lookups
 HARDWARE_DICT = {hw["id"]: hw for hw in HARDWARE_CATALOG}
 
@@ -58,4 +101,55 @@ API_MODELS = {
     "Llama 3 70B (SaaS)": 0.04,              # Hosted open-weight model
     "Mistral Large": 0.06,
     "Embedding (Ada v2 / Cohere)": 0.001     # Very light
-}
\ No newline at end of file
+}
+# --- Inference capacity model (app/capacity.py) ---
+# Hourly traffic shapes (00h-23h, relative weights; normalized to a mean of 1)
+TRAFFIC_PROFILES = {
+    "flat": {"name": "Flat (24/7 constant)", "weights": [1.0] * 24},
+    "business_hours": {"name": "Business hours (08h-19h)", "weights": [0, 0, 0, 0, 0, 0, 0.1, 0.4, 1.5, 2.2, 2.4, 2.3, 1.8, 2.0, 2.4, 2.3, 2.1, 1.6, 0.8, 0.3, 0.1, 0, 0, 0]},
+    "consumer": {"name": "Consumer (evening peak)", "weights": [0.5, 0.3, 0.2, 0.15, 0.15, 0.2, 0.4, 0.7, 0.9, 1.0, 1.1, 1.2, 1.3, 1.2, 1.1, 1.1, 1.2, 1.4, 1.7, 2.0, 2.1, 1.9, 1.4, 0.9]},
+}
+
+AUTOSCALING_POLICIES = {
+    "fixed": "Fixed fleet sized for the peak hour (always on)",
+    "hourly": "Hourly autoscaling (min. 1 replica)",
+    "scale_to_zero": "Hourly autoscaling with scale-to-zero",
+}
+
+# Quantile of the latency SLO (p99)
+LATENCY_SLO_QUANTILE = 0.99
+
+# --- Self-hosted LLM throughput (app/throughput.py) ---
+# Decode throughput per device for a reference 8B-parameter model in fp16:
+# batch size -> tokens/s (interpolated on log2(batch), flat beyond the last point).
+# idle_watts: draw of a powered but idle device (active draw rises linearly to `watts`).
+REFERENCE_MODEL_PARAMS_B = 8.0
+HARDWARE_THROUGHPUT = {
+    "laptop_std": {"idle_watts": 5, "tokens_per_s": {1: 8, 8: 25, 32: 35}},
+    "laptop_pro": {"idle_watts": 10, "tokens_per_s": {1: 30, 8: 120, 32: 200}},
+    "server_cpu": {"idle_watts": 90, "tokens_per_s": {1: 10, 8: 40, 32: 60}},
+    "gpu_t4": {"idle_watts": 15, "tokens_per_s": {1: 25, 8: 150, 32: 350, 64: 400}},
+    "gpu_a100": {"idle_watts": 60, "tokens_per_s": {1: 100, 8: 650, 32: 1800, 128: 3500, 256: 3900}},
+    "gpu_h100": {"idle_watts": 100, "tokens_per_s": {1: 150, 8: 1000, 32: 3000, 128: 6500, 256: 7500}},
+}
+# SKU records override or add curves (an idle_watts alone only sets the idle draw)
+for _hw in HARDWARE_CATALOG:
+    if "idle_watts" in _hw:
+        HARDWARE_THROUGHPUT[_hw["id"]] = {**HARDWARE_THROUGHPUT.get(_hw["id"], {}), **{k: _hw[k] for k in ("idle_watts", "tokens_per_s") if k in _hw}}
+
+# Weight precision: throughput multiplier vs fp16 (memory-bound decoding)
+QUANTIZATION_PROFILES = {
+    "fp16": {"name": "FP16 / BF16", "throughput": 1.0},
+    "int8": {"name": "INT8", "throughput": 1.5},
+    "int4": {"name": "INT4 (GPTQ / AWQ)", "throughput": 2.0},
+}
+
+# --- Factor version ---
+# Short hash of every factor table the calculator reads: saved runs computed
+# with different factors (e.g. another SKU file) never share a run hash.
+def _factor_version() -> str:
+    tables = [INFRASTRUCTURE_PROFILES, HARDWARE_DICT, DEFAULT_GRID_INTENSITY, HOURS_PER_YEAR, API_MODELS,
+              TRAFFIC_PROFILES, AUTOSCALING_POLICIES, HARDWARE_THROUGHPUT, QUANTIZATION_PROFILES]
+    return hashlib.sha256(json.dumps(tables, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+
+FACTOR_VERSION = _factor_version()
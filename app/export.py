@@ -0,0 +1,350 @@
+# app/export.py
+"""
+Streaming export of the saved project history (CSV, JSONL, Parquet, XLSX).
+
+The history file is read in chunks of `chunk_rows`; each chunk is filtered,
+optionally completed with the per-phase breakdown and appended to the output,
+so memory stays bounded whatever the history size. Text formats are
+compressed on the fly (gzip by default), Parquet row groups use zstd and XLSX
+is compressed by the format itself. Columns get stable types across chunks
+(inputs schema, nullable integers and booleans, timestamps), so every row
+group of a Parquet file shares one schema.
+
+The history is read from a single open handle: writers replace the file by
+rename, so a running export keeps a consistent snapshot.
+
+    python -m app.export --format parquet --out exports/history.parquet --latest-only
+    python -m app.export --format csv --out - --type genai --from 2025-01-01 | gzip -d | head
+"""
+import argparse
+import bz2
+import gzip
+import importlib.util
+import io
+import lzma
+import os
+import sys
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app import utils
+from app.models import Assumptions
+from app.utils import HISTORY_SCHEMA, HISTORY_RESULT_COLUMNS, HISTORY_DATETIME_COLUMNS
+from app.instrumentation import timed, incr
+
+DEFAULT_CHUNK_ROWS = 50_000
+FORMATS = {"csv": ".csv", "jsonl": ".jsonl", "parquet": ".parquet", "xlsx": ".xlsx"}
+TEXT_FORMATS = ("csv", "jsonl")
+# Writer package of each binary format (xlsxwriter is optional, not in requirements.txt)
+FORMAT_REQUIREMENTS = {"parquet": "pyarrow", "xlsx": "xlsxwriter"}
+# Stream compression of the text formats (Parquet and XLSX compress internally)
+COMPRESSIONS = {"gzip": ".gz", "bz2": ".bz2", "xz": ".xz", "none": ""}
+DEFAULT_COMPRESSION = "gzip"
+XLSX_MAX_ROWS = 1_048_576  # per sheet, header included
+
+# Export dtype of each schema type (nullable: rows saved before a field existed are empty)
+_EXPORT_DTYPES = {str: "str", float: "float64", int: "Int64", bool: "boolean"}
+
+
+def available_formats() -> list:
+    """FORMATS whose writer package is installed."""
+    return [fmt for fmt in FORMATS if fmt not in FORMAT_REQUIREMENTS or importlib.util.find_spec(FORMAT_REQUIREMENTS[fmt]) is not None]
+
+
+@dataclass
+class ExportFilter:
+    """The Projects page filters (empty = no filter); the query is a plain substring, not the fuzzy search."""
+    query: str = ""  # case-insensitive substring of the project name, owner or tags
+    project_types: list = field(default_factory=list)
+    owners: list = field(default_factory=list)
+    grades: list = field(default_factory=list)
+    date_from: str | None = None  # saved on or after (ISO date)
+    date_to: str | None = None    # saved on or before (inclusive)
+    latest_only: bool = False     # latest saved version of each project
+
+    def mask(self, chunk: pd.DataFrame) -> np.ndarray:
+        keep = np.ones(len(chunk), dtype=bool)
+        for col, values in (("project_type", self.project_types), ("owner", self.owners), ("score_grade", self.grades)):
+            if values and col in chunk.columns:
+                keep &= chunk[col].isin(values).to_numpy()
+        if self.query:
+            text = np.zeros(len(chunk), dtype=bool)
+            for col in ("project_name", "owner", "tags"):
+                if col in chunk.columns:
+                    text |= chunk[col].str.contains(self.query, case=False, regex=False, na=False).to_numpy(dtype=bool)
+            keep &= text
+        if (self.date_from or self.date_to) and "timestamp" in chunk.columns:
+            ts = chunk["timestamp"]
+            if self.date_from:
+                keep &= (ts >= pd.Timestamp(self.date_from)).to_numpy(dtype=bool)
+            if self.date_to:
+                keep &= (ts < pd.Timestamp(self.date_to) + pd.Timedelta(days=1)).to_numpy(dtype=bool)
+        return keep
+
+
+def export_filename(fmt: str, compression: str | None = None, today: date | None = None) -> str:
+    suffix = FORMATS[fmt] + (COMPRESSIONS[compression or DEFAULT_COMPRESSION] if fmt in TEXT_FORMATS else "")
+    return f"ecometrics_history_{(today or date.today()):%Y%m%d}{suffix}"
+
+
+def export_dtypes(columns) -> dict:
+    """read_csv dtypes of the history columns (timestamps are read as text, then parsed)."""
+    dtypes = {}
+    for col in columns:
+        if col in HISTORY_RESULT_COLUMNS:
+            dtypes[col] = "float64"
+        elif col in HISTORY_SCHEMA and HISTORY_SCHEMA[col] is int:
+            dtypes[col] = "float64"  # "8.0" after a full rewrite: cast to Int64 after reading
+        else:
+            dtypes[col] = _EXPORT_DTYPES.get(HISTORY_SCHEMA.get(col), "str")
+    return dtypes
+
+
+def _typed(chunk: pd.DataFrame) -> pd.DataFrame:
+    for col in chunk.columns:
+        if col in HISTORY_DATETIME_COLUMNS:
+            utc = HISTORY_DATETIME_COLUMNS[col]
+            parsed = pd.to_datetime(chunk[col], format="ISO8601", errors="coerce", utc=utc)
+            chunk[col] = parsed.astype("datetime64[us, UTC]" if utc else "datetime64[us]")
+        elif col in HISTORY_SCHEMA and HISTORY_SCHEMA[col] is int and col not in HISTORY_RESULT_COLUMNS:
+            chunk[col] = chunk[col].astype("Int64")
+    return chunk
+
+
+def _latest_rows(handle, chunk_rows: int) -> pd.Series:
+    """Position of the last row of each project (rows are in save order)."""
+    last = {}
+    start = 0
+    for chunk in pd.read_csv(handle, usecols=["project_name"], dtype="str", chunksize=chunk_rows):
+        names = chunk["project_name"]
+        positions = pd.Series(np.arange(start, start + len(chunk)), index=names.to_numpy())
+        positions = positions[~positions.index.duplicated(keep="last")]
+        last.update(zip(positions.index, positions.to_numpy()))
+        start += len(chunk)
+    return pd.Series(last, dtype=np.int64)
+
+
+def _add_breakdown(chunk: pd.DataFrame, assumptions: Assumptions, tables) -> pd.DataFrame:
+    """Fills the per-phase result columns the stored rows lack (aggregated rows keep their stored values)."""
+    from app.batch import RESULT_COLUMNS, compute_footprint_batch
+    from app.fleet import AGGREGATED_TYPE
+    from app.sdk import project_inputs
+
+    for col in RESULT_COLUMNS:
+        if col not in chunk.columns:
+            chunk[col] = np.nan
+    computed = chunk["project_type"] != AGGREGATED_TYPE if "project_type" in chunk.columns else pd.Series(True, index=chunk.index)
+    if computed.any():
+        # Inputs missing from old rows take their defaults, as in the calculator
+        res = compute_footprint_batch(project_inputs(chunk[computed]), assumptions, tables)
+        for col in RESULT_COLUMNS:
+            chunk.loc[computed, col] = chunk.loc[computed, col].fillna(res[col])
+    return chunk
+
+
+# --- Writers: write(chunk) per chunk, then close() ---
+def _compressor(raw, compression: str):
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+    if compression == "bz2":
+        return bz2.BZ2File(raw, mode="wb")
+    if compression == "xz":
+        return lzma.LZMAFile(raw, mode="wb", preset=3)  # the default preset 6 takes ~94 MB and 5x the time
+    return None
+
+
+class _TextWriter:
+    def __init__(self, target, fmt: str, compression: str):
+        self.fmt = fmt
+        # Layers closed at the end: the compressor, and the file when we opened it
+        # (a caller's stream, e.g. stdout, is left open)
+        raw = open(target, "wb") if isinstance(target, (str, Path)) else target
+        compressor = _compressor(raw, compression)
+        self.layers = [layer for layer in (compressor, raw if raw is not target else None) if layer is not None]
+        self.stream = io.TextIOWrapper(compressor or raw, encoding="utf-8", newline="")
+        self.header = True
+
+    def write(self, chunk: pd.DataFrame):
+        if self.fmt == "csv":
+            chunk.to_csv(self.stream, header=self.header, index=False)
+        else:
+            chunk.to_json(self.stream, orient="records", lines=True, date_format="iso", date_unit="us", double_precision=15, force_ascii=False)
+        self.header = False
+
+    def close(self):
+        self.stream.flush()
+        self.stream.detach()
+        for layer in self.layers:
+            layer.close()
+
+
+class _ParquetWriter:
+    def __init__(self, target, fmt: str, compression: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from e
+        self.pa, self.pq = pa, pq
+        self.target = str(target) if isinstance(target, Path) else target
+        self.writer = None
+
+    def write(self, chunk: pd.DataFrame):
+        if self.writer is None:
+            table = self.pa.Table.from_pandas(chunk, preserve_index=False)
+            self.writer = self.pq.ParquetWriter(self.target, table.schema, compression="zstd")
+        else:
+            table = self.pa.Table.from_pandas(chunk, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class _XlsxWriter:
+    def __init__(self, target, fmt: str, compression: str):
+        try:
+            import xlsxwriter
+        except ImportError as e:
+            raise ImportError("XLSX output requires xlsxwriter: pip install xlsxwriter") from e
+        if not isinstance(target, (str, Path)):
+            raise ValueError("XLSX output needs a file path")
+        # constant_memory: rows are flushed to disk as soon as the next row starts
+        self.book = xlsxwriter.Workbook(str(target), {
+            "constant_memory": True, "remove_timezone": True, "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        })
+        self.sheet = None
+        self.row = 0
+        self.sheets = 0
+
+    def _new_sheet(self, columns):
+        self.sheets += 1
+        self.sheet = self.book.add_worksheet("history" if self.sheets == 1 else f"history ({self.sheets})")
+        self.sheet.write_row(0, 0, list(columns))
+        self.row = 1
+
+    def write(self, chunk: pd.DataFrame):
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for record in values.itertuples(index=False, name=None):
+            if self.sheet is None or self.row >= XLSX_MAX_ROWS:
+                self._new_sheet(chunk.columns)
+            self.sheet.write_row(self.row, 0, record)
+            self.row += 1
+
+    def close(self):
+        if self.sheet is None:
+            self.book.add_worksheet("history")
+        self.book.close()
+
+
+WRITERS = {"csv": _TextWriter, "jsonl": _TextWriter, "parquet": _ParquetWriter, "xlsx": _XlsxWriter}
+
+
+@timed("export_history")
+def export_history(
+    out,
+    fmt: str = "csv",
+    filters: ExportFilter | None = None,
+    *,
+    breakdown: bool = False,
+    assumptions: Assumptions | None = None,
+    compression: str | None = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    source: Path | None = None,
+    on_progress=None,
+) -> int:
+    """
+    Streams the filtered history to `out` (path or binary file object; XLSX
+    needs a path). With `breakdown`, per-phase results missing from the stored
+    rows are recomputed with `assumptions`. `on_progress(fraction)` is called
+    after each chunk. Returns the number of rows written.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r} (expected one of {list(WRITERS)})")
+    compression = compression or DEFAULT_COMPRESSION
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r} (expected one of {list(COMPRESSIONS)})")
+    filters = filters or ExportFilter()
+    source = Path(source or utils.PROJECTS_CSV)
+    if not source.exists():
+        raise FileNotFoundError(f"No saved projects to export ({source})")
+    assumptions = assumptions or Assumptions()
+    tables = None
+    if breakdown:
+        from app.batch import factor_tables
+        tables = factor_tables()
+
+    writer = WRITERS[fmt](out, fmt, compression)
+    written = 0
+    started = False
+    try:
+        with open(source, "rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            columns = pd.read_csv(handle, nrows=0).columns
+            handle.seek(0)
+            latest = _latest_rows(handle, chunk_rows) if filters.latest_only and "project_name" in columns else None
+            handle.seek(0)
+            start = 0
+            for chunk in pd.read_csv(handle, dtype=export_dtypes(columns), float_precision="round_trip", chunksize=chunk_rows):
+                chunk = _typed(chunk)
+                keep = filters.mask(chunk)
+                if latest is not None:
+                    positions = np.arange(start, start + len(chunk))
+                    keep &= chunk["project_name"].map(latest).to_numpy(dtype=np.float64, na_value=-1) == positions
+                start += len(chunk)
+                chunk = chunk[keep]
+                if breakdown:
+                    chunk = _add_breakdown(chunk.copy(), assumptions, tables)
+                if len(chunk) or not started:
+                    writer.write(chunk)  # an empty first chunk still writes the header/schema
+                    started = True
+                written += len(chunk)
+                if on_progress:
+                    on_progress(min(1.0, handle.tell() / max(1, size)))
+    finally:
+        writer.close()
+    incr("history_rows_exported", written)
+    return written
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export the saved project history (data/projects.csv).")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--out", default=None, help="Output path ('-': stdout, text formats and Parquet). Default: a dated file name.")
+    parser.add_argument("--compression", choices=list(COMPRESSIONS), default=DEFAULT_COMPRESSION, help="Compression of CSV/JSONL output.")
+    parser.add_argument("--breakdown", action="store_true", help="Add the per-phase results (recomputed for rows saved without them).")
+    parser.add_argument("--query", default="", help="Substring of the project name, owner or tags.")
+    parser.add_argument("--type", dest="project_types", nargs="*", default=[])
+    parser.add_argument("--owner", dest="owners", nargs="*", default=[])
+    parser.add_argument("--grade", dest="grades", nargs="*", default=[])
+    parser.add_argument("--from", dest="date_from", help="Saved on or after (YYYY-MM-DD).")
+    parser.add_argument("--to", dest="date_to", help="Saved on or before (YYYY-MM-DD).")
+    parser.add_argument("--latest-only", action="store_true", help="Latest saved version of each project only.")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    filters = ExportFilter(
+        query=args.query, project_types=args.project_types, owners=args.owners, grades=args.grades,
+        date_from=args.date_from, date_to=args.date_to, latest_only=args.latest_only,
+    )
+    out = args.out or export_filename(args.format, args.compression)
+    if out == "-" and args.format == "xlsx":
+        parser.error("XLSX output needs a file path (--out)")
+    if not utils.PROJECTS_CSV.exists():
+        parser.error(f"no saved projects to export ({utils.PROJECTS_CSV})")
+    target = sys.stdout.buffer if out == "-" else Path(out)
+    if out != "-":
+        target.parent.mkdir(parents=True, exist_ok=True)
+    rows = export_history(target, args.format, filters, breakdown=args.breakdown, compression=args.compression, chunk_rows=args.chunk_rows)
+    if out != "-":
+        print(f"{rows} rows -> {out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+# app/fleet.py
+"""
+Shared-fleet allocation: devices pooled across projects.
+
+Standalone results charge every project the full draw and embodied carbon
+of its own `hardware_count` devices, so projects sharing a pool double-count
+idle time and manufacturing. Here a training or compute-inference phase whose
+(hardware, region, infra) matches a `FleetPool` is charged instead:
+
+- its busy device-hours at the device draw (direct energy),
+- a share of the pool's idle energy and yearly embodied carbon, in proportion
+  to its busy device-hours among all the pool's users.
+
+Every phase of every project is allocated in one vectorized pass; the pool
+overhead is fully distributed whenever the pool has at least one user.
+"""
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from app.constants import HOURS_PER_YEAR
+from app.models import Assumptions, FleetPool
+from app.batch import FactorTables, factor_tables, encode_inputs, compute_footprint_arrays, inference_active_hours
+from app.throughput import FALLBACK_HARDWARE, idle_watts
+from app.utils import DATA_DIR
+from app.instrumentation import timed
+
+FLEET_JSON = DATA_DIR / "fleet_pools.json"
+AGGREGATED_TYPE = "Complex / Aggregated"
+
+
+def load_pools() -> list[FleetPool]:
+    if not FLEET_JSON.exists():
+        return []
+    with open(FLEET_JSON, "r", encoding="utf-8") as f:
+        return [FleetPool(**p) for p in json.load(f)]
+
+
+def save_pools(pools: list[FleetPool]):
+    fd, tmp_path = tempfile.mkstemp(dir=FLEET_JSON.parent, prefix=f".{FLEET_JSON.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump([p.model_dump() for p in pools], f, indent=2)
+        os.replace(tmp_path, FLEET_JSON)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@dataclass
+class FleetAllocation:
+    projects: pd.DataFrame  # one row per project: standalone vs fleet-consistent totals
+    pools: pd.DataFrame     # one row per pool: usage and yearly overhead
+    unallocated_co2_kg_per_year: float  # overhead of pools nobody uses
+
+
+def _pool_index(hw: np.ndarray, region: np.ndarray, infra: np.ndarray, pools: list[FleetPool], tables: FactorTables) -> np.ndarray:
+    """Pool of each row (-1: none), looked up through a dense key table."""
+    sizes = (len(tables.hardware_ids) + 1, len(tables.regions) + 1, len(tables.infra_types) + 1)
+    lookup = np.full(sizes[0] * sizes[1] * sizes[2], -1, dtype=np.int64)
+    for i, pool in reversed(list(enumerate(pools))):  # first matching pool wins
+        if pool.hardware_id in tables.hardware_ids and pool.region in tables.regions and pool.infra_type in tables.infra_types:
+            key = np.ravel_multi_index(
+                (tables.hardware_ids.index(pool.hardware_id) + 1, tables.regions.index(pool.region) + 1, tables.infra_types.index(pool.infra_type) + 1),
+                sizes,
+            )
+            lookup[key] = i
+    keys = np.ravel_multi_index((hw.astype(np.int64) + 1, region.astype(np.int64) + 1, infra.astype(np.int64) + 1), sizes)
+    return lookup[keys]
+
+
+@timed("allocate_fleet")
+def allocate_fleet(df: pd.DataFrame, pools: list[FleetPool], assumptions: Assumptions, tables: FactorTables | None = None) -> FleetAllocation:
+    """
+    Fleet-consistent footprint of every project of a flat history DataFrame
+    (one row per project, e.g. the latest versions). Aggregated rows are skipped:
+    their components are already in the table.
+    """
+    tables = tables or factor_tables()
+    if "project_type" in df.columns:
+        df = df[df["project_type"] != AGGREGATED_TYPE]
+    df = df.reset_index(drop=True)
+    cols = encode_inputs(df, tables)
+    res = compute_footprint_arrays(cols, tables, assumptions)
+    years = cols["project_duration_years"]
+    lifespan = assumptions.hardware_lifespan_years
+    n_pools = len(pools)
+
+    # --- Busy device-hours per year of each pooled phase ---
+    train = cols["training_include_training"]
+    runs = tables.runs_per_year[cols["training_frequency"]]
+    n_runs = np.where(runs > 0, runs * years, 1.0)
+    train_busy = cols["training_hardware_count"] * cols["training_duration_run_hours"] * n_runs / years
+    train_pool = np.where(train, _pool_index(cols["training_hardware_id"], cols["training_region"], cols["training_infra_type"], pools, tables), -1)
+
+    inf = cols["inference_include_inference"]
+    is_compute = inf & ~(cols["is_genai"] & cols["is_api_mode"])
+    t_active_annual, tokens, serving = inference_active_hours(cols, tables, is_compute)
+    inf_busy = cols["inference_hardware_count"] * t_active_annual
+    inf_pool = np.where(is_compute, _pool_index(cols["inference_hardware_id"], cols["inference_region"], cols["inference_infra_type"], pools, tables), -1)
+
+    # Busy draw: TDP, or the utilization-dependent draw of the throughput model
+    inf_watts = tables.hardware_watts[cols["inference_hardware_id"]].copy()
+    if serving is not None:
+        inf_watts[tokens] = serving[2]
+    train_watts = tables.hardware_watts[cols["training_hardware_id"]]
+
+    # --- Pool totals (per year) ---
+    pool_busy = np.zeros(n_pools)
+    for pool_idx, busy in ((train_pool, train_busy), (inf_pool, inf_busy)):
+        used = pool_idx >= 0
+        pool_busy += np.bincount(pool_idx[used], weights=busy[used], minlength=n_pools)
+
+    devices = np.array([p.device_count for p in pools], dtype=np.float64)
+    pool_hw = [p.hardware_id if p.hardware_id in tables.hardware_ids else FALLBACK_HARDWARE for p in pools]
+    pool_pue = np.array([tables.infra_pue[tables.infra_types.index(p.infra_type)] if p.infra_type in tables.infra_types else 1.0 for p in pools])
+    pool_grid = np.array([tables.grid_kg_per_kwh[tables.regions.index(p.region)] if p.region in tables.regions else tables.grid_kg_per_kwh[-1] for p in pools])
+    pool_idle_watts = np.array([idle_watts(h) for h in pool_hw], dtype=np.float64)
+    gwp = np.array([tables.hardware_gwp[tables.hardware_ids.index(h)] for h in pool_hw])
+
+    capacity = devices * HOURS_PER_YEAR
+    idle_hours = np.maximum(0.0, capacity - pool_busy)
+    idle_kwh = idle_hours * pool_idle_watts / 1000.0 * pool_pue
+    embodied = devices * gwp / lifespan
+    overhead_co2 = idle_kwh * pool_grid + embodied
+
+    # --- Allocation per phase (kg CO2 and kWh per year) ---
+    safe_busy = np.where(pool_busy > 0, pool_busy, 1.0)
+    # One trailing entry so that pool -1 indexes a neutral value
+    pool_pue_p, pool_grid_p, idle_kwh_p, overhead_p = (np.append(a, 0.0) for a in (pool_pue, pool_grid, idle_kwh, overhead_co2))
+    busy_p = np.append(safe_busy, 1.0)
+
+    def allocated(pool_idx, busy, watts):
+        share = np.where(pool_idx >= 0, busy / busy_p[pool_idx], 0.0)
+        direct_kwh = np.where(pool_idx >= 0, busy * watts / 1000.0 * pool_pue_p[pool_idx], 0.0)
+        kwh = direct_kwh + share * idle_kwh_p[pool_idx]
+        co2 = direct_kwh * pool_grid_p[pool_idx] + share * overhead_p[pool_idx]
+        return kwh, co2
+
+    train_kwh, train_co2 = allocated(train_pool, train_busy, train_watts)
+    inf_kwh, inf_co2 = allocated(inf_pool, inf_busy, inf_watts)
+
+    # Standalone phase results replaced by the allocation (energy = usage CO2 / grid)
+    in_train_pool = train_pool >= 0
+    in_inf_pool = inf_pool >= 0
+    standalone_co2 = (
+        np.where(in_train_pool, res["co2_training_usage"] + res["co2_training_embodied"], 0.0)
+        + np.where(in_inf_pool, res["co2_inference_usage"] + res["co2_inference_embodied"], 0.0)
+    )
+    standalone_kwh = (
+        np.where(in_train_pool, res["co2_training_usage"] / tables.grid_kg_per_kwh[cols["training_region"]], 0.0)
+        + np.where(in_inf_pool, res["co2_inference_usage"] / tables.grid_kg_per_kwh[cols["inference_region"]], 0.0)
+    )
+    fleet_co2 = res["total_co2_kg"] - standalone_co2 + (train_co2 + inf_co2) * years
+    fleet_kwh = res["total_energy_kwh"] - standalone_kwh + (train_kwh + inf_kwh) * years
+
+    projects = pd.DataFrame({
+        "project_name": df["project_name"] if "project_name" in df.columns else pd.Series("", index=df.index),
+        "standalone_co2_kg": res["total_co2_kg"],
+        "fleet_co2_kg": fleet_co2,
+        "standalone_energy_kwh": res["total_energy_kwh"],
+        "fleet_energy_kwh": fleet_kwh,
+        "training_pool": [pools[i].name if i >= 0 else "" for i in train_pool],
+        "inference_pool": [pools[i].name if i >= 0 else "" for i in inf_pool],
+    })
+    users = np.bincount(train_pool[in_train_pool], minlength=n_pools) + np.bincount(inf_pool[in_inf_pool], minlength=n_pools)
+    pool_df = pd.DataFrame({
+        "pool": [p.name for p in pools],
+        "hardware_id": [p.hardware_id for p in pools],
+        "region": [p.region for p in pools],
+        "devices": devices.astype(int),
+        "users": users,
+        "busy_device_hours": pool_busy,
+        "utilization": pool_busy / capacity,
+        "idle_kwh_per_year": idle_kwh,
+        "embodied_co2_kg_per_year": embodied,
+        "overhead_co2_kg_per_year": overhead_co2,
+    })
+    return FleetAllocation(projects, pool_df, float(overhead_co2[pool_busy == 0].sum()))
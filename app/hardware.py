@@ -0,0 +1,70 @@
+# app/hardware.py
+"""
+Indexed hardware catalog.
+
+Built once per process from `HARDWARE_CATALOG` (built-in entries plus the
+external SKU files of ECOMETRICS_HARDWARE_SKUS): id -> name map, ids by type
+and the eligible ids per use (dev / training / inference) and project type,
+so widgets never scan the catalog. `search` filters thousands of SKUs for the
+searchable selectboxes.
+"""
+from functools import lru_cache
+
+from app.constants import HARDWARE_CATALOG, PROJECT_TYPES
+
+USES = ("dev", "training", "inference")
+
+
+def _uses(hw: dict, project_type: str) -> set:
+    # Declared SKU uses, else dev on workstations / CPU servers only; Classic ML runs on CPU
+    if hw.get("uses"):
+        uses = set(hw["uses"])
+    else:
+        uses = {"training", "inference"}
+        if hw["type"] == "cpu" or "laptop" in hw["id"]:
+            uses.add("dev")
+    if project_type == "ml_classic" and hw["type"] != "cpu":
+        uses -= {"training", "inference"}
+    return uses
+
+
+class HardwareCatalog:
+    def __init__(self, records: list[dict]):
+        self.by_id = {hw["id"]: hw for hw in records}
+        self.ids = tuple(self.by_id)
+        self.names = {hw_id: hw["name"] for hw_id, hw in self.by_id.items()}
+        self.by_type = {}
+        for hw_id, hw in self.by_id.items():
+            self.by_type.setdefault(hw["type"], []).append(hw_id)
+        self.by_type = {t: tuple(ids) for t, ids in self.by_type.items()}
+
+        self._eligible = {}
+        for project_type in PROJECT_TYPES:
+            for use in USES:
+                self._eligible[use, project_type] = tuple(hw_id for hw_id, hw in self.by_id.items() if use in _uses(hw, project_type))
+        self._search_keys = {hw_id: f"{hw['name']} {hw_id}".lower() for hw_id, hw in self.by_id.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def eligible(self, use: str, project_type: str) -> tuple:
+        """Ids usable for a phase (`dev`, `training`, `inference`) of this project type."""
+        return self._eligible.get((use, project_type), self.ids)
+
+    def name(self, hw_id: str) -> str:
+        return self.names.get(hw_id, hw_id)
+
+    def search(self, query: str, ids=None, limit: int = 200) -> list:
+        """Ids (among `ids`) whose name or id contains every query word; name-prefix matches first."""
+        ids = self.ids if ids is None else ids
+        words = query.lower().split()
+        if not words:
+            return list(ids[:limit])
+        hits = [hw_id for hw_id in ids if all(w in self._search_keys[hw_id] for w in words)]
+        hits.sort(key=lambda hw_id: not self._search_keys[hw_id].startswith(words[0]))
+        return hits[:limit]
+
+
+@lru_cache(maxsize=1)
+def get_catalog() -> HardwareCatalog:
+    return HardwareCatalog(HARDWARE_CATALOG)
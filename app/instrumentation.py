@@ -0,0 +1,142 @@
+# app/instrumentation.py
+import os
+import tempfile
+import time
+import threading
+from contextlib import nullcontext
+from functools import wraps
+
+# Instrumentation is opt-in: set ECOMETRICS_METRICS=1 before starting the app.
+# When disabled, span() returns a shared no-op context and timed() returns the
+# undecorated function, so the hot paths pay nothing.
+ENABLED = os.environ.get("ECOMETRICS_METRICS", "").strip().lower() in ("1", "true", "yes", "on")
+
+# Optional Prometheus textfile (node_exporter textfile collector) written after each rerun
+METRICS_FILE = os.environ.get("ECOMETRICS_METRICS_FILE", "")
+
+METRIC_PREFIX = "ecometrics"
+
+_lock = threading.Lock()
+_spans: dict[str, list] = {}     # name -> [count, total_s, max_s, last_s]
+_counters: dict[str, float] = {}
+_NOOP = nullcontext()
+
+
+def _record(name: str, elapsed: float):
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            _spans[name] = [1, elapsed, elapsed, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            stats[3] = elapsed
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name: str):
+    """Context manager timing a block under `name` (no-op when disabled)."""
+    if not ENABLED:
+        return _NOOP
+    return _Span(name)
+
+
+def timed(name: str | None = None):
+    """Decorator timing every call of the wrapped function."""
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+        span_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(span_name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def incr(name: str, value: float = 1):
+    """Increments a monotonic counter (no-op when disabled)."""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def snapshot() -> dict:
+    """Returns a copy of the collected spans and counters."""
+    with _lock:
+        spans = {
+            k: {"count": v[0], "total_s": v[1], "avg_s": v[1] / v[0], "max_s": v[2], "last_s": v[3]}
+            for k, v in _spans.items()
+        }
+        counters = dict(_counters)
+    return {"spans": spans, "counters": counters}
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus() -> str:
+    """Exports the current metrics in the Prometheus text exposition format."""
+    snap = snapshot()
+    lines = []
+    if snap["spans"]:
+        base = f"{METRIC_PREFIX}_span_seconds"
+        lines.append(f"# HELP {base} Wall-clock time spent in instrumented spans.")
+        lines.append(f"# TYPE {base} summary")
+        for k, v in sorted(snap["spans"].items()):
+            lines.append(f'{base}_sum{{span="{_label(k)}"}} {v["total_s"]:.9f}')
+            lines.append(f'{base}_count{{span="{_label(k)}"}} {v["count"]}')
+        lines.append(f"# HELP {base}_max Slowest observed call per span.")
+        lines.append(f"# TYPE {base}_max gauge")
+        for k, v in sorted(snap["spans"].items()):
+            lines.append(f'{base}_max{{span="{_label(k)}"}} {v["max_s"]:.9f}')
+    for k, v in sorted(snap["counters"].items()):
+        metric = f"{METRIC_PREFIX}_{k}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {v:g}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def write_prometheus_file(path: str | None = None):
+    """Atomically writes the metrics to a textfile collector path (safe across session threads)."""
+    path = path or METRICS_FILE
+    if not ENABLED or not path:
+        return
+    # One temp file per call: concurrent reruns never replace each other's half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(render_prometheus())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,615 @@
+# app/jobs.py
+"""
+Persistent background jobs for long-running analyses: Monte Carlo runs, bulk
+re-scoring of the history, portfolio PDF reports and scenario sweeps.
+
+Jobs are rows of a SQLite database (`data/jobs.sqlite`) executed by worker
+processes, never by a Streamlit script run: a page only inserts a row and
+polls its status. A worker claims the oldest queued job under a lease, renews
+the lease from a heartbeat thread and reports progress; a cancellation request
+is picked up at the next heartbeat or progress report. When a worker dies
+(crash, app restart) its job is re-queued once the lease expires, so queued
+and interrupted jobs survive restarts.
+
+Results are pickled to `data/jobs/<key>.pkl` (large exports are written next to
+it, as `data/jobs/<key>.<ext>`). The key hashes the job kind, its
+parameters and the emission factor version: submitting a job that is queued,
+running or already done returns that job instead of computing it again.
+Parameters must therefore pin every input, e.g. the history version for jobs
+that read the saved projects.
+
+    python -m app.jobs worker --workers 2
+    python -m app.jobs submit sweep '{"rows": 200000, "draws": 20}'
+    python -m app.jobs list
+"""
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import pickle
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from app.constants import FACTOR_VERSION
+from app.instrumentation import incr
+from app.utils import DATA_DIR
+
+JOBS_DB = DATA_DIR / "jobs.sqlite"
+RESULTS_DIR = DATA_DIR / "jobs"
+WORKERS_ENV = "ECOMETRICS_JOB_WORKERS"
+DEFAULT_WORKERS = 2
+DEFAULT_LEASE_TIMEOUT = 30.0  # heartbeat every third of it
+DEFAULT_POLL_INTERVAL = 1.0
+PROGRESS_INTERVAL = 0.5       # minimum seconds between two progress writes
+MAX_ATTEMPTS = 3              # a job whose worker died this many times fails
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key);
+"""
+
+
+class JobCancelled(Exception):
+    """Raised in a job function when its job was cancelled (or handed to another worker)."""
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    params: dict
+    key: str
+    status: str
+    progress: float
+    message: str
+    error: str | None
+    cancel_requested: bool
+    attempts: int
+    created_at: float
+    started_at: float | None
+    finished_at: float | None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    @property
+    def duration_s(self) -> float | None:
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        return cls(
+            id=row["id"], kind=row["kind"], params=json.loads(row["params"]), key=row["key"],
+            status=row["status"], progress=row["progress"], message=row["message"], error=row["error"],
+            cancel_requested=bool(row["cancel_requested"]), attempts=row["attempts"],
+            created_at=row["created_at"], started_at=row["started_at"], finished_at=row["finished_at"],
+        )
+
+
+def job_key(kind: str, params: dict) -> str:
+    """Content address of a job: kind, parameters and emission factor version."""
+    payload = {"kind": kind, "params": params, "factors": FACTOR_VERSION}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+# --- Store ---
+class JobStore:
+    """Jobs table and result files. Safe to use from several threads and processes."""
+
+    def __init__(self, db_path: Path | None = None, results_dir: Path | None = None):
+        self.db_path = Path(db_path or JOBS_DB)
+        self.results_dir = Path(results_dir or RESULTS_DIR)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE: claims and submissions read then write under the same write lock
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def result_path(self, key: str) -> Path:
+        return self.results_dir / f"{key}.pkl"
+
+    # Page side
+    def submit(self, kind: str, params: dict, force: bool = False) -> Job:
+        """Queues a job, or returns the queued/running/done job with the same key (unless `force`)."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind {kind!r} (expected one of {sorted(JOB_KINDS)})")
+        key = job_key(kind, params)
+        with self._transaction() as db:
+            if not force:
+                rows = db.execute(
+                    "SELECT * FROM jobs WHERE key = ? AND status IN (?, ?, ?) ORDER BY id DESC",
+                    (key, QUEUED, RUNNING, DONE),
+                ).fetchall()
+                for row in rows:
+                    if row["status"] != DONE or self.result_path(key).exists():
+                        incr("jobs_reused")
+                        return Job.from_row(row)
+            job_id = db.execute(
+                "INSERT INTO jobs (kind, params, key, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, json.dumps(params, sort_keys=True), key, QUEUED, time.time()),
+            ).lastrowid
+        incr("jobs_submitted")
+        return self.get(job_id)
+
+    def get(self, job_id: int) -> Job | None:
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def list_jobs(self, limit: int = 100) -> list[Job]:
+        """Most recent jobs first."""
+        with self._connect() as db:
+            rows = db.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [Job.from_row(r) for r in rows]
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancels a queued job at once; a running one stops at its next heartbeat or progress report."""
+        with self._transaction() as db:
+            cur = db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED),
+            )
+            if cur.rowcount:
+                return True
+            cur = db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING))
+            return bool(cur.rowcount)
+
+    def delete(self, job_id: int) -> bool:
+        """Removes a finished job (and its result file when no other job shares it)."""
+        with self._transaction() as db:
+            row = db.execute("SELECT key FROM jobs WHERE id = ? AND status NOT IN (?, ?)", (job_id, *ACTIVE_STATUSES)).fetchone()
+            if row is None:
+                return False
+            db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            shared = db.execute("SELECT 1 FROM jobs WHERE key = ? LIMIT 1", (row["key"],)).fetchone()
+        if shared is None:
+            for path in self.results_dir.glob(f"{row['key']}.*"):  # the pickle and any file it points to
+                path.unlink(missing_ok=True)
+        return True
+
+    def result(self, job: Job):
+        with open(self.result_path(job.key), "rb") as f:
+            return pickle.load(f)
+
+    # Worker side: every update checks the lease owner, so a worker that lost
+    # its job (lease expired, job re-queued) can no longer touch it.
+    def claim(self, worker_id: str, lease_timeout: float = DEFAULT_LEASE_TIMEOUT) -> Job | None:
+        now = time.time()
+        with self._transaction() as db:
+            self._requeue_expired(db, now)
+            row = db.execute("SELECT id FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, started_at = ?, progress = 0, message = '' WHERE id = ?",
+                (RUNNING, worker_id, now + lease_timeout, now, row["id"]),
+            )
+        return self.get(row["id"])
+
+    @staticmethod
+    def _requeue_expired(db: sqlite3.Connection, now: float):
+        db.execute(
+            "UPDATE jobs SET status = CASE WHEN cancel_requested THEN ? WHEN attempts >= ? THEN ? ELSE ? END,"
+            " error = CASE WHEN attempts >= ? AND NOT cancel_requested THEN 'worker lost' ELSE error END,"
+            " finished_at = CASE WHEN cancel_requested OR attempts >= ? THEN ? ELSE NULL END,"
+            " worker = NULL, lease_until = NULL"
+            " WHERE status = ? AND lease_until < ?",
+            (CANCELLED, MAX_ATTEMPTS, FAILED, QUEUED, MAX_ATTEMPTS, MAX_ATTEMPTS, now, RUNNING, now),
+        )
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+                  progress: float | None = None, message: str | None = None) -> bool:
+        """Extends the lease (and records progress). False if the job was cancelled or is no longer ours."""
+        with self._connect() as db:
+            cur = db.execute(
+                "UPDATE jobs SET lease_until = ?, progress = COALESCE(?, progress), message = COALESCE(?, message)"
+                " WHERE id = ? AND worker = ? AND status = ?",
+                (time.time() + lease_timeout, progress, message, job_id, worker_id, RUNNING),
+            )
+            if not cur.rowcount:
+                return False
+            row = db.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return not row["cancel_requested"]
+
+    def _finish(self, job_id: int, worker_id: str, status: str, error: str | None = None, progress: float | None = None) -> bool:
+        with self._connect() as db:
+            cur = db.execute(
+                "UPDATE jobs SET status = ?, error = ?, progress = COALESCE(?, progress), finished_at = ?, worker = NULL, lease_until = NULL"
+                " WHERE id = ? AND worker = ? AND status = ?",
+                (status, error, progress, time.time(), job_id, worker_id, RUNNING),
+            )
+            return bool(cur.rowcount)
+
+    def complete(self, job: Job, worker_id: str, result) -> bool:
+        # Result first (atomic rename), then the status: a done job always has its file
+        path = self.result_path(job.key)
+        fd, tmp = tempfile.mkstemp(dir=self.results_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return self._finish(job.id, worker_id, DONE, progress=1.0)
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        return self._finish(job_id, worker_id, FAILED, error=error)
+
+    def mark_cancelled(self, job_id: int, worker_id: str) -> bool:
+        return self._finish(job_id, worker_id, CANCELLED)
+
+    def release(self, job_id: int, worker_id: str) -> bool:
+        """Hands a running job back to the queue (worker shutting down)."""
+        with self._connect() as db:
+            cur = db.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL, attempts = attempts - 1 WHERE id = ? AND worker = ? AND status = ?",
+                (QUEUED, job_id, worker_id, RUNNING),
+            )
+            return bool(cur.rowcount)
+
+
+# --- Job kinds ---
+@dataclass(frozen=True)
+class JobKind:
+    fn: Callable           # fn(params, ctx) -> picklable result (DataFrame, bytes, or a dict describing a result file)
+    label: str
+    result_name: str       # download file name
+
+
+JOB_KINDS: dict[str, JobKind] = {}
+
+
+def job_kind(name: str, label: str, result_name: str):
+    """Registers `fn(params: dict, ctx: JobContext)` as the job kind `name`."""
+    def register(fn):
+        JOB_KINDS[name] = JobKind(fn, label, result_name)
+        return fn
+    return register
+
+
+class JobContext:
+    """Handed to job functions: progress reports, which also raise `JobCancelled` when the job must stop."""
+
+    def __init__(self, store: JobStore, job: Job, worker_id: str, lease_timeout: float, stopped: threading.Event):
+        self.store = store
+        self.job = job
+        self.worker_id = worker_id
+        self.lease_timeout = lease_timeout
+        self._stopped = stopped
+        self._last_report = 0.0
+
+    def progress(self, fraction: float, message: str = ""):
+        if self._stopped.is_set():
+            raise JobCancelled()
+        now = time.monotonic()
+        if now - self._last_report < PROGRESS_INTERVAL and fraction < 1.0:
+            return
+        self._last_report = now
+        if not self.store.heartbeat(self.job.id, self.worker_id, self.lease_timeout, min(1.0, fraction), message):
+            self._stopped.set()
+            raise JobCancelled()
+
+
+def _check_history_version(df, params: dict):
+    from app.utils import StaleProjectsError
+    expected = params.get("history_version")
+    if expected is not None and expected != df.attrs.get("version"):
+        raise StaleProjectsError("The saved projects changed since this job was submitted; submit it again.")
+
+
+@job_kind("monte_carlo", "Monte Carlo (current project)", "monte_carlo.csv")
+def monte_carlo_job(params: dict, ctx: JobContext):
+    """Footprint of one project under `draws` samples of the emission factor uncertainty (see app/sweep.py)."""
+    import pandas as pd
+    from app.models import ProjectInputs, Assumptions
+    from app.batch import factor_tables, encode_inputs, compute_footprint_arrays, score_arrays
+    from app.sweep import draw_tables
+    from app.synthetic import DEFAULT_SEED
+    from app.utils import flatten_inputs
+
+    inputs = ProjectInputs.model_validate(params["inputs"])
+    assumptions = Assumptions(**params.get("assumptions", {}))
+    draws, seed = int(params.get("draws", 1000)), int(params.get("seed", DEFAULT_SEED))
+    tables = factor_tables()
+    cols = encode_inputs(pd.DataFrame([flatten_inputs(inputs.model_dump())]), tables)
+    rows = []
+    for draw in range(1, draws + 1):
+        res = compute_footprint_arrays(cols, draw_tables(tables, seed, draw), assumptions)
+        rows.append({name: float(values[0]) for name, values in res.items()})
+        ctx.progress(draw / draws, f"draw {draw}/{draws}")
+    out = pd.DataFrame(rows, index=pd.RangeIndex(1, draws + 1, name="draw"))
+    out["score_100"], out["score_grade"] = score_arrays(out["total_co2_kg"].to_numpy(), out["total_water_m3"].to_numpy())
+    return out.reset_index()
+
+
+@job_kind("rescore", "Re-score saved history", "rescored_history.csv")
+def rescore_job(params: dict, ctx: JobContext, chunk_rows: int = 50_000):
+    """Every saved run recomputed with the current factors and `assumptions`, next to its stored result."""
+    import pandas as pd
+    from app.models import Assumptions
+    from app.batch import factor_tables, compute_footprint_batch
+    from app.fleet import AGGREGATED_TYPE
+    from app.utils import load_projects
+
+    df = load_projects()
+    _check_history_version(df, params)
+    if "project_type" in df.columns:
+        df = df[df["project_type"] != AGGREGATED_TYPE]  # no inputs to recompute
+    assumptions = Assumptions(**params.get("assumptions", {}))
+    tables = factor_tables()
+    parts = []
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        res = compute_footprint_batch(chunk, assumptions, tables)
+        parts.append(pd.DataFrame({
+            "project_name": chunk["project_name"],
+            "timestamp": chunk["timestamp"],
+            "saved_co2_kg": chunk["total_co2_kg"],
+            "total_co2_kg": res["total_co2_kg"],
+            "delta_pct": (res["total_co2_kg"] / chunk["total_co2_kg"] - 1.0) * 100.0,
+            "saved_grade": chunk["score_grade"],
+            "score_grade": res["score_grade"],
+        }))
+        ctx.progress(min(len(df), start + chunk_rows) / len(df), f"{min(len(df), start + chunk_rows):,} / {len(df):,} rows")
+    columns = ["project_name", "timestamp", "saved_co2_kg", "total_co2_kg", "delta_pct", "saved_grade", "score_grade"]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+
+
+@job_kind("portfolio_pdf", "Portfolio PDF reports", "portfolio_reports.zip")
+def portfolio_pdf_job(params: dict, ctx: JobContext):
+    """Zip of one PDF report per project (latest saved version), recomputed with `assumptions`."""
+    import io
+    import re
+    import zipfile
+    from app.models import ProjectInputs, Assumptions
+    from app.calculator import compute_footprint, calculate_score
+    from app.fleet import AGGREGATED_TYPE
+    from app.report import create_robust_pdf
+    from app.utils import load_projects, unflatten_inputs
+
+    df = load_projects()
+    _check_history_version(df, params)
+    if "project_type" in df.columns:
+        df = df[df["project_type"] != AGGREGATED_TYPE]
+    latest = df.drop_duplicates("project_name", keep="last")  # rows are in save order
+    if params.get("projects"):
+        latest = latest[latest["project_name"].isin(params["projects"])]
+    assumptions = Assumptions(**params.get("assumptions", {}))
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        rows = latest.to_dict("records")
+        for i, row in enumerate(rows, 1):
+            inputs = ProjectInputs.model_validate(unflatten_inputs(row))
+            fp = compute_footprint(inputs, assumptions)
+            name = re.sub(r"[^\w.-]+", "_", inputs.project_name).strip("_")[:80] or "project"
+            archive.writestr(f"{i:04d}_{name}.pdf", create_robust_pdf(inputs, fp, calculate_score(fp)))
+            ctx.progress(i / len(rows), inputs.project_name)
+    return buffer.getvalue()
+
+
+@job_kind("sweep", "Scenario sweep", "sweep.csv")
+def sweep_job(params: dict, ctx: JobContext):
+    """Scenario sweep (app/sweep.py `SweepSpec` fields), evaluated shard by shard in the worker."""
+    from app.sweep import SweepSpec, run_local
+
+    spec = SweepSpec(**{k: tuple(v) if isinstance(v, list) else v for k, v in params.items()})
+    return run_local(spec, on_progress=lambda done, total: ctx.progress(done / total, f"shard {done}/{total}"))
+
+
+@job_kind("export", "Export history", "history export")
+def export_job(params: dict, ctx: JobContext):
+    """Filtered history streamed to `data/jobs/<key>.<ext>` (app/export.py); the pickled result only describes the file."""
+    from app.models import Assumptions
+    from app.export import ExportFilter, FORMATS, COMPRESSIONS, TEXT_FORMATS, export_filename, export_history
+    from app.utils import StaleProjectsError, projects_version
+
+    if params.get("history_version") not in (None, projects_version()):
+        raise StaleProjectsError("The saved projects changed since this job was submitted; submit it again.")
+    fmt, compression = params.get("format", "csv"), params.get("compression", "gzip")
+    suffix = FORMATS[fmt] + (COMPRESSIONS[compression] if fmt in TEXT_FORMATS else "")
+    path = ctx.store.results_dir / f"{ctx.job.key}{suffix}"
+    tmp = path.with_name(f"{path.name}.tmp")
+    try:
+        rows = export_history(
+            tmp, fmt, ExportFilter(**params.get("filters", {})),
+            breakdown=bool(params.get("breakdown")), assumptions=Assumptions(**params.get("assumptions", {})),
+            compression=compression, on_progress=lambda fraction: ctx.progress(fraction, "exporting"),
+        )
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return {"path": str(path), "rows": rows, "file_name": export_filename(fmt, compression)}
+
+
+# --- Workers ---
+def _heartbeat(store: JobStore, job: Job, worker_id: str, lease_timeout: float, stopped: threading.Event, done: threading.Event):
+    while not done.wait(lease_timeout / 3):
+        if not store.heartbeat(job.id, worker_id, lease_timeout):
+            stopped.set()  # seen by the job at its next progress report
+            return
+
+
+def execute(store: JobStore, job: Job, worker_id: str, lease_timeout: float = DEFAULT_LEASE_TIMEOUT) -> str:
+    """Runs a claimed job to its final status."""
+    stopped, done = threading.Event(), threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(store, job, worker_id, lease_timeout, stopped, done), daemon=True)
+    beat.start()
+    try:
+        kind = JOB_KINDS.get(job.kind)
+        if kind is None:
+            raise ValueError(f"Unknown job kind {job.kind!r}")
+        result = kind.fn(job.params, JobContext(store, job, worker_id, lease_timeout, stopped))
+        if stopped.is_set():
+            raise JobCancelled()
+    except JobCancelled:
+        store.mark_cancelled(job.id, worker_id)
+        return CANCELLED
+    except Exception:
+        store.fail(job.id, worker_id, traceback.format_exc(limit=8))
+        return FAILED
+    except BaseException:  # shutdown (SIGTERM, Ctrl+C): another worker takes the job over
+        store.release(job.id, worker_id)
+        raise
+    finally:
+        done.set()
+        beat.join()
+    store.complete(job, worker_id, result)
+    return DONE
+
+
+def run_worker(store: JobStore | None = None, worker_id: str | None = None, *, parent_pid: int | None = None,
+               poll_interval: float = DEFAULT_POLL_INTERVAL, lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+               max_jobs: int | None = None) -> int:
+    """
+    Executes queued jobs until `max_jobs` ran, or forever. With `parent_pid`,
+    exits once that process is gone. Returns the number of jobs executed.
+    """
+    store = store or JobStore()
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    executed = 0
+    while max_jobs is None or executed < max_jobs:
+        if parent_pid is not None and os.getppid() != parent_pid:
+            break
+        job = store.claim(worker_id, lease_timeout)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        execute(store, job, worker_id, lease_timeout)
+        executed += 1
+    return executed
+
+
+class JobPool:
+    """Worker subprocesses (`python -m app.jobs worker`) tied to this process: they exit with it."""
+
+    def __init__(self, workers: int | None = None, db_path: Path | None = None):
+        self.workers = int(os.environ.get(WORKERS_ENV, DEFAULT_WORKERS)) if workers is None else workers
+        self.db_path = Path(db_path or JOBS_DB)
+        self.processes: list[subprocess.Popen] = []
+
+    def start(self) -> "JobPool":
+        root = str(Path(__file__).parent.parent)
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")]))}
+        cmd = [sys.executable, "-m", "app.jobs", "--db", str(self.db_path.resolve()), "worker", "--parent-pid", str(os.getpid())]
+        self.processes = [subprocess.Popen(cmd, cwd=os.getcwd(), env=env) for _ in range(self.workers)]
+        atexit.register(self.stop)
+        return self
+
+    def alive(self) -> int:
+        return sum(p.poll() is None for p in self.processes)
+
+    def stop(self, timeout: float = 10.0):
+        """Stops the workers; their running jobs go back to the queue."""
+        for p in self.processes:
+            if p.poll() is None:
+                p.terminate()
+        for p in self.processes:
+            try:
+                p.wait(timeout)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Background jobs (data/jobs.sqlite).")
+    parser.add_argument("--db", type=Path, default=JOBS_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="Execute queued jobs.")
+    worker.add_argument("--workers", type=int, default=1, help="Worker processes.")
+    worker.add_argument("--parent-pid", type=int, help="Exit once this process is gone.")
+    submit = sub.add_parser("submit", help="Queue a job.")
+    submit.add_argument("kind", choices=sorted(JOB_KINDS))
+    submit.add_argument("params", nargs="?", default="{}", help="JSON parameters.")
+    submit.add_argument("--force", action="store_true", help="Run again even if an identical job exists.")
+    listing = sub.add_parser("list", help="List recent jobs.")
+    listing.add_argument("--limit", type=int, default=20)
+    cancel = sub.add_parser("cancel", help="Cancel a job.")
+    cancel.add_argument("job_id", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        if args.workers > 1:
+            pool = JobPool(args.workers, args.db).start()
+            for p in pool.processes:
+                p.wait()
+            return 0
+        # SIGTERM unwinds like Ctrl+C, so the running job is handed back to the queue
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            run_worker(JobStore(args.db, args.db.parent / RESULTS_DIR.name), parent_pid=args.parent_pid)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    store = JobStore(args.db, args.db.parent / RESULTS_DIR.name)
+    if args.command == "submit":
+        job = store.submit(args.kind, json.loads(args.params), force=args.force)
+        print(f"job {job.id} {job.status}")
+    elif args.command == "list":
+        for job in store.list_jobs(args.limit):
+            print(f"{job.id:>6} {job.kind:<14} {job.status:<10} {job.progress:>6.0%}  {job.message}")
+    elif args.command == "cancel":
+        print("cancelled" if store.cancel(args.job_id) else "not cancellable")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+# app/matrix.py
+"""
+Cross-product comparison: one project evaluated in every region x hardware x
+infrastructure at once.
+
+The project is encoded a single time; its encoded row is broadcast to one row
+per cell with the region, hardware and infra codes of the cell written into
+both the training and the inference columns (development follows the training
+region, as in compute_footprint). All cells are then computed by one
+`compute_footprint_arrays` call.
+"""
+import numpy as np
+import pandas as pd
+
+from app.models import ProjectInputs, Assumptions
+from app.batch import FactorTables, factor_tables, encode_inputs, compute_footprint_arrays, score_arrays
+from app.utils import flatten_inputs
+from app.instrumentation import timed
+
+MATRIX_AXES = ("region", "hardware_id", "infra_type")
+
+
+@timed("comparison_matrix")
+def comparison_matrix(
+    inputs: ProjectInputs,
+    assumptions: Assumptions,
+    *,
+    regions: list | None = None,
+    hardware_ids: list | None = None,
+    infra_types: list | None = None,
+    tables: FactorTables | None = None,
+) -> pd.DataFrame:
+    """
+    Footprint of `inputs` for every (region, hardware, infra) combination
+    (default: all known keys). One row per cell, region-major order.
+    """
+    tables = tables or factor_tables()
+    regions = list(tables.regions) if regions is None else list(regions)
+    hardware_ids = list(tables.hardware_ids) if hardware_ids is None else list(hardware_ids)
+    infra_types = list(tables.infra_types) if infra_types is None else list(infra_types)
+
+    base = encode_inputs(pd.DataFrame([flatten_inputs(inputs.model_dump())]), tables)
+    region_codes, hw_codes, infra_codes = (
+        pd.Categorical(values, categories=keys).codes.astype(np.int16)
+        for values, keys in ((regions, tables.regions), (hardware_ids, tables.hardware_ids), (infra_types, tables.infra_types))
+    )
+    for codes, values in ((region_codes, regions), (hw_codes, hardware_ids), (infra_codes, infra_types)):
+        if (codes < 0).any():
+            raise KeyError(f"Unknown key(s) in the comparison matrix axes: {[v for v, c in zip(values, codes) if c < 0]}")
+    grid_region, grid_hw, grid_infra = (a.ravel() for a in np.meshgrid(region_codes, hw_codes, infra_codes, indexing="ij"))
+    n = len(grid_region)
+
+    cols = {name: np.broadcast_to(values, n) for name, values in base.items()}
+    cols["training_region"] = cols["inference_region"] = grid_region
+    cols["training_hardware_id"] = cols["inference_hardware_id"] = grid_hw
+    cols["training_infra_type"] = cols["inference_infra_type"] = grid_infra
+
+    res = compute_footprint_arrays(cols, tables, assumptions)
+    res["score_100"], res["score_grade"] = score_arrays(res["total_co2_kg"], res["total_water_m3"])
+    out = pd.DataFrame({
+        "region": pd.Categorical.from_codes(grid_region, categories=tables.regions),
+        "hardware_id": pd.Categorical.from_codes(grid_hw, categories=tables.hardware_ids),
+        "infra_type": pd.Categorical.from_codes(grid_infra, categories=tables.infra_types),
+    })
+    for name, values in res.items():
+        out[name] = values
+    return out
@@ -2,8 +2,9 @@
 from __future__ import annotations
 from datetime import datetime, timezone
 from dataclasses import dataclass
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
 from app.constants import DEFAULT_GRID_INTENSITY, DEFAULT_LIFESPAN, API_MODELS
+from app.throughput import has_curve
 
 # --- Defaults ---
 DEFAULT_WATER_M3_PER_MWH = 0.5
@@ -46,11 +47,30 @@ class InferenceInputs(BaseModel):
     server_24_7: bool = Field(default=True) # Is server always on?
     latency_ms: float = Field(default=100.0, ge=0.0)
 
+    # Capacity model (app/capacity.py): replicas sized for a p99 SLO replace
+    # hardware_count (devices per replica) x always-on / active time
+    capacity_model: bool = Field(default=False)
+    traffic_profile: str = Field(default="flat") # TRAFFIC_PROFILES key
+    peak_factor: float = Field(default=1.5, ge=1.0) # burst rate / hourly average rate
+    p99_latency_ms: float = Field(default=500.0, gt=0.0)
+    autoscaling: str = Field(default="hourly") # AUTOSCALING_POLICIES key
+
+    # Throughput model (app/throughput.py, self-hosted GenAI): busy time from
+    # tokens_per_req and tokens/s at this batch size, utilization-dependent power
+    throughput_model: bool = Field(default=False)
+    batch_size: int = Field(default=8, ge=1)
+    quantization: str = Field(default="fp16") # QUANTIZATION_PROFILES key
+    model_params_b: float = Field(default=8.0, gt=0.0) # billions of parameters
+
     # Mode SaaS
     api_model: str = Field(default="GPT-3.5 Turbo / Haiku / Flash")
     req_per_day: int = Field(default=1500, ge=0)
     tokens_per_req: int = Field(default=1500, ge=0)
 
+    # Timeline only (app/timeline.py): req_per_day is the lifetime average,
+    # growth shapes the monthly emissions without changing the totals
+    traffic_growth_pct_per_year: float = Field(default=0.0, gt=-100.0)
+
 class StorageNetworkInputs(BaseModel):
     include_storage_network: bool = True
     dataset_gb: float = Field(default=50.0, ge=0.0)
@@ -59,6 +79,7 @@ class StorageNetworkInputs(BaseModel):
 class ProjectInputs(BaseModel):
     project_name: str = Field(default="New AI Project")
     owner: str = Field(default="Data Team")
+    tags: str = Field(default="") # comma-separated, free text (search/filtering)
     project_type: str = Field(default="genai") # ml_classic, deep_learning, genai
     environment: str = Field(default="Production") # Dev/PoC, Production
     project_duration_years: float = Field(default=2.0, ge=0.1)
@@ -74,6 +95,42 @@ class ProjectInputs(BaseModel):
     def name_not_empty(cls, v: str) -> str:
         return v.strip() or "Unnamed Project"
 
+    @field_validator("inference")
+    @classmethod
+    def throughput_curve_exists(cls, v: InferenceInputs, info: ValidationInfo) -> InferenceInputs:
+        served = info.data.get("project_type") == "genai" and v.mode != "SaaS / API"
+        if served and v.include_inference and v.throughput_model and not has_curve(v.hardware_id):
+            raise ValueError(f"no throughput curve for hardware '{v.hardware_id}' (add tokens_per_s and idle_watts to its SKU record)")
+        return v
+
+class FleetPool(BaseModel):
+    """A shared pool of identical devices; project phases on the same hardware/region/infra draw from it."""
+    name: str = Field(default="GPU pool")
+    hardware_id: str = Field(default="gpu_a100")
+    region: str = Field(default="EU (avg)")
+    infra_type: str = Field(default="cloud")
+    device_count: int = Field(default=8, ge=1)
+
+class CarbonBudget(BaseModel):
+    """Annual CO₂ budget of an owner (all their projects) or of a single project."""
+    scope: str = Field(default="owner")  # owner, project
+    name: str
+    annual_co2_kg: float = Field(gt=0.0)
+
+    @field_validator("scope")
+    @classmethod
+    def known_scope(cls, v: str) -> str:
+        if v not in ("owner", "project"):
+            raise ValueError("scope must be 'owner' or 'project'")
+        return v
+
+    @field_validator("name")
+    @classmethod
+    def name_not_empty(cls, v: str) -> str:
+        if not v.strip():
+            raise ValueError("name must not be empty")
+        return v.strip()
+
 @dataclass
 class FootprintResult:
     total_co2_kg: float
@@ -0,0 +1,171 @@
+# app/report.py
+from datetime import datetime
+import tempfile
+import os
+
+from fpdf import FPDF
+
+from app.constants import PROJECT_TYPES, INFRASTRUCTURE_PROFILES
+from app.hardware import get_catalog
+from app.instrumentation import timed
+
+def get_hardware_name(hw_id):
+    """Helper to get readable hardware name from ID"""
+    return get_catalog().name(hw_id)
+
+def get_infra_name(infra_id):
+    """Helper to get readable infra name from ID"""
+    if infra_id in INFRASTRUCTURE_PROFILES:
+        return INFRASTRUCTURE_PROFILES[infra_id]["name"]
+    return infra_id
+
+@timed("create_robust_pdf")
+def create_robust_pdf(inputs, res, score, fig_wf=None, fig_sim=None):
+    """
+    Génère un PDF professionnel.
+    Inclut un nettoyage des caractères (sanitize) pour éviter l'erreur 'latin-1'.
+    """
+    
+    # --- FONCTION DE NETTOYAGE ---
+    def sanitize(text):
+        """Supprime les emojis et caractères non supportés par FPDF"""
+        if not isinstance(text, str):
+            text = str(text)
+        # Encode en latin-1 en ignorant les erreurs (emojis), puis décode
+        return text.encode('latin-1', 'ignore').decode('latin-1')
+
+    class PDF(FPDF):
+        def header(self):
+            self.set_font('Arial', 'B', 16)
+            self.cell(0, 10, 'EcoMetrics Report', 0, 1, 'L')
+            self.set_font('Arial', '', 10)
+            self.cell(0, 5, f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M")}', 0, 1, 'L')
+            self.line(10, 25, 200, 25)
+            self.ln(10)
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+        def section_title(self, label):
+            self.set_font('Arial', 'B', 12)
+            self.set_fill_color(240, 240, 240)
+            # On nettoie aussi le titre au cas où
+            self.cell(0, 8, f"  {sanitize(label)}", 0, 1, 'L', 1)
+            self.ln(2)
+
+        def key_value(self, key, value):
+            self.set_font('Arial', 'B', 10)
+            self.cell(50, 6, f"{sanitize(key)}:", 0, 0)
+            self.set_font('Arial', '', 10)
+            self.cell(0, 6, f"{sanitize(str(value))}", 0, 1)
+
+    # Instanciation
+    pdf = PDF()
+    pdf.add_page()
+    
+    # 1. Project Summary
+    pdf.section_title("Project Overview")
+    pdf.key_value("Project Name", inputs.project_name)
+    
+    # Get readable project type label and SANITIZE IT (removes 🤖)
+    p_type_label = PROJECT_TYPES.get(inputs.project_type, inputs.project_type)
+    pdf.key_value("Type", p_type_label)
+    
+    pdf.key_value("Environment", inputs.environment)
+    pdf.key_value("Duration", f"{inputs.project_duration_years} years")
+    pdf.ln(5)
+
+    # 2. Score
+    pdf.set_fill_color(230, 240, 255)
+    pdf.rect(10, pdf.get_y(), 190, 25, 'F')
+    pdf.set_xy(10, pdf.get_y() + 5)
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 8, f"Eco-Grade: {sanitize(score.grade)}", 0, 1, 'C')
+    pdf.set_font('Arial', '', 12)
+    pdf.cell(0, 8, f"Score: {score.score_100}/100", 0, 1, 'C')
+    pdf.ln(10)
+
+    # 3. KPIs
+    pdf.section_title("Key Performance Indicators")
+    pdf.key_value("Total CO2 eq", f"{res.total_co2_kg:,.0f} kg")
+    pdf.key_value("Total Energy", f"{res.total_energy_kwh:,.0f} kWh")
+    pdf.key_value("Total Water", f"{res.total_water_m3:,.1f} m3")
+    pdf.ln(5)
+
+    # 4. Details
+    pdf.section_title("Configuration Details")
+    
+    # Dev
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(0, 6, "> Development Phase", 0, 1)
+    pdf.set_font('Arial', '', 9)
+    # Sanitize inputs
+    pdf.cell(0, 5, sanitize(f"   - Infra: {get_infra_name(inputs.development.infra_type)}"), 0, 1)
+    pdf.cell(0, 5, sanitize(f"   - Hardware: {get_hardware_name(inputs.development.hardware_id)}"), 0, 1)
+    pdf.cell(0, 5, f"   - Hours: {inputs.development.dev_hours}h", 0, 1)
+
+    # Training
+    if inputs.training.include_training:
+        pdf.set_font('Arial', 'B', 10)
+        pdf.cell(0, 6, "> Training Phase", 0, 1)
+        pdf.set_font('Arial', '', 9)
+        pdf.cell(0, 5, sanitize(f"   - Region: {inputs.training.region} ({get_infra_name(inputs.training.infra_type)})"), 0, 1)
+        pdf.cell(0, 5, sanitize(f"   - Hardware: {inputs.training.hardware_count}x {get_hardware_name(inputs.training.hardware_id)}"), 0, 1)
+        pdf.cell(0, 5, sanitize(f"   - Run: {inputs.training.duration_run_hours}h | Freq: {inputs.training.frequency}"), 0, 1)
+
+    # Inference
+    if inputs.inference.include_inference:
+        pdf.set_font('Arial', 'B', 10)
+        pdf.cell(0, 6, "> Inference Phase", 0, 1)
+        pdf.set_font('Arial', '', 9)
+        if inputs.inference.mode == "SaaS / API":
+            pdf.cell(0, 5, sanitize(f"   - Mode: API ({inputs.inference.api_model})"), 0, 1)
+            pdf.cell(0, 5, f"   - Vol: {inputs.inference.req_per_day} req/day | {inputs.inference.tokens_per_req} tokens/req", 0, 1)
+        else:
+            pdf.cell(0, 5, sanitize(f"   - Mode: Self-Hosted in {inputs.inference.region}"), 0, 1)
+            pdf.cell(0, 5, sanitize(f"   - Hardware: {inputs.inference.hardware_count}x {get_hardware_name(inputs.inference.hardware_id)}"), 0, 1)
+            pdf.cell(0, 5, sanitize(f"   - Infra: {get_infra_name(inputs.inference.infra_type)}"), 0, 1)
+
+    # Storage
+    if inputs.storage_network.include_storage_network:
+        pdf.set_font('Arial', 'B', 10)
+        pdf.cell(0, 6, "> Storage & Network", 0, 1)
+        pdf.set_font('Arial', '', 9)
+        pdf.cell(0, 5, f"   - Dataset: {inputs.storage_network.dataset_gb} GB", 0, 1)
+        pdf.cell(0, 5, f"   - Transfer: {inputs.storage_network.transfer_gb_per_day} GB/day", 0, 1)
+
+
+    pdf.ln(5)
+
+    # 5. Charts
+    # Waterfall
+    if fig_wf:
+        pdf.add_page()
+        pdf.section_title("Emissions Breakdown")
+        try:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmpfile:
+                # Nécessite 'kaleido' : pip install kaleido
+                fig_wf.write_image(tmpfile.name, scale=2, width=800, height=500)
+                pdf.image(tmpfile.name, x=10, w=190)
+                tmp_wf_path = tmpfile.name
+            os.remove(tmp_wf_path)
+        except Exception as e:
+            pdf.set_font('Arial', 'I', 10)
+            pdf.cell(0, 10, sanitize(f"Error generating chart (install kaleido): {str(e)}"), 0, 1)
+
+    # What-If
+    if fig_sim:
+        pdf.ln(10)
+        pdf.section_title("Optimization Scenario")
+        try:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmpfile:
+                fig_sim.write_image(tmpfile.name, scale=2, width=800, height=500)
+                pdf.image(tmpfile.name, x=10, w=190)
+                tmp_sim_path = tmpfile.name
+            os.remove(tmp_sim_path)
+        except Exception as e:
+            pass
+
+    return pdf.output(dest='S').encode('latin-1', errors='replace')
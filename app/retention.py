@@ -0,0 +1,104 @@
+# app/retention.py
+"""
+Retention of the saved project history.
+
+Identical runs share one row: `save_project` stores a content hash of the
+inputs, assumptions and factor version (`run_hash`), and re-saving the same
+run only bumps that row's `save_count` and timestamp. Compaction
+(`compact_history`) then
+
+1. folds rows with the same run into one: the latest row is kept, with the
+   summed `save_count` and the earliest `first_saved`. Rows saved before
+   hashing existed are matched on their stored content instead.
+2. downsamples old versions: every version saved in the last `keep_days` is
+   kept, and older ones are reduced to the last version of each project per
+   calendar month. The latest version of a project is always kept.
+
+Row order is preserved, so the last row of a project is still its latest version.
+
+    python -m app.retention --keep-days 30 [--dry-run]
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Columns that change between saves of the same run (never part of its identity)
+VOLATILE_COLUMNS = ["timestamp", "created_at", "first_saved", "save_count", "run_hash"]
+
+
+@dataclass
+class RetentionPolicy:
+    keep_days: int = 30  # every version saved in the last keep_days is kept
+
+
+def run_keys(df: pd.DataFrame) -> pd.Series:
+    """Identity of the run of each row: its run_hash, else a hash of its stored content."""
+    content = df.drop(columns=[c for c in VOLATILE_COLUMNS if c in df.columns])
+    legacy = "legacy-" + pd.util.hash_pandas_object(content, index=False).map("{:016x}".format)
+    if "run_hash" not in df.columns:
+        return legacy
+    return df["run_hash"].where(df["run_hash"].notna(), legacy).astype(str)
+
+
+def _first_saved(df: pd.DataFrame) -> pd.Series:
+    first = df["first_saved"] if "first_saved" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    timestamp = df["timestamp"] if "timestamp" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    return first.where(first.notna(), timestamp)
+
+
+def fold_identical_runs(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per run (the last one), with the summed save count and the earliest save time."""
+    if df.empty:
+        return df
+    keys = run_keys(df)
+    counts = pd.to_numeric(df["save_count"], errors="coerce").fillna(1) if "save_count" in df.columns else pd.Series(1, index=df.index)
+    out = df[~keys.duplicated(keep="last")].copy()
+    out_keys = keys[out.index]
+    out["save_count"] = out_keys.map(counts.groupby(keys).sum()).astype(int)
+    # Earliest save per run (sort + dedupe: a string groupby-min falls back to Python)
+    first = pd.DataFrame({"key": keys, "first": _first_saved(df)}).sort_values("first", na_position="last").drop_duplicates("key")
+    out["first_saved"] = out_keys.map(first.set_index("key")["first"])
+    return out
+
+
+def downsample_versions(df: pd.DataFrame, policy: RetentionPolicy, now: pd.Timestamp | None = None) -> pd.DataFrame:
+    """Keeps recent versions and the last version per project and month before that."""
+    if df.empty or "timestamp" not in df.columns or "project_name" not in df.columns:
+        return df
+    now = now or pd.Timestamp.now()
+    ts = pd.to_datetime(df["timestamp"], format="ISO8601", errors="coerce")
+    old = ts < now - pd.Timedelta(days=policy.keep_days)  # undated rows are kept
+    month = ts.dt.to_period("M").astype(str)
+    last_of_month = ~pd.DataFrame({"p": df["project_name"], "m": month})[old].duplicated(keep="last")
+    keep = ~old
+    keep[last_of_month.index] = last_of_month
+    return df[keep]
+
+
+def compact_history(df: pd.DataFrame, policy: RetentionPolicy, now: pd.Timestamp | None = None) -> pd.DataFrame:
+    return downsample_versions(fold_identical_runs(df), policy, now).reset_index(drop=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compact the saved project history (data/projects.csv).")
+    parser.add_argument("--keep-days", type=int, default=RetentionPolicy.keep_days, help="Keep every version saved in the last N days.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would be removed.")
+    args = parser.parse_args(argv)
+
+    from app import utils
+    policy = RetentionPolicy(keep_days=args.keep_days)
+    df = utils.load_projects()
+    before = len(df)
+    if args.dry_run:
+        after = len(compact_history(df, policy))
+    else:
+        utils.compact_projects(policy)
+        after = len(utils.load_projects())
+    print(f"{before} rows -> {after} rows ({before - after} removed{', dry run' if args.dry_run else ''})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
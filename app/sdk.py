@@ -0,0 +1,165 @@
+# app/sdk.py
+"""
+Batch footprinting of DataFrames, for notebooks and scripts.
+
+    import pandas as pd
+    import app.sdk  # registers the `eco` DataFrame accessor
+    from app.models import Assumptions
+
+    configs = pd.DataFrame({
+        "project_type": ["genai", "deep_learning"],
+        "training_hardware_id": ["gpu_a100", "gpu_h100"],
+        "training_duration_run_hours": [10.0, 200.0],
+    })
+    out = configs.eco.footprint(Assumptions())  # + total_co2_kg ... annual_co2_kg
+    out = out.eco.score()                       # + score_100, score_grade
+
+Columns are the flat `ProjectInputs` fields of the saved history
+(`section_field`, as written by `save_project`); `section.field` names, as
+produced by `pd.json_normalize` on `model_dump()` output, are accepted too.
+Missing columns and missing values take the `ProjectInputs` defaults, and other
+columns are carried through unchanged. Values outside the `ProjectInputs` field
+bounds, and the throughput model on hardware without a curve, raise ValueError. Rows are evaluated by the vectorized
+calculator (app/batch.py) in chunks; results are plain numpy columns
+(`score_grade` is an ordered categorical, A < G), with no Python object per row.
+"""
+import operator
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from app.models import Assumptions, ProjectInputs
+from app.batch import RESULT_COLUMNS, GRADE_LABELS, FactorTables, factor_tables, fill_missing, encode_inputs, compute_footprint_arrays, grade_codes, score_100_array
+from app.throughput import has_curve
+from app.utils import flatten_inputs
+from app.instrumentation import timed
+
+# Rows encoded at once: bounds the temporary input arrays (~40 columns per row)
+DEFAULT_CHUNK_ROWS = 262_144
+
+
+def input_defaults() -> dict:
+    """Flat input column -> `ProjectInputs` default."""
+    defaults = flatten_inputs(ProjectInputs().model_dump())
+    del defaults["created_at"]  # set at creation, not an input of the calculation
+    return defaults
+
+
+def project_inputs(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Flat input columns of `df` (`section.field` names renamed to
+    `section_field`) with missing values set to their defaults. Columns absent
+    from `df` are left out: the calculator uses their defaults.
+    """
+    renamed = df.rename(columns=lambda c: c.replace(".", "_") if isinstance(c, str) else c)
+    duplicated = renamed.columns[renamed.columns.duplicated()]
+    if len(duplicated):
+        raise ValueError(f"Input columns given twice: {sorted(set(duplicated))}")
+    columns = {}
+    for name, default in input_defaults().items():
+        if name not in renamed.columns:
+            continue
+        columns[name] = fill_missing(renamed[name], default)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def input_bounds() -> dict:
+    """Flat input column -> (comparison, bound, symbol) from the `ProjectInputs` field constraints (ge / gt)."""
+    fields = {}
+    for name, field in ProjectInputs.model_fields.items():
+        if isinstance(field.annotation, type) and issubclass(field.annotation, BaseModel):
+            fields.update({f"{name}_{sub}": f for sub, f in field.annotation.model_fields.items()})
+        else:
+            fields[name] = field
+    bounds = {}
+    for name, field in fields.items():
+        for constraint in field.metadata:
+            if getattr(constraint, "ge", None) is not None:
+                bounds[name] = (operator.ge, constraint.ge, ">=")
+            elif getattr(constraint, "gt", None) is not None:
+                bounds[name] = (operator.gt, constraint.gt, ">")
+    return bounds
+
+
+def check_inputs(inputs: pd.DataFrame):
+    """
+    Vectorized `ProjectInputs` validation of `project_inputs` output: field
+    bounds and `throughput_curve_exists`. Raises ValueError listing every
+    offending column with its row count.
+    """
+    errors = []
+    for name, (compare, bound, symbol) in input_bounds().items():
+        if name in inputs.columns:
+            bad = int((~compare(pd.to_numeric(inputs[name]).to_numpy(), bound)).sum())
+            if bad:
+                errors.append(f"{name} must be {symbol} {bound} ({bad} row(s))")
+
+    defaults = input_defaults()
+
+    def column(name):
+        return inputs[name] if name in inputs.columns else pd.Series(defaults[name], index=inputs.index)
+
+    def flag(name):
+        values = column(name)
+        return values if values.dtype == bool else values.astype(str).str.lower().isin(["true", "1"])
+
+    served = (column("project_type") == "genai") & (column("inference_mode") != "SaaS / API")
+    tokens = served & flag("inference_include_inference") & flag("inference_throughput_model")
+    hardware = column("inference_hardware_id")[tokens].astype(str)
+    missing = {hw: int(c) for hw, c in hardware[~hardware.map(has_curve)].value_counts().items()}
+    if missing:
+        errors.append(f"no throughput curve for inference_hardware_id {missing} (add tokens_per_s and idle_watts to the SKU records)")
+    if errors:
+        raise ValueError("Invalid inputs: " + "; ".join(errors))
+
+
+@timed("sdk_footprint")
+def footprint(df: pd.DataFrame, assumptions: Assumptions | dict | None = None, tables: FactorTables | None = None,
+              chunk_rows: int = DEFAULT_CHUNK_ROWS) -> pd.DataFrame:
+    """`df` with the footprint columns (RESULT_COLUMNS) added, or replaced when present."""
+    if not isinstance(assumptions, Assumptions):
+        assumptions = Assumptions(**(assumptions or {}))
+    tables = tables or factor_tables()
+    inputs = project_inputs(df)
+    check_inputs(inputs)
+    n = len(df)
+    results = {c: np.empty(n) for c in RESULT_COLUMNS}
+    for start in range(0, n, chunk_rows):
+        stop = min(n, start + chunk_rows)
+        cols = encode_inputs(inputs.iloc[start:stop], tables)
+        compute_footprint_arrays(cols, tables, assumptions, out={c: a[start:stop] for c, a in results.items()})
+    out = df.copy()
+    for c in RESULT_COLUMNS:
+        out[c] = results[c]
+    return out
+
+
+def score(df: pd.DataFrame, assumptions: Assumptions | dict | None = None, tables: FactorTables | None = None) -> pd.DataFrame:
+    """`df` with `score_100` and `score_grade` added (the footprint is computed first when absent)."""
+    if "total_co2_kg" not in df.columns or "total_water_m3" not in df.columns:
+        df = footprint(df, assumptions, tables)
+    co2 = df["total_co2_kg"].to_numpy(dtype=np.float64)
+    water = df["total_water_m3"].to_numpy(dtype=np.float64)
+    out = df.copy()
+    out["score_100"] = score_100_array(co2, water)
+    out["score_grade"] = pd.Categorical.from_codes(grade_codes(co2), categories=GRADE_LABELS, ordered=True)  # A < B < ... < G
+    return out
+
+
+@pd.api.extensions.register_dataframe_accessor("eco")
+class EcoAccessor:
+    """`df.eco`: footprint and score of every row of a DataFrame of project configurations."""
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+
+    def inputs(self) -> pd.DataFrame:
+        return project_inputs(self._df)
+
+    def footprint(self, assumptions: Assumptions | dict | None = None, tables: FactorTables | None = None,
+                  chunk_rows: int = DEFAULT_CHUNK_ROWS) -> pd.DataFrame:
+        return footprint(self._df, assumptions, tables, chunk_rows)
+
+    def score(self, assumptions: Assumptions | dict | None = None, tables: FactorTables | None = None) -> pd.DataFrame:
+        return score(self._df, assumptions, tables)
@@ -0,0 +1,218 @@
+# app/search.py
+"""
+In-memory search index over the saved project history.
+
+Text fields are dictionary-encoded once (one integer code per row), so a query
+only scans the distinct values (prefix search on a sorted array + trigram
+postings for fuzzy matches) and then maps the matches back to rows with a
+single lookup-table gather. Filters and pagination are numpy masks over
+precomputed columns; only the requested page is materialized as a DataFrame.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from app.instrumentation import timed
+
+SEARCH_FIELDS = ["project_name", "owner", "project_type", "score_grade", "tags"]
+DEFAULT_PAGE_SIZE = 50
+# Share of the query trigrams a value must contain to count as a fuzzy match
+FUZZY_MIN_SIMILARITY = 0.6
+
+# Ranking tiers: prefix of the value > prefix of a word > substring/fuzzy
+_TIER_PREFIX, _TIER_WORD, _TIER_FUZZY = 3, 2, 1
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _FieldIndex:
+    """Dictionary-encoded text column with prefix and trigram lookups."""
+
+    def __init__(self, values: pd.Series):
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Already dictionary-encoded: lowercase the categories only (plus "" for missing values, code -1)
+            categories = pd.Index(values.cat.categories.astype(str).str.lower()).append(pd.Index([""]))
+            category_codes, uniques = pd.factorize(categories, sort=False)
+            codes = category_codes[values.cat.codes.to_numpy()]
+        else:
+            codes, uniques = pd.factorize(values.fillna("").astype(str).str.lower(), sort=False)
+        self.codes = codes.astype(np.int32)
+        self.uniques = np.asarray(uniques, dtype=object)
+
+        self._sorted_ids = np.argsort(self.uniques.astype(str), kind="stable")
+        self._sorted_vals = self.uniques[self._sorted_ids].astype(str)
+
+        words, word_ids = [], []
+        postings: dict[str, list[int]] = {}
+        for uid, value in enumerate(self.uniques):
+            for word in value.split():
+                words.append(word)
+                word_ids.append(uid)
+            for tri in trigrams(value):
+                postings.setdefault(tri, []).append(uid)
+        order = np.argsort(np.asarray(words, dtype=str), kind="stable") if words else np.array([], dtype=np.int64)
+        self._words = np.asarray(words, dtype=str)[order] if words else np.array([], dtype=str)
+        self._word_ids = np.asarray(word_ids, dtype=np.int32)[order] if words else np.array([], dtype=np.int32)
+        self._postings = {tri: np.asarray(ids, dtype=np.int32) for tri, ids in postings.items()}
+
+    @staticmethod
+    def _prefix_range(sorted_vals: np.ndarray, q: str) -> slice:
+        lo = np.searchsorted(sorted_vals, q, side="left")
+        hi = np.searchsorted(sorted_vals, q + "\U0010ffff", side="left")
+        return slice(lo, hi)
+
+    def match(self, q: str) -> np.ndarray:
+        """Returns a per-unique-value tier (0 = no match) for the lowercase term `q`."""
+        tiers = np.zeros(len(self.uniques), dtype=np.int8)
+        if len(self._words):
+            ids = self._word_ids[self._prefix_range(self._words, q)]
+            tiers[ids] = _TIER_WORD
+        ids = self._sorted_ids[self._prefix_range(self._sorted_vals, q)]
+        tiers[ids] = _TIER_PREFIX
+
+        q_tris = [t for t in trigrams(q) if t in self._postings]
+        if len(q) >= 3 and q_tris:
+            hits = np.bincount(np.concatenate([self._postings[t] for t in q_tris]), minlength=len(self.uniques))
+            fuzzy = (hits / len(trigrams(q))) >= FUZZY_MIN_SIMILARITY
+            tiers[fuzzy & (tiers == 0)] = _TIER_FUZZY
+        return tiers
+
+
+def _contiguous_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rebuilds extension string columns as single contiguous arrays: a chunked
+    Arrow column (e.g. after a concat) makes every page `take` scan all chunks.
+    """
+    for col in df.columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_string_dtype(dtype) and dtype != object and not isinstance(dtype, pd.CategoricalDtype):
+            df[col] = pd.array(df[col].to_numpy(dtype=object), dtype=dtype)
+    return df
+
+
+@dataclass
+class SearchResult:
+    rows: pd.DataFrame  # the requested page only
+    total: int
+    page: int
+    pages: int
+
+
+class ProjectIndex:
+    """
+    Search index over a project history DataFrame (as returned by `load_projects`).
+    Per-row arrays are stored in "most recent first" order, so a filter mask
+    directly yields result positions in display order.
+    """
+
+    @timed("search_index_build")
+    def __init__(self, df: pd.DataFrame):
+        self.df = _contiguous_strings(df.reset_index(drop=True))
+        self.version = df.attrs.get("version")
+        n = len(self.df)
+
+        ts = self.df["timestamp"] if "timestamp" in self.df.columns else pd.Series(pd.NaT, index=self.df.index)
+        ts = pd.to_datetime(ts, format="ISO8601", errors="coerce").to_numpy(dtype="datetime64[ns]")
+        # Most recent first (ties: last saved first); NaT last
+        ts_int = ts.astype(np.int64)
+        ts_int[np.isnat(ts)] = np.iinfo(np.int64).min
+        self._order = np.argsort(ts_int, kind="stable")[::-1].astype(np.int64)
+        self.ts = ts[self._order]
+
+        self.fields = {}
+        for f in SEARCH_FIELDS:
+            if f in self.df.columns:
+                idx = _FieldIndex(self.df[f])
+                idx.codes = idx.codes[self._order]
+                self.fields[f] = idx
+
+        co2 = self.df["total_co2_kg"] if "total_co2_kg" in self.df.columns else pd.Series(np.nan, index=self.df.index)
+        self.co2 = pd.to_numeric(co2, errors="coerce").to_numpy(dtype=np.float64)[self._order]
+
+        # Latest saved version of each project (first occurrence in recency order)
+        self.is_latest = np.ones(n, dtype=bool)
+        if "project_name" in self.fields and n:
+            _, first = np.unique(self.fields["project_name"].codes, return_index=True)
+            self.is_latest[:] = False
+            self.is_latest[first] = True
+
+    def __len__(self):
+        return len(self.df)
+
+    def values(self, field: str) -> list[str]:
+        """Distinct values of a text field (original casing), for filter widgets."""
+        if field not in self.df.columns:
+            return []
+        return sorted(self.df[field].dropna().astype(str).unique())
+
+    def _query_tiers(self, query: str, fields) -> np.ndarray:
+        """Per-row tier: every term must match at least one field; rows keep their weakest term tier."""
+        row_tier = np.full(len(self.df), _TIER_PREFIX, dtype=np.int8)
+        for term in query.lower().split():
+            term_tier = np.zeros(len(self.df), dtype=np.int8)
+            for f in fields:
+                idx = self.fields[f]
+                tiers = idx.match(term)
+                if tiers.any():
+                    np.maximum(term_tier, tiers[idx.codes], out=term_tier)
+            np.minimum(row_tier, term_tier, out=row_tier)
+        return row_tier
+
+    def _in_values(self, field: str, selected) -> np.ndarray:
+        idx = self.fields[field]
+        wanted = {str(v).lower() for v in selected}
+        lut = np.fromiter((u in wanted for u in idx.uniques), dtype=bool, count=len(idx.uniques))
+        return lut[idx.codes]
+
+    @timed("search_query")
+    def search(
+        self,
+        query: str = "",
+        *,
+        fields=None,
+        project_types=None,
+        grades=None,
+        owners=None,
+        co2_min: float | None = None,
+        co2_max: float | None = None,
+        date_from=None,
+        date_to=None,
+        latest_only: bool = False,
+        page: int = 0,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> SearchResult:
+        mask = np.ones(len(self.df), dtype=bool)
+        tiers = None
+        fields = [f for f in (fields or SEARCH_FIELDS) if f in self.fields]
+        if query.strip() and fields:
+            tiers = self._query_tiers(query, fields)
+            mask &= tiers > 0
+        for field, selected in (("project_type", project_types), ("score_grade", grades), ("owner", owners)):
+            if selected and field in self.fields:
+                mask &= self._in_values(field, selected)
+        if co2_min is not None:
+            mask &= self.co2 >= co2_min
+        if co2_max is not None:
+            mask &= self.co2 <= co2_max
+        if date_from is not None:
+            mask &= self.ts >= np.datetime64(pd.Timestamp(date_from))
+        if date_to is not None:
+            # Inclusive end date
+            mask &= self.ts < np.datetime64(pd.Timestamp(date_to) + pd.Timedelta(days=1))
+        if latest_only:
+            mask &= self.is_latest
+
+        if tiers is None:
+            positions = np.flatnonzero(mask)
+        else:
+            positions = np.concatenate([np.flatnonzero(mask & (tiers == t)) for t in (_TIER_PREFIX, _TIER_WORD, _TIER_FUZZY)])
+
+        total = len(positions)
+        pages = max(1, -(-total // page_size))
+        page = min(max(0, page), pages - 1)
+        rows = self.df.iloc[self._order[positions[page * page_size:(page + 1) * page_size]]]
+        return SearchResult(rows=rows, total=total, page=page, pages=pages)
@@ -0,0 +1,171 @@
+# app/shared_batch.py
+"""
+Process-pool footprint evaluation over shared memory.
+
+The factor tables, the encoded input columns and the result columns each live
+in one `multiprocessing.shared_memory` block. Worker processes attach to the
+blocks once (pool initializer) and get numpy views on them without copying;
+a task is only a `(start, stop)` row range, and each worker writes its rows
+straight into the shared result buffer.
+
+    with SharedBatch.from_frame(df) as batch:
+        batch.evaluate(Assumptions(), workers=4)
+        total = batch.results.arrays["total_co2_kg"].sum()  # in place
+        results = batch.to_frame()                          # copy, usable after close
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from app.models import Assumptions
+from app.batch import FactorTables, RESULT_COLUMNS, factor_tables, input_dtypes, encode_inputs, compute_footprint_arrays
+from app.instrumentation import timed
+
+# Rows per task: large enough that dispatch is negligible, small enough to
+# bound the per-worker temporaries (~30 float64 arrays of this length).
+DEFAULT_CHUNK_ROWS = 262_144
+_ALIGN = 64
+
+
+@dataclass(frozen=True)
+class SharedArraysSpec:
+    """Picklable description of a shared block: name + (column, dtype, length, offset)."""
+    shm_name: str
+    layout: tuple
+
+
+class SharedArrays:
+    """Several 1-D numpy arrays packed into a single shared memory block."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: tuple, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self.spec = SharedArraysSpec(shm.name, layout)
+        self.arrays = {
+            name: np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, dtype, length, offset in layout
+        }
+
+    @classmethod
+    def create(cls, columns: dict) -> "SharedArrays":
+        """`columns` maps a name to `(dtype, length)`."""
+        layout, offset = [], 0
+        for name, (dtype, length) in columns.items():
+            dtype = np.dtype(dtype)
+            layout.append((name, dtype.str, int(length), offset))
+            offset += -(-dtype.itemsize * int(length) // _ALIGN) * _ALIGN
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        return cls(shm, tuple(layout), owner=True)
+
+    @classmethod
+    def publish(cls, arrays: dict) -> "SharedArrays":
+        """Copies existing arrays into a new shared block."""
+        block = cls.create({name: (a.dtype, len(a)) for name, a in arrays.items()})
+        for name, a in arrays.items():
+            block.arrays[name][:] = a
+        return block
+
+    @classmethod
+    def attach(cls, spec: SharedArraysSpec) -> "SharedArrays":
+        return cls(shared_memory.SharedMemory(name=spec.shm_name), spec.layout, owner=False)
+
+    @property
+    def nbytes(self) -> int:
+        return self._shm.size
+
+    def close(self):
+        self.arrays = {}  # views must go before the buffer is released
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+# --- Worker side (one attachment per process, reused by every task) ---
+_worker = {}
+
+
+def _init_worker(factors: SharedArraysSpec, keys: dict, inputs: SharedArraysSpec, results: SharedArraysSpec, assumptions: dict):
+    blocks = [SharedArrays.attach(s) for s in (factors, inputs, results)]
+    _worker.update(
+        blocks=blocks,
+        tables=FactorTables(**keys, **blocks[0].arrays),
+        inputs=blocks[1].arrays,
+        results=blocks[2].arrays,
+        assumptions=Assumptions(**assumptions),
+    )
+
+
+def _evaluate_rows(start: int, stop: int) -> int:
+    cols = {name: a[start:stop] for name, a in _worker["inputs"].items()}
+    out = {name: a[start:stop] for name, a in _worker["results"].items()}
+    compute_footprint_arrays(cols, _worker["tables"], _worker["assumptions"], out=out)
+    return stop - start
+
+
+class SharedBatch:
+    """Factor tables, encoded inputs and a result buffer for `n_rows` projects in shared memory."""
+
+    def __init__(self, n_rows: int, tables: FactorTables | None = None):
+        self.n_rows = n_rows
+        self.tables = tables or factor_tables()
+        self.factors = SharedArrays.publish(self.tables.arrays())
+        self.inputs = SharedArrays.create({c: (t, n_rows) for c, t in input_dtypes().items()})
+        self.results = SharedArrays.create({c: (np.float64, n_rows) for c in RESULT_COLUMNS})
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, tables: FactorTables | None = None) -> "SharedBatch":
+        batch = cls(len(df), tables)
+        batch.fill(0, df)
+        return batch
+
+    def fill(self, start: int, df: pd.DataFrame) -> int:
+        """Encodes a chunk of flat input rows at `start` (lets large batches be streamed in). Returns the next offset."""
+        stop = start + len(df)
+        encode_inputs(df, self.tables, out={c: a[start:stop] for c, a in self.inputs.arrays.items()})
+        return stop
+
+    @property
+    def nbytes(self) -> int:
+        return self.factors.nbytes + self.inputs.nbytes + self.results.nbytes
+
+    @timed("shared_batch_evaluate")
+    def evaluate(self, assumptions: Assumptions, workers: int | None = None, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        """
+        Computes every row with a process pool (`workers=0`: in this process)
+        into the shared result columns (`self.results.arrays`).
+        """
+        ranges = [(s, min(s + chunk_rows, self.n_rows)) for s in range(0, self.n_rows, chunk_rows)]
+        if ranges and workers == 0:
+            _init_worker(*self._worker_args(assumptions))
+            try:
+                for s, e in ranges:
+                    _evaluate_rows(s, e)
+            finally:
+                for block in _worker.pop("blocks"):
+                    block.close()
+                _worker.clear()
+        elif ranges:
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(min(workers, max(1, len(ranges))), initializer=_init_worker, initargs=self._worker_args(assumptions)) as pool:
+                list(pool.map(_evaluate_rows, *zip(*ranges)))
+
+    def to_frame(self) -> pd.DataFrame:
+        """Copy of the result columns."""
+        return pd.DataFrame({c: a.copy() for c, a in self.results.arrays.items()})
+
+    def _worker_args(self, assumptions: Assumptions) -> tuple:
+        return (self.factors.spec, self.tables.keys(), self.inputs.spec, self.results.spec, assumptions.model_dump())
+
+    def close(self):
+        for block in (self.factors, self.inputs, self.results):
+            block.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
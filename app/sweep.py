@@ -0,0 +1,504 @@
+# app/sweep.py
+"""
+Sharded scenario sweeps: portfolio x regions x hardware x Monte Carlo draws.
+
+A coordinator splits the sweep into shards (a row range of the portfolio for
+one region/hardware scenario, all draws included) and serves them over TCP
+(`multiprocessing.managers`). Workers, local processes or other hosts,
+lease a shard, evaluate it with the batch calculator and send back a small
+partial aggregate. Leases are kept alive by heartbeats: when a worker dies,
+its shard is re-queued once the lease expires. Each shard is merged exactly
+once, so the result does not depend on how shards were distributed. A shard
+that fails (worker error or expired lease) `max_attempts` times fails the
+sweep with `SweepFailed`, as do a sweep left without any worker and an
+overall timeout.
+
+    # coordinator + 2 local workers
+    python -m app.sweep run --rows 200000 --regions "France (FR)" "USA (avg)" --draws 20 --local-workers 2
+    # extra workers on other hosts (same ECOMETRICS_SWEEP_AUTHKEY)
+    python -m app.sweep worker --connect coordinator-host:5055
+"""
+import argparse
+import dataclasses
+import itertools
+import multiprocessing
+import os
+import secrets
+import socket
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.models import Assumptions
+from app.batch import FactorTables, GRADE_LABELS, GRADE_THRESHOLDS, factor_tables, encode_inputs, compute_footprint_arrays
+from app.synthetic import PortfolioGenerator, DEFAULT_SEED
+from app.utils import flatten_inputs
+
+DEFAULT_SHARD_ROWS = 50_000
+DEFAULT_LEASE_TIMEOUT = 30.0
+DEFAULT_MAX_ATTEMPTS = 3  # failed attempts (errors or expired leases) of one shard before the sweep fails
+DEFAULT_PORT = 5055
+AUTHKEY_ENV = "ECOMETRICS_SWEEP_AUTHKEY"
+
+# Monte Carlo uncertainty: lognormal sigma of the multiplicative noise applied
+# per draw to each factor table entry (median 1, draw 0 = nominal factors)
+UNCERTAINTY_SIGMA = {
+    "grid_kg_per_kwh": 0.15,
+    "hardware_watts": 0.10,
+    "infra_pue": 0.05,
+    "api_gco2_per_1k_tokens": 0.30,
+}
+
+# Columns of a partial aggregate (one row per draw)
+AGG_FIELDS = ["projects", "total_co2_kg", "total_energy_kwh", "total_water_m3"] + [f"grade_{g}" for g in GRADE_LABELS]
+
+
+class SweepFailed(RuntimeError):
+    """A sweep that cannot complete: a shard kept failing, no worker is left, or the timeout passed."""
+
+
+@dataclass
+class SweepSpec:
+    portfolio: str = "synthetic"  # "synthetic" or a CSV/Parquet/JSONL path readable by every worker
+    rows: int = 100_000           # synthetic portfolio size (files: all rows); generated per shard_rows block
+    seed: int = DEFAULT_SEED
+    regions: tuple = (None,)      # None keeps each project's own regions
+    hardware_ids: tuple = (None,) # None keeps each project's own hardware
+    draws: int = 0                # Monte Carlo draws on top of the nominal run
+    shard_rows: int = DEFAULT_SHARD_ROWS
+    assumptions: dict = field(default_factory=dict)
+
+    def scenarios(self) -> list[tuple]:
+        return list(itertools.product(self.regions, self.hardware_ids))
+
+
+@dataclass(frozen=True)
+class Shard:
+    shard_id: int
+    start: int
+    stop: int
+    scenario: int  # index into spec.scenarios()
+
+
+def portfolio_rows(spec: SweepSpec) -> int:
+    if spec.portfolio == "synthetic":
+        return spec.rows
+    return len(_read_portfolio(spec.portfolio))
+
+
+def make_shards(spec: SweepSpec, n_rows: int) -> list[Shard]:
+    ranges = [(s, min(s + spec.shard_rows, n_rows)) for s in range(0, n_rows, spec.shard_rows)]
+    return [
+        Shard(shard_id, start, stop, scenario)
+        for shard_id, (scenario, (start, stop)) in enumerate(itertools.product(range(len(spec.scenarios())), ranges))
+    ]
+
+
+# --- Shard evaluation (worker side) ---
+@lru_cache(maxsize=1)
+def _read_portfolio(path: str) -> pd.DataFrame:
+    suffixes = Path(path).suffixes
+    if ".parquet" in suffixes:
+        return pd.read_parquet(path)
+    if ".jsonl" in suffixes:
+        return pd.read_json(path, lines=True)
+    return pd.read_csv(path)
+
+
+@lru_cache(maxsize=8)
+def _encoded_rows(portfolio: str, seed: int, start: int, stop: int) -> dict:
+    """Encoded input columns of portfolio rows [start, stop), cached across scenarios."""
+    if portfolio == "synthetic":
+        # Each block has its own seed, so any worker can rebuild any shard
+        gen = PortfolioGenerator(seed=seed * 2**32 + start)
+        df = pd.DataFrame([flatten_inputs(r) for r in gen.records(stop - start, start=start)])
+    else:
+        df = _read_portfolio(portfolio).iloc[start:stop]
+    return encode_inputs(df, _nominal_tables())
+
+
+@lru_cache(maxsize=1)
+def _nominal_tables() -> FactorTables:
+    return factor_tables()
+
+
+def draw_tables(tables: FactorTables, seed: int, draw: int) -> FactorTables:
+    """Factor tables of Monte Carlo draw `draw` (0: nominal)."""
+    if draw == 0:
+        return tables
+    rng = np.random.default_rng([seed, draw])
+    noisy = {
+        name: getattr(tables, name) * rng.lognormal(0.0, sigma, size=len(getattr(tables, name)))
+        for name, sigma in UNCERTAINTY_SIGMA.items()
+    }
+    noisy["infra_pue"] = np.maximum(1.0, noisy["infra_pue"])  # PUE cannot go below 1 (NaN kept)
+    return dataclasses.replace(tables, **noisy)
+
+
+def evaluate_shard(spec: SweepSpec, shard: Shard) -> np.ndarray:
+    """Partial aggregate of a shard: array of shape (draws + 1, len(AGG_FIELDS))."""
+    tables = _nominal_tables()
+    cols = dict(_encoded_rows(spec.portfolio, spec.seed, shard.start, shard.stop))
+    n = shard.stop - shard.start
+    region, hardware_id = spec.scenarios()[shard.scenario]
+    if region is not None:
+        code = tables.regions.index(region) if region in tables.regions else -1
+        cols["training_region"] = cols["inference_region"] = np.full(n, code, dtype=np.int16)
+    if hardware_id is not None:
+        code = tables.hardware_ids.index(hardware_id) if hardware_id in tables.hardware_ids else -1
+        cols["training_hardware_id"] = cols["inference_hardware_id"] = np.full(n, code, dtype=np.int16)
+
+    assumptions = Assumptions(**spec.assumptions)
+    partial = np.zeros((spec.draws + 1, len(AGG_FIELDS)))
+    for draw in range(spec.draws + 1):
+        res = compute_footprint_arrays(cols, draw_tables(tables, spec.seed, draw), assumptions)
+        grades = np.bincount(np.searchsorted(GRADE_THRESHOLDS, res["total_co2_kg"], side="left"), minlength=len(GRADE_LABELS))
+        partial[draw] = [n, res["total_co2_kg"].sum(), res["total_energy_kwh"].sum(), res["total_water_m3"].sum(), *grades]
+    return partial
+
+
+# --- Coordinator ---
+class Coordinator:
+    """Hands out shards under leases, re-queues expired ones and merges partial aggregates (thread-safe)."""
+
+    def __init__(self, spec: SweepSpec, lease_timeout: float = DEFAULT_LEASE_TIMEOUT, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.spec = spec
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.shards = make_shards(spec, portfolio_rows(spec))
+        self._pending = deque(s.shard_id for s in self.shards)
+        self._leases = {}  # shard_id -> (worker_id, deadline)
+        self._done = set()
+        self._aggregate = np.zeros((len(spec.scenarios()), spec.draws + 1, len(AGG_FIELDS)))
+        self._cond = threading.Condition()
+        self.requeued = 0
+        self.workers = set()
+        self.failures = {}  # shard_id -> failed attempts
+        self.error = None   # set once the sweep failed
+
+    def join(self, worker_id: str) -> tuple[SweepSpec, float]:
+        """Registers a worker. Returns the sweep spec and the lease timeout (heartbeat at a third of it)."""
+        with self._cond:
+            self.workers.add(worker_id)
+        return self.spec, self.lease_timeout
+
+    def get_shard(self, worker_id: str) -> tuple:
+        """("shard", Shard), ("wait", None) while every remaining shard is leased, or ("done", None) (also once the sweep failed)."""
+        with self._cond:
+            self._requeue_expired()
+            if len(self._done) == len(self.shards) or self.error is not None:
+                return "done", None
+            while self._pending:
+                shard_id = self._pending.popleft()
+                if shard_id not in self._done:
+                    self._leases[shard_id] = (worker_id, time.monotonic() + self.lease_timeout)
+                    return "shard", self.shards[shard_id]
+            return "wait", None
+
+    def heartbeat(self, worker_id: str, shard_id: int) -> bool:
+        """Extends the lease. False if the shard was re-queued or already merged."""
+        with self._cond:
+            lease = self._leases.get(shard_id)
+            if lease is None or lease[0] != worker_id:
+                return False
+            self._leases[shard_id] = (worker_id, time.monotonic() + self.lease_timeout)
+            return True
+
+    def submit(self, worker_id: str, shard_id: int, partial: np.ndarray) -> bool:
+        """Merges a shard result; duplicates (late re-executions) are ignored."""
+        with self._cond:
+            self._leases.pop(shard_id, None)
+            if shard_id in self._done:
+                return False
+            self._done.add(shard_id)
+            self._aggregate[self.shards[shard_id].scenario] += partial
+            self._cond.notify_all()
+            return True
+
+    def fail(self, worker_id: str, shard_id: int, error: str):
+        """Reports a shard the worker could not evaluate: re-queued, or the sweep fails after `max_attempts`."""
+        with self._cond:
+            lease = self._leases.get(shard_id)
+            if lease is None or lease[0] != worker_id or shard_id in self._done:
+                return  # lease already expired (and counted) or shard merged by another worker
+            del self._leases[shard_id]
+            self._record_failure(shard_id, f"worker {worker_id}: {error}")
+
+    def _record_failure(self, shard_id: int, error: str):
+        self.failures[shard_id] = self.failures.get(shard_id, 0) + 1
+        if self.failures[shard_id] >= self.max_attempts:
+            if self.error is None:
+                self.error = f"shard {shard_id} failed {self.failures[shard_id]} times; last error from {error}"
+            self._cond.notify_all()
+        else:
+            self._pending.append(shard_id)
+            self.requeued += 1
+
+    def _requeue_expired(self):
+        now = time.monotonic()
+        for shard_id, (worker_id, deadline) in list(self._leases.items()):
+            if deadline < now:
+                del self._leases[shard_id]
+                self._record_failure(shard_id, f"worker {worker_id}: lease expired (worker lost)")
+
+    def leased(self) -> bool:
+        """Whether a worker currently holds a shard."""
+        with self._cond:
+            return bool(self._leases)
+
+    def leases(self) -> dict:
+        """Shard id -> worker id of the current leases."""
+        with self._cond:
+            return {shard_id: worker_id for shard_id, (worker_id, _) in self._leases.items()}
+
+    def progress(self) -> tuple[int, int]:
+        with self._cond:
+            return len(self._done), len(self.shards)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Waits until every shard is merged (re-queueing expired leases meanwhile); raises SweepFailed if the sweep failed."""
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while len(self._done) < len(self.shards):
+                self._requeue_expired()
+                if self.error is not None:
+                    raise SweepFailed(self.error)
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(min(1.0, remaining) if remaining is not None else 1.0)
+            return True
+
+    def result(self) -> pd.DataFrame:
+        with self._cond:
+            return aggregate_frame(self.spec, self._aggregate.copy())
+
+
+def aggregate_frame(spec: SweepSpec, aggregate: np.ndarray) -> pd.DataFrame:
+    """One row per scenario: nominal totals, Monte Carlo spread of the total CO₂ and grade shares."""
+    rows = []
+    for (region, hardware_id), per_draw in zip(spec.scenarios(), aggregate):
+        nominal = dict(zip(AGG_FIELDS, per_draw[0]))
+        row = {
+            "region": region or "(portfolio)",
+            "hardware_id": hardware_id or "(portfolio)",
+            "projects": int(nominal["projects"]),
+            "total_co2_kg": nominal["total_co2_kg"],
+            "total_energy_kwh": nominal["total_energy_kwh"],
+            "total_water_m3": nominal["total_water_m3"],
+        }
+        if spec.draws:
+            co2 = per_draw[1:, AGG_FIELDS.index("total_co2_kg")]
+            row.update(co2_mean_kg=co2.mean(), co2_p05_kg=np.percentile(co2, 5), co2_p95_kg=np.percentile(co2, 95))
+        for g in GRADE_LABELS:
+            row[f"share_{g}"] = nominal[f"grade_{g}"] / max(1.0, nominal["projects"])
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def run_local(spec: SweepSpec, on_progress=None) -> pd.DataFrame:
+    """
+    Evaluates every shard in this process (reference for distributed runs).
+    `on_progress(done, total)` is called after each shard.
+    """
+    aggregate = np.zeros((len(spec.scenarios()), spec.draws + 1, len(AGG_FIELDS)))
+    shards = make_shards(spec, portfolio_rows(spec))
+    for done, shard in enumerate(shards, 1):
+        aggregate[shard.scenario] += evaluate_shard(spec, shard)
+        if on_progress:
+            on_progress(done, len(shards))
+    return aggregate_frame(spec, aggregate)
+
+
+# --- Transport ---
+class _CoordinatorClient(BaseManager):
+    pass
+
+
+_CoordinatorClient.register("coordinator")
+
+
+def serve(coordinator: Coordinator, address: tuple, authkey: bytes):
+    """Serves the coordinator over TCP from a background thread. Returns the manager server."""
+    class _CoordinatorServer(BaseManager):
+        pass
+
+    _CoordinatorServer.register("coordinator", callable=lambda: coordinator)
+    server = _CoordinatorServer(address=address, authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_server(server):
+    server.stop_event.set()
+    server.listener.close()
+
+
+def run_worker(address: tuple, authkey: bytes, worker_id: str | None = None) -> int:
+    """Evaluates shards until the sweep is done. Returns the number of shards merged."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    client = _CoordinatorClient(address=address, authkey=authkey)
+    client.connect()
+    coordinator = client.coordinator()
+    spec, lease_timeout = coordinator.join(worker_id)
+    merged = 0
+    while True:
+        status, shard = coordinator.get_shard(worker_id)
+        if status == "done":
+            return merged
+        if status == "wait":
+            time.sleep(0.2)
+            continue
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(coordinator, worker_id, shard.shard_id, lease_timeout / 3, stop), daemon=True)
+        beat.start()
+        try:
+            partial = evaluate_shard(spec, shard)
+        except Exception as e:
+            coordinator.fail(worker_id, shard.shard_id, f"{e!r}\n{traceback.format_exc()}")
+            continue
+        finally:
+            stop.set()
+            beat.join()
+        merged += coordinator.submit(worker_id, shard.shard_id, partial)
+
+
+def _heartbeat(coordinator, worker_id: str, shard_id: int, interval: float, stop: threading.Event):
+    while not stop.wait(interval):
+        if not coordinator.heartbeat(worker_id, shard_id):
+            return
+
+
+def _worker_process(address: tuple, authkey: bytes):
+    run_worker(address, authkey)
+
+
+def run_sweep(
+    spec: SweepSpec,
+    *,
+    local_workers: int = 2,
+    address: tuple = ("127.0.0.1", 0),
+    authkey: bytes | None = None,
+    lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+    max_restarts: int | None = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    timeout: float | None = None,
+    on_start=None,
+) -> tuple[pd.DataFrame, Coordinator]:
+    """
+    Runs a sweep with a coordinator on `address` and `local_workers` worker
+    processes (more can join from other hosts). Local workers that die are
+    restarted while work remains, up to `max_restarts`.
+    `on_start(server_address, processes)` is called once workers are running.
+    Raises SweepFailed when a shard fails `max_attempts` times, when every
+    local worker is gone with no restart left and no shard leased, or after
+    `timeout` seconds.
+    """
+    authkey = authkey or os.environ.get(AUTHKEY_ENV, "").encode() or secrets.token_bytes(16)
+    coordinator = Coordinator(spec, lease_timeout, max_attempts)
+    server = serve(coordinator, address, authkey)
+    ctx = multiprocessing.get_context("spawn")  # like a remote host: no inherited state
+    max_restarts = local_workers * 3 if max_restarts is None else max_restarts
+
+    def start_worker():
+        p = ctx.Process(target=_worker_process, args=(server.address, authkey), daemon=True)
+        p.start()
+        return p
+
+    processes = [start_worker() for _ in range(local_workers)]
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        if on_start:
+            on_start(server.address, processes)
+        while not coordinator.wait(timeout=1.0):
+            for i, p in enumerate(processes):
+                if not p.is_alive() and max_restarts > 0:
+                    max_restarts -= 1
+                    processes[i] = start_worker()
+            if processes and not any(p.is_alive() for p in processes) and not coordinator.leased():
+                done, total = coordinator.progress()
+                codes = ", ".join(str(p.exitcode) for p in processes)
+                raise SweepFailed(f"every local worker exited (exit codes {codes}) with no restart left, {done}/{total} shards merged")
+            if deadline is not None and time.monotonic() > deadline:
+                done, total = coordinator.progress()
+                raise SweepFailed(f"timed out after {timeout:g} s, {done}/{total} shards merged")
+        for p in processes:
+            p.join(timeout=10)
+        return coordinator.result(), coordinator
+    finally:
+        for p in processes:
+            if p.is_alive():
+                p.terminate()
+        stop_server(server)
+
+
+def _parse_address(text: str) -> tuple:
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sharded portfolio scenario sweeps.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Start a coordinator (and local workers) and print the merged result.")
+    run.add_argument("--portfolio", default="synthetic", help='"synthetic" or a CSV/Parquet/JSONL file visible to all workers.')
+    run.add_argument("--rows", type=int, default=100_000, help="Synthetic portfolio size.")
+    run.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    run.add_argument("--regions", nargs="*", default=[], help="Regions to sweep (default: keep the portfolio's).")
+    run.add_argument("--hardware", nargs="*", default=[], help="Hardware ids to sweep (default: keep the portfolio's).")
+    run.add_argument("--draws", type=int, default=0, help="Monte Carlo draws.")
+    run.add_argument("--shard-rows", type=int, default=DEFAULT_SHARD_ROWS)
+    run.add_argument("--local-workers", type=int, default=os.cpu_count() or 1)
+    run.add_argument("--bind", default=f"127.0.0.1:{DEFAULT_PORT}", help="host:port the coordinator listens on.")
+    run.add_argument("--lease-timeout", type=float, default=DEFAULT_LEASE_TIMEOUT)
+    run.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="Failed attempts of a shard before the sweep fails.")
+    run.add_argument("--timeout", type=float, default=None, help="Fail the sweep after this many seconds.")
+    run.add_argument("--out", type=Path, default=None, help="Write the result as CSV.")
+
+    work = sub.add_parser("worker", help="Join a running coordinator.")
+    work.add_argument("--connect", required=True, help="Coordinator host:port.")
+
+    args = parser.parse_args(argv)
+    authkey = os.environ.get(AUTHKEY_ENV, "").encode()
+
+    if args.command == "worker":
+        if not authkey:
+            parser.error(f"{AUTHKEY_ENV} must be set to the coordinator's key")
+        merged = run_worker(_parse_address(args.connect), authkey)
+        print(f"{merged} shards merged")
+        return 0
+
+    spec = SweepSpec(
+        portfolio=args.portfolio, rows=args.rows, seed=args.seed,
+        regions=tuple(args.regions) or (None,), hardware_ids=tuple(args.hardware) or (None,),
+        draws=args.draws, shard_rows=args.shard_rows,
+    )
+    if not authkey:
+        authkey = secrets.token_hex(16).encode()
+        print(f"Remote workers: {AUTHKEY_ENV}={authkey.decode()} python -m app.sweep worker --connect <this-host>:{_parse_address(args.bind)[1]}")
+    start = time.perf_counter()
+    try:
+        result, coordinator = run_sweep(spec, local_workers=args.local_workers, address=_parse_address(args.bind), authkey=authkey,
+                                        lease_timeout=args.lease_timeout, max_attempts=args.max_attempts, timeout=args.timeout)
+    except SweepFailed as e:
+        print(f"Sweep failed: {e}", file=sys.stderr)
+        return 1
+    print(result.to_string(index=False))
+    print(f"{len(coordinator.shards)} shards, {len(coordinator.workers)} workers, {coordinator.requeued} re-queued, {time.perf_counter() - start:.1f} s")
+    if args.out:
+        result.to_csv(args.out, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
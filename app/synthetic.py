@@ -0,0 +1,279 @@
+# app/synthetic.py
+"""
+Synthetic portfolio generator for scale and load testing.
+
+Produces valid `ProjectInputs` with realistic joint distributions (project type
+drives hardware, frequencies and traffic; environment drives duration and
+volume). Generation is a seeded stream, so any N can be written to JSONL or
+Parquet in constant memory:
+
+    python -m app.synthetic -n 10000000 --seed 42 --out data/portfolio.jsonl.gz
+    python -m app.synthetic -n 100000 --format parquet --with-results --out data/history.parquet
+"""
+import argparse
+import gzip
+import json
+import math
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+from app.constants import DEFAULT_GRID_INTENSITY, API_MODELS, HARDWARE_DICT
+from app.models import ProjectInputs
+
+DEFAULT_SEED = 42
+PARQUET_BATCH_SIZE = 50_000
+
+# Reference date for `created_at`, fixed so that a seed always yields the same portfolio
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+OWNERS = ["Data Team", "Marketing Analytics", "Supply Chain", "Retail AI", "Finance", "Customer Care", "R&D", "Digital Factory", "HR Analytics", "E-commerce"]
+TAGS = ["rag", "customer-care", "internal", "pilot", "gdpr", "realtime", "batch", "vision", "nlp", "forecasting"]
+NAME_TOPICS = ["Forecast", "Recommender", "Chatbot", "Pricing", "Churn", "Vision QC", "Search", "Copilot", "Fraud", "Segmentation", "Translation", "Summarizer"]
+
+# Weights below are relative; unknown keys (e.g. a region missing from regions.json) are dropped
+PROJECT_TYPE_WEIGHTS = {"ml_classic": 0.35, "deep_learning": 0.25, "genai": 0.40}
+REGION_WEIGHTS = {"EU (avg)": 0.30, "France (FR)": 0.20, "USA (avg)": 0.20, "Germany (DE)": 0.10, "Sweden (SE)": 0.05, "China (CN)": 0.05, "World (avg)": 0.10}
+API_MODEL_WEIGHTS = {"GPT-3.5 Turbo / Haiku / Flash": 0.45, "GPT-4 / Opus / Ultra": 0.20, "Llama 3 70B (SaaS)": 0.10, "Mistral Large": 0.10, "Embedding (Ada v2 / Cohere)": 0.15}
+
+# Per project type: hardware mix, frequency mix and log-normal medians (median, sigma)
+PROFILES = {
+    "ml_classic": {
+        "dev_hw": {"laptop_std": 0.8, "laptop_pro": 0.2},
+        "dev_hours": (80, 0.6),
+        "train_hw": {"server_cpu": 0.85, "laptop_pro": 0.15},
+        "train_count": {1: 0.6, 2: 0.3, 4: 0.1},
+        "train_hours": (1.0, 0.8),
+        "frequency": {"One-off": 0.15, "Monthly": 0.25, "Weekly": 0.35, "Daily": 0.25},
+        "inf_hw": {"server_cpu": 1.0},
+        "inf_count": {1: 0.7, 2: 0.3},
+        "latency_ms": (50, 0.6),
+        "req_per_day": (5_000, 1.2),
+    },
+    "deep_learning": {
+        "dev_hw": {"laptop_std": 0.3, "laptop_pro": 0.7},
+        "dev_hours": (200, 0.5),
+        "train_hw": {"gpu_a100": 0.5, "gpu_t4": 0.2, "gpu_h100": 0.15, "laptop_pro": 0.15},
+        "train_count": {1: 0.3, 2: 0.2, 4: 0.3, 8: 0.2},
+        "train_hours": (12.0, 0.9),
+        "frequency": {"One-off": 0.30, "Monthly": 0.40, "Weekly": 0.25, "Daily": 0.05},
+        "inf_hw": {"gpu_t4": 0.6, "server_cpu": 0.2, "gpu_a100": 0.2},
+        "inf_count": {1: 0.6, 2: 0.3, 4: 0.1},
+        "latency_ms": (80, 0.7),
+        "req_per_day": (10_000, 1.3),
+    },
+    "genai": {
+        "dev_hw": {"laptop_std": 0.6, "laptop_pro": 0.4},
+        "dev_hours": (120, 0.6),
+        "train_hw": {"gpu_a100": 0.55, "gpu_h100": 0.35, "gpu_t4": 0.10},
+        "train_count": {1: 0.2, 2: 0.2, 4: 0.3, 8: 0.3},
+        "train_hours": (8.0, 0.8),
+        "frequency": {"One-off": 0.55, "Monthly": 0.35, "Weekly": 0.10},
+        "inf_hw": {"gpu_a100": 0.45, "gpu_h100": 0.30, "gpu_t4": 0.25},
+        "inf_count": {1: 0.5, 2: 0.3, 4: 0.2},
+        "latency_ms": (1_500, 0.5),
+        "req_per_day": (2_000, 1.3),
+    },
+}
+
+
+def _weighted(mapping: dict, allowed=None) -> tuple[list, list]:
+    keys = [k for k in mapping if allowed is None or k in allowed]
+    return keys, [mapping[k] for k in keys]
+
+
+class PortfolioGenerator:
+    """Seeded stream of project records shaped like `ProjectInputs.model_dump()`."""
+
+    def __init__(self, seed: int = DEFAULT_SEED):
+        self.rng = random.Random(seed)
+        self._types = _weighted(PROJECT_TYPE_WEIGHTS)
+        self._regions = _weighted(REGION_WEIGHTS, DEFAULT_GRID_INTENSITY) if DEFAULT_GRID_INTENSITY else (["EU (avg)"], [1.0])
+        self._api_models = _weighted(API_MODEL_WEIGHTS, API_MODELS)
+        self._profiles = {
+            p_type: {k: _weighted(v, HARDWARE_DICT if k.endswith("_hw") else None) if isinstance(v, dict) else v for k, v in profile.items()}
+            for p_type, profile in PROFILES.items()
+        }
+
+    def _pick(self, choices: tuple[list, list]):
+        return self.rng.choices(choices[0], choices[1])[0]
+
+    def _lognormal(self, median_sigma: tuple, lo: float, hi: float) -> float:
+        median, sigma = median_sigma
+        return min(hi, max(lo, self.rng.lognormvariate(math.log(median), sigma)))
+
+    def record(self, index: int) -> dict:
+        rng = self.rng
+        p_type = self._pick(self._types)
+        prof = self._profiles[p_type]
+        is_prod = rng.random() < 0.7
+        traffic_scale = 1.0 if is_prod else 0.05
+
+        region = self._pick(self._regions)
+        # Most projects train and serve in the same region
+        inf_region = region if rng.random() < 0.8 else self._pick(self._regions)
+
+        # GenAI: SaaS API (no training) or self-hosted, often with fine-tuning
+        if p_type == "genai":
+            is_api = rng.random() < 0.7
+            include_training = (not is_api) and rng.random() < 0.6
+        else:
+            is_api = False
+            include_training = rng.random() < 0.9
+
+        inf_infra = "cloud" if rng.random() < 0.6 else ("on_prem" if rng.random() < 0.6 else "cloud_serverless")
+
+        return {
+            "project_name": f"{rng.choice(NAME_TOPICS)} {index:07d}",
+            "owner": rng.choice(OWNERS),
+            "tags": ", ".join(rng.sample(TAGS, rng.choice([0, 1, 1, 2, 3]))),
+            "project_type": p_type,
+            "environment": "Production" if is_prod else "Dev/PoC",
+            "project_duration_years": float(rng.choice([1, 2, 2, 3, 3, 4, 5])) if is_prod else rng.choice([0.25, 0.5, 1.0]),
+            "created_at": (EPOCH - timedelta(seconds=rng.randrange(2 * 365 * 86400))).isoformat(timespec="seconds"),
+            "development": {
+                "infra_type": "local" if rng.random() < 0.7 else ("cloud" if rng.random() < 0.8 else "on_prem"),
+                "hardware_id": self._pick(prof["dev_hw"]),
+                "dev_hours": round(self._lognormal(prof["dev_hours"], 5, 5_000), 1),
+            },
+            "training": {
+                "include_training": include_training,
+                "region": region,
+                "infra_type": "cloud" if rng.random() < 0.7 else "on_prem",
+                "hardware_id": self._pick(prof["train_hw"]),
+                "hardware_count": self._pick(prof["train_count"]),
+                "duration_run_hours": round(self._lognormal(prof["train_hours"], 0.1, 500), 2),
+                "frequency": self._pick(prof["frequency"]),
+            },
+            "inference": {
+                "include_inference": is_prod or rng.random() < 0.5,
+                "region": inf_region,
+                "mode": "SaaS / API" if is_api else "Self-Hosted",
+                "infra_type": inf_infra,
+                "hardware_id": self._pick(prof["inf_hw"]),
+                "hardware_count": self._pick(prof["inf_count"]),
+                "server_24_7": inf_infra != "cloud_serverless" and rng.random() < 0.6,
+                "latency_ms": round(self._lognormal(prof["latency_ms"], 1, 60_000), 1),
+                "api_model": self._pick(self._api_models),
+                "req_per_day": int(self._lognormal(prof["req_per_day"], 1, 5_000_000) * traffic_scale) + 1,
+                "tokens_per_req": int(self._lognormal((1_200, 0.6), 50, 32_000)) if p_type == "genai" else 0,
+            },
+            "storage_network": {
+                "include_storage_network": rng.random() < 0.5,
+                "dataset_gb": round(self._lognormal((50, 1.2), 0.1, 100_000), 1),
+                "transfer_gb_per_day": round(self._lognormal((1.0, 1.0), 0.01, 10_000), 2),
+            },
+        }
+
+    def records(self, n: int, start: int = 0) -> Iterator[dict]:
+        for i in range(start, start + n):
+            yield self.record(i)
+
+
+def iter_project_records(n: int, seed: int = DEFAULT_SEED) -> Iterator[dict]:
+    """Yields n nested project dicts (valid `ProjectInputs` payloads)."""
+    return PortfolioGenerator(seed).records(n)
+
+
+def iter_projects(n: int, seed: int = DEFAULT_SEED) -> Iterator[ProjectInputs]:
+    """Yields n validated `ProjectInputs`."""
+    for record in iter_project_records(n, seed):
+        yield ProjectInputs.model_validate(record)
+
+
+def iter_flat_rows(n: int, seed: int = DEFAULT_SEED, with_results: bool = False, assumptions=None) -> Iterator[dict]:
+    """
+    Yields flat rows named like the `save_project` CSV columns.
+    With `with_results`, each row also carries the computed footprint and score,
+    i.e. exactly what `save_project` would have stored.
+    """
+    from app.utils import flatten_inputs, flatten_project_row
+    if with_results:
+        from app.models import Assumptions
+        from app.calculator import compute_footprint, calculate_score
+        assumptions = assumptions or Assumptions()
+    for record in iter_project_records(n, seed):
+        if not with_results:
+            yield flatten_inputs(record)
+            continue
+        inputs = ProjectInputs.model_validate(record)
+        fp = compute_footprint(inputs, assumptions)
+        row = flatten_project_row(inputs, fp, calculate_score(fp))
+        # Same naive local ISO format as save_project
+        row["timestamp"] = datetime.fromisoformat(record["created_at"]).replace(tzinfo=None).isoformat()
+        yield row
+
+
+def _open_text(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    return open(path, "w", encoding="utf-8")
+
+
+def write_jsonl(path, n: int, seed: int = DEFAULT_SEED, flat: bool = False, with_results: bool = False) -> int:
+    """Streams n records to JSONL (gzip-compressed if the path ends in .gz)."""
+    path = Path(path)
+    rows = iter_flat_rows(n, seed, with_results) if (flat or with_results) else iter_project_records(n, seed)
+    count = 0
+    with _open_text(path) as f:
+        for row in rows:
+            f.write(json.dumps(row, separators=(",", ":")))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def write_parquet(path, n: int, seed: int = DEFAULT_SEED, with_results: bool = False, batch_size: int = PARQUET_BATCH_SIZE) -> int:
+    """Streams n flat rows to Parquet in row groups of `batch_size` (requires pyarrow)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from e
+
+    writer = None
+    count = 0
+    batch = []
+    try:
+        for row in iter_flat_rows(n, seed, with_results):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                table = pa.Table.from_pylist(batch, schema=writer.schema if writer else None)
+                writer = writer or pq.ParquetWriter(str(path), table.schema, compression="zstd")
+                writer.write_table(table)
+                count += len(batch)
+                batch = []
+        if batch:
+            table = pa.Table.from_pylist(batch, schema=writer.schema if writer else None)
+            writer = writer or pq.ParquetWriter(str(path), table.schema, compression="zstd")
+            writer.write_table(table)
+            count += len(batch)
+    finally:
+        if writer:
+            writer.close()
+    return count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic EcoMetrics portfolio.")
+    parser.add_argument("-n", type=int, required=True, help="Number of projects.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--out", type=Path, required=True, help="Output path (.jsonl, .jsonl.gz or .parquet).")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default=None, help="Defaults to the output file extension.")
+    parser.add_argument("--flat", action="store_true", help="JSONL only: write flat rows named like projects.csv.")
+    parser.add_argument("--with-results", action="store_true", help="Also compute footprint and score (history rows).")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("parquet" if args.out.suffix == ".parquet" else "jsonl")
+    if fmt == "parquet":
+        count = write_parquet(args.out, args.n, args.seed, args.with_results)
+    else:
+        count = write_jsonl(args.out, args.n, args.seed, args.flat, args.with_results)
+    print(f"{count} projects written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# app/throughput.py
+"""
+Token-throughput model for self-hosted LLM serving.
+
+A device decodes `tokens_per_s(batch)` tokens per second (HARDWARE_THROUGHPUT
+curve for a reference 8B model, scaled by model size and quantization).
+Batching raises throughput until the device saturates; the device draw rises
+from `idle_watts` to its TDP `watts` with utilization, i.e. the throughput at
+this batch size relative to the saturated throughput. Busy time then follows
+from the token volume instead of `req_per_day * latency_ms`.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.constants import HARDWARE_DICT, HARDWARE_SKUS_ENV, HARDWARE_THROUGHPUT, QUANTIZATION_PROFILES, REFERENCE_MODEL_PARAMS_B
+
+FALLBACK_HARDWARE = "laptop_std"
+
+
+@dataclass(frozen=True)
+class ServingProfile:
+    tokens_per_s: float  # per device
+    utilization: float   # 0-1
+    idle_watts: float
+    active_watts: float
+
+    @property
+    def kwh_per_1k_tokens(self) -> float:
+        """Device energy per 1k tokens while busy (before PUE)."""
+        return self.active_watts / self.tokens_per_s * 1000.0 / 3.6e6
+
+
+def _entry(hardware_id: str, field: str) -> dict:
+    if hardware_id not in HARDWARE_DICT:
+        hardware_id = FALLBACK_HARDWARE
+    entry = HARDWARE_THROUGHPUT.get(hardware_id, {})
+    if field not in entry:
+        raise KeyError(f"No {field} for hardware {hardware_id!r}: add it to the SKU record ({HARDWARE_SKUS_ENV})")
+    return entry
+
+
+def has_curve(hardware_id: str) -> bool:
+    """True if the throughput model can serve on this hardware."""
+    return "tokens_per_s" in HARDWARE_THROUGHPUT.get(hardware_id if hardware_id in HARDWARE_DICT else FALLBACK_HARDWARE, {})
+
+
+def _curve(hardware_id: str) -> dict:
+    return _entry(hardware_id, "tokens_per_s")
+
+
+def idle_watts(hardware_id: str) -> float:
+    """Draw of a powered but idle device."""
+    return float(_entry(hardware_id, "idle_watts")["idle_watts"])
+
+
+def _interp_tokens_per_s(curve: dict, batch_size):
+    batches = np.log2(np.array(list(curve["tokens_per_s"]), dtype=np.float64))
+    rates = np.array(list(curve["tokens_per_s"].values()), dtype=np.float64)
+    return np.interp(np.log2(np.maximum(batch_size, 1)), batches, rates), rates.max()
+
+
+def serving_profile(hardware_id: str, batch_size: int, quantization: str = "fp16", model_params_b: float = REFERENCE_MODEL_PARAMS_B, watts: float | None = None) -> ServingProfile:
+    """Throughput and power draw of one device serving at `batch_size`."""
+    curve = _curve(hardware_id)
+    base_rate, max_rate = _interp_tokens_per_s(curve, batch_size)
+    scale = QUANTIZATION_PROFILES.get(quantization, QUANTIZATION_PROFILES["fp16"])["throughput"] * REFERENCE_MODEL_PARAMS_B / max(model_params_b, 0.1)
+    if watts is None:
+        watts = HARDWARE_DICT.get(hardware_id, HARDWARE_DICT[FALLBACK_HARDWARE])["watts"]
+    utilization = float(base_rate / max_rate)
+    idle = idle_watts(hardware_id)
+    return ServingProfile(
+        tokens_per_s=float(base_rate) * scale,
+        utilization=utilization,
+        idle_watts=idle,
+        active_watts=idle + (watts - idle) * utilization,
+    )
+
+
+def serving_arrays(hw_codes, batch_size, quant_codes, model_params_b, watts, hardware_ids: list, quantizations: list) -> tuple:
+    """
+    Vectorized `serving_profile`: (tokens_per_s, idle_watts, active_watts)
+    arrays. Codes index `hardware_ids` / `quantizations` (-1: fallback).
+    """
+    hw_codes = np.asarray(hw_codes)
+    batch_size = np.asarray(batch_size, dtype=np.float64)
+    tokens_per_s = np.empty(len(hw_codes))
+    utilization = np.empty(len(hw_codes))
+    idle = np.empty(len(hw_codes))
+    for code in np.unique(hw_codes):
+        rows = hw_codes == code
+        curve = _curve(hardware_ids[code] if code >= 0 else FALLBACK_HARDWARE)
+        rate, max_rate = _interp_tokens_per_s(curve, batch_size[rows])
+        tokens_per_s[rows] = rate
+        utilization[rows] = rate / max_rate
+        idle[rows] = idle_watts(hardware_ids[code] if code >= 0 else FALLBACK_HARDWARE)
+
+    quant_factor = np.array([QUANTIZATION_PROFILES[q]["throughput"] for q in quantizations] + [QUANTIZATION_PROFILES["fp16"]["throughput"]])
+    tokens_per_s *= quant_factor[np.asarray(quant_codes)] * REFERENCE_MODEL_PARAMS_B / np.maximum(model_params_b, 0.1)
+    return tokens_per_s, idle, idle + (watts - idle) * utilization
+
+
+def tradeoff_table(hardware_id: str, model_params_b: float = REFERENCE_MODEL_PARAMS_B, batch_sizes=(1, 4, 8, 16, 32, 64, 128)) -> list[dict]:
+    """Energy per 1k tokens for every batch size x quantization (rows for a table)."""
+    rows = []
+    for batch_size in batch_sizes:
+        row = {"batch_size": batch_size}
+        for quantization, profile in QUANTIZATION_PROFILES.items():
+            row[profile["name"]] = serving_profile(hardware_id, batch_size, quantization, model_params_b).kwh_per_1k_tokens * 1000.0  # Wh
+        rows.append(row)
+    return rows
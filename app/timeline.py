@@ -0,0 +1,142 @@
+# app/timeline.py
+"""
+Monthly emission timelines.
+
+`FootprintResult` gives lifetime totals; `annual_co2_kg` spreads them evenly.
+Here each phase total is placed in time, month by month from the project
+start (`created_at`):
+
+- development: entirely in the first month,
+- training: one share per run, runs spaced evenly by `frequency` (One-off:
+  first month),
+- inference: spread over the project life, following
+  `traffic_growth_pct_per_year` (`req_per_day` is the lifetime average, so
+  growth reshapes the curve without changing the total). Always-on fixed
+  fleets stay flat,
+- storage & network: flat.
+
+The last month of a project with a fractional duration gets a partial share.
+Every series of a portfolio is computed at once as a (projects x months)
+array on a shared calendar; each row sums to the project's phase totals.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from app.models import Assumptions
+from app.batch import FactorTables, factor_tables, encode_inputs, compute_footprint_arrays
+from app.fleet import AGGREGATED_TYPE
+from app.instrumentation import timed
+
+MONTHS_PER_YEAR = 12
+TIMELINE_PHASES = ("development", "training", "inference", "storage_network")
+PHASE_LABELS = {
+    "development": "Development",
+    "training": "Training",
+    "inference": "Inference",
+    "storage_network": "Storage & Network",
+}
+
+
+@dataclass
+class Timeline:
+    months: pd.PeriodIndex  # shared calendar
+    projects: list          # row labels
+    phases: dict            # phase -> (projects, months) kg CO2 per month
+
+    @property
+    def total(self) -> np.ndarray:
+        """(projects, months) kg CO2 per month, all phases."""
+        return sum(self.phases.values())
+
+    def portfolio(self) -> pd.DataFrame:
+        """Monthly kg CO2 of the whole portfolio, one column per phase."""
+        return pd.DataFrame({PHASE_LABELS[p]: a.sum(axis=0) for p, a in self.phases.items()}, index=self.months)
+
+    def by_project(self) -> pd.DataFrame:
+        """Monthly kg CO2 of every project (one column per project)."""
+        return pd.DataFrame(self.total.T, index=self.months, columns=self.projects)
+
+
+def start_months(df: pd.DataFrame) -> np.ndarray:
+    """Absolute month number (year * 12 + month - 1) of each project start: created_at, else the save timestamp, else now."""
+    now = pd.Timestamp.now(tz="UTC")
+    start = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns, UTC]")
+    for col in ("created_at", "timestamp"):
+        if col in df.columns:
+            start = start.fillna(pd.to_datetime(df[col], format="ISO8601", utc=True, errors="coerce"))
+    start = start.fillna(now)
+    return (start.dt.year * MONTHS_PER_YEAR + start.dt.month - 1).to_numpy(dtype=np.int64)
+
+
+def _running_share(rel: np.ndarray, months_total: np.ndarray) -> np.ndarray:
+    """Fraction of each calendar month inside the project (0 before the start and after the end)."""
+    return np.where(rel >= 0, np.clip(months_total[:, None] - rel, 0.0, 1.0), 0.0)
+
+
+@timed("timeline_arrays")
+def timeline_arrays(cols: dict, res: dict, tables: FactorTables, offsets: np.ndarray, n_months: int) -> dict:
+    """
+    Per-month kg CO2 of each phase, as (projects, n_months) arrays.
+    `cols` are encoded inputs, `res` their `compute_footprint_arrays` result and
+    `offsets` the first calendar month of each project (0 = first column).
+    """
+    years = cols["project_duration_years"]
+    months_total = years * MONTHS_PER_YEAR
+    rel = np.arange(n_months)[None, :] - offsets[:, None]  # month since the project start
+    running = _running_share(rel, months_total)
+    flat = running / months_total[:, None]
+
+    # Training: cumulative runs started by the end of each month
+    runs = tables.runs_per_year[cols["training_frequency"]]
+    n_runs = np.where(runs > 0, runs * years, 1.0)
+    started = np.where(
+        (runs > 0)[:, None],
+        np.minimum(n_runs[:, None], np.ceil((rel + 1) * runs[:, None] / MONTHS_PER_YEAR)),
+        n_runs[:, None],
+    )
+    started = np.where(rel >= 0, started, 0.0)
+    train_w = np.diff(started, axis=1, prepend=0.0) / n_runs[:, None]
+
+    # Inference: growth from the first month, normalized over the project life
+    growth = 1.0 + cols["inference_traffic_growth_pct_per_year"] / 100.0
+    serverless = cols["inference_infra_type"] == tables.infra_types.index("cloud_serverless")
+    is_api = cols["is_genai"] & cols["is_api_mode"]
+    fixed_fleet = ~is_api & cols["inference_server_24_7"] & ~serverless & ~cols["inference_capacity_model"]
+    growth = np.where(fixed_fleet, 1.0, growth)
+    shaped = running * growth[:, None] ** (np.maximum(rel, 0) / MONTHS_PER_YEAR)
+    inf_w = shaped / np.maximum(shaped.sum(axis=1, keepdims=True), 1e-300)
+
+    dev_w = (rel == 0).astype(np.float64)
+    return {
+        "development": res["co2_dev"][:, None] * dev_w,
+        "training": (res["co2_training_usage"] + res["co2_training_embodied"])[:, None] * train_w,
+        "inference": (res["co2_inference_usage"] + res["co2_inference_embodied"])[:, None] * inf_w,
+        "storage_network": res["co2_storage_network"][:, None] * flat,
+    }
+
+
+@timed("portfolio_timeline")
+def portfolio_timeline(df: pd.DataFrame, assumptions: Assumptions, tables: FactorTables | None = None) -> Timeline:
+    """
+    Monthly timeline of every project of a flat history DataFrame (one row per
+    project, e.g. the latest versions) on a shared calendar. Aggregated rows
+    are skipped: their components are already in the table.
+    """
+    tables = tables or factor_tables()
+    if "project_type" in df.columns:
+        df = df[df["project_type"] != AGGREGATED_TYPE]
+    df = df.reset_index(drop=True)
+    cols = encode_inputs(df, tables)
+    res = compute_footprint_arrays(cols, tables, assumptions)
+
+    start = start_months(df)
+    first = int(start.min()) if len(start) else 0
+    end = start + np.ceil(cols["project_duration_years"] * MONTHS_PER_YEAR).astype(np.int64)
+    n_months = int(end.max()) - first if len(end) else 0
+    phases = timeline_arrays(cols, res, tables, start - first, n_months)
+
+    months = pd.period_range(pd.Period(year=first // MONTHS_PER_YEAR, month=first % MONTHS_PER_YEAR + 1, freq="M"), periods=n_months, freq="M")
+    names = df["project_name"].astype(str).tolist() if "project_name" in df.columns else [str(i) for i in df.index]
+    return Timeline(months, names, phases)
@@ -1,31 +1,306 @@
 # app/utils.py
+import ctypes
+import hashlib
+import json
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from pydantic import BaseModel
 from datetime import datetime
-from app.models import ProjectInputs, FootprintResult
-from app.calculator import ScoreResult
+from app.models import ProjectInputs, FootprintResult, Assumptions
+from app.calculator import ScoreResult, calculate_score
+from app.constants import FACTOR_VERSION
+from app.retention import RetentionPolicy, compact_history
+from app.instrumentation import timed, incr, span
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 # Paths relative to the project root (assuming run from root)
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 PROJECTS_CSV = DATA_DIR / "projects.csv"
 
-def load_projects() -> pd.DataFrame:
-    if PROJECTS_CSV.exists():
+# Max number of queued operations applied in a single rewrite of the CSV
+MAX_WRITE_BATCH = 500
+
+class StaleProjectsError(RuntimeError):
+    """Raised when the project store changed since the version the caller loaded."""
+
+def projects_version() -> str:
+    """
+    Opaque version token of the project store. Every write replaces the file
+    atomically (new inode + mtime), so any change yields a new token.
+    """
+    try:
+        st = os.stat(PROJECTS_CSV)
+    except FileNotFoundError:
+        return "0"
+    return f"{st.st_ino}-{st.st_mtime_ns}-{st.st_size}"
+
+def _read_projects_csv() -> pd.DataFrame:
+    if PROJECTS_CSV.exists() and PROJECTS_CSV.stat().st_size > 0:
         return pd.read_csv(PROJECTS_CSV)
     return pd.DataFrame()
 
-def delete_project(project_name: str):
-    df = load_projects()
-    if not df.empty and "project_name" in df.columns:
-        df = df[df["project_name"] != project_name]
-        df.to_csv(PROJECTS_CSV, index=False)
-
-def save_project(inputs: ProjectInputs, fp: FootprintResult, score: ScoreResult):
-    df = load_projects()
-    row = inputs.model_dump()
-    
-    # Flatten nested dicts
+# --- Loaded history schema ---
+# Every input text field is categorical (one copy of each distinct string,
+# small integer codes), save times are datetimes and integers take the
+# smallest dtype holding them. Float inputs become float32 only when every
+# value round-trips exactly (inputs are re-validated and hashed); results stay
+# float64, as they are summed, aggregated and compared with recomputations.
+HISTORY_RESULT_COLUMNS = ["total_co2_kg", "total_energy_kwh", "total_water_m3", "co2_dev", "co2_training_usage", "co2_training_embodied", "co2_inference_usage", "co2_inference_embodied", "co2_storage_network", "annual_co2_kg"]
+HISTORY_EXTRA_COLUMNS = {"score_grade": str, "score_100": int, "save_count": int}
+HISTORY_DATETIME_COLUMNS = {"timestamp": False, "first_saved": False, "created_at": True}  # column -> tz-aware (UTC)
+
+def _history_schema() -> dict:
+    """Flat column -> python type of the saved inputs and scores."""
+    schema = {}
+    for name, field in ProjectInputs.model_fields.items():
+        if isinstance(field.default, BaseModel):
+            for sub_name, sub_field in type(field.default).model_fields.items():
+                schema[f"{name}_{sub_name}"] = sub_field.annotation
+        else:
+            schema[name] = field.annotation
+    schema.update(HISTORY_EXTRA_COLUMNS)
+    return schema
+
+HISTORY_SCHEMA = _history_schema()
+
+def _downcast_float(values: pd.Series) -> pd.Series:
+    as32 = values.astype("float32")
+    lossless = ((as32.astype("float64") == values) | values.isna()).all()
+    return as32 if lossless else values
+
+@timed("history_schema")
+def apply_history_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Compact typed copy of a raw history DataFrame (see HISTORY_SCHEMA)."""
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        kind = HISTORY_SCHEMA.get(col)
+        if col in HISTORY_DATETIME_COLUMNS:
+            values = pd.to_datetime(values, format="ISO8601", errors="coerce", utc=HISTORY_DATETIME_COLUMNS[col])
+        elif col in HISTORY_RESULT_COLUMNS:
+            values = pd.to_numeric(values, errors="coerce").astype("float64")
+        elif kind is str or (kind is None and values.dtype != object and pd.api.types.is_string_dtype(values.dtype) and col != "run_hash"):
+            values = values.astype("category")
+        elif kind is bool:
+            values = values if values.dtype == bool else values.astype(str).str.lower().isin(["true", "1"])
+        elif kind is float and pd.api.types.is_numeric_dtype(values.dtype):
+            values = _downcast_float(values)
+        elif kind is int and pd.api.types.is_numeric_dtype(values.dtype):
+            # Rows saved before the field existed are NaN: keep a float column then
+            if values.notna().all():
+                values = pd.to_numeric(values, downcast="integer")
+            else:
+                values = _downcast_float(values)
+        out[col] = values
+    typed = pd.DataFrame(out, index=df.index)
+    typed.attrs.update(df.attrs)
+    return typed
+
+def release_freed_memory():
+    """
+    Hands freed buffers (CSV parse, index build) back to the OS: the Arrow pool
+    behind pandas string columns and glibc keep freed memory for reuse otherwise.
+    """
+    try:
+        import pyarrow
+        pyarrow.default_memory_pool().release_unused()
+    except ImportError:
+        pass
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):  # not glibc
+        pass
+
+@timed("load_projects")
+def load_projects() -> pd.DataFrame:
+    # Readers never take the lock: writers publish with an atomic rename,
+    # so a reader sees either the previous or the next complete file.
+    version = projects_version()
+    df = apply_history_schema(_read_projects_csv())
+    release_freed_memory()
+    df.attrs["version"] = version
+    return df
+
+@contextmanager
+def _store_lock():
+    """Exclusive inter-process lock on the project store (advisory lock file)."""
+    lock_path = Path(f"{PROJECTS_CSV}.lock")
+    with open(lock_path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _atomic_write_csv(df: pd.DataFrame):
+    fd, tmp_path = tempfile.mkstemp(dir=PROJECTS_CSV.parent, prefix=f".{PROJECTS_CSV.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, PROJECTS_CSV)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class _ProjectWriter(threading.Thread):
+    """
+    Background writer owning every mutation of projects.csv.
+    Operations queued while a flush is running are applied together in the
+    next flush, i.e. one read + one atomic rewrite for the whole batch.
+    """
+
+    def __init__(self):
+        super().__init__(name="ecometrics-project-writer", daemon=True)
+        self.ops = queue.Queue()
+
+    def submit(self, kind: str, payload, expected_version: str | None = None) -> Future:
+        fut = Future()
+        self.ops.put((kind, payload, expected_version, fut))
+        return fut
+
+    def run(self):
+        while True:
+            batch = [self.ops.get()]
+            while len(batch) < MAX_WRITE_BATCH:
+                try:
+                    batch.append(self.ops.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._flush(batch)
+            except BaseException as e:
+                for *_, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    def _flush(self, batch: list):
+        with span("store_flush"), _store_lock():
+            start_version = projects_version()
+            df = before = _read_projects_csv()
+            new_rows = {}  # appended rows by run hash (rows without one: unique keys)
+            dirty = False
+            accepted = []
+            changes = []
+            for kind, payload, expected_version, fut in batch:
+                # Optimistic check: the caller's snapshot must still be current,
+                # including changes made earlier in this same batch.
+                if expected_version is not None and (expected_version != start_version or dirty):
+                    fut.set_exception(StaleProjectsError("The project list was modified by another session. Reload and try again."))
+                    continue
+                if kind == "append":
+                    run = payload.get("run_hash")
+                    if run is None:
+                        new_rows[object()] = payload
+                    else:
+                        # Identical run: one row, moved to the end (latest version)
+                        previous = [new_rows.pop(run)] if run in new_rows else []
+                        if "run_hash" in df.columns and (same := (df["run_hash"] == run).to_numpy()).any():
+                            previous = df[same].to_dict("records") + previous
+                            df = df[~same]
+                        new_rows[run] = _merge_saves(previous, payload)
+                else:
+                    if new_rows:
+                        df = pd.concat([df, pd.DataFrame(list(new_rows.values()))], ignore_index=True)
+                        new_rows = {}
+                    if kind == "delete":
+                        if not df.empty and "project_name" in df.columns:
+                            df = df[df["project_name"] != payload]
+                    elif kind == "compact":
+                        df = compact_history(df, payload)
+                dirty = True
+                accepted.append(fut)
+                changes.append((kind, payload))
+            if new_rows:
+                df = pd.concat([df, pd.DataFrame(list(new_rows.values()))], ignore_index=True)
+            if dirty:
+                _atomic_write_csv(df)
+            version = projects_version()
+            alerts = []
+            if dirty:
+                from app.budgets import on_store_write
+                alerts = on_store_write(before, start_version, version, changes)
+        if alerts:
+            from app.budgets import emit_alerts
+            emit_alerts(alerts)
+        incr("store_flushes")
+        incr("store_ops", len(accepted))
+        for fut in accepted:
+            fut.set_result(version)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def _get_writer() -> _ProjectWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = _ProjectWriter()
+            _writer.start()
+        return _writer
+
+def _write(kind: str, payload, expected_version: str | None = None) -> str:
+    """Queues a store mutation and waits for it to be durably flushed; returns the new version."""
+    return _get_writer().submit(kind, payload, expected_version).result()
+
+def delete_project(project_name: str, expected_version: str | None = None) -> str:
+    return _write("delete", project_name, expected_version)
+
+def compact_projects(policy: RetentionPolicy | None = None, expected_version: str | None = None) -> str:
+    """Folds identical runs and downsamples old versions (app/retention.py)."""
+    return _write("compact", policy or RetentionPolicy(), expected_version)
+
+def _save_count(row: dict) -> int:
+    count = row.get("save_count")
+    return 1 if count is None or pd.isna(count) else int(count)
+
+def _first_saved(row: dict):
+    first = row.get("first_saved")
+    return row.get("timestamp") if first is None or pd.isna(first) else first
+
+def _merge_saves(previous: list, row: dict) -> dict:
+    """Row of a run saved again: the new row, with the summed save count and the first save time."""
+    if not previous:
+        return row
+    merged = dict(row)
+    merged["save_count"] = sum(_save_count(r) for r in previous) + _save_count(row)
+    merged["first_saved"] = min(str(_first_saved(r)) for r in previous + [row])
+    return merged
+
+def run_hash(inputs: ProjectInputs, assumptions: Assumptions | None = None) -> str:
+    """Content address of a run: inputs (without created_at), assumptions and factor version."""
+    payload = {
+        "inputs": inputs.model_dump(exclude={"created_at"}),
+        "assumptions": (assumptions or Assumptions()).model_dump(),
+        "factors": FACTOR_VERSION,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def flatten_inputs(row: dict) -> dict:
+    """Flattens a `ProjectInputs.model_dump()` dict (nested sections become `section_field`)."""
     flat_row = {}
     for k, v in row.items():
         if isinstance(v, dict):
@@ -33,13 +308,84 @@ def save_project(inputs: ProjectInputs, fp: FootprintResult, score: ScoreResult)
                 flat_row[f"{k}_{sub_k}"] = sub_v
         else:
             flat_row[k] = v
-            
-    flat_row.update({"total_co2_kg": fp.total_co2_kg, "total_water_m3": fp.total_water_m3, "score_grade": score.grade, "score_100": score.score_100, "timestamp": datetime.now().isoformat()})
-    
-    df = pd.concat([df, pd.DataFrame([flat_row])], ignore_index=True)
-    df.to_csv(PROJECTS_CSV, index=False)
-
-def save_custom_row(row_data: dict):
-    df = load_projects()
-    df = pd.concat([df, pd.DataFrame([row_data])], ignore_index=True)
-    df.to_csv(PROJECTS_CSV, index=False)
\ No newline at end of file
+    return flat_row
+
+def unflatten_inputs(flat_row: dict) -> dict:
+    """Inverse of `flatten_inputs` for a stored row: `ProjectInputs` fields only, missing values left to their defaults."""
+    def value(key):
+        v = flat_row.get(key)
+        if v is None or (not isinstance(v, str) and pd.isna(v)):
+            return None
+        return v.isoformat() if isinstance(v, pd.Timestamp) else (v.item() if hasattr(v, "item") else v)
+
+    row = {}
+    for name, field in ProjectInputs.model_fields.items():
+        if isinstance(field.default, BaseModel):
+            section = {sub: value(f"{name}_{sub}") for sub in type(field.default).model_fields}
+            row[name] = {k: v for k, v in section.items() if v is not None}
+        elif value(name) is not None:
+            row[name] = value(name)
+    return row
+
+def flatten_project_row(inputs: ProjectInputs, fp: FootprintResult, score: ScoreResult, assumptions: Assumptions | None = None) -> dict:
+    """Builds the flat CSV row stored for a project."""
+    flat_row = flatten_inputs(inputs.model_dump())
+    timestamp = datetime.now().isoformat()
+    flat_row.update({"total_co2_kg": fp.total_co2_kg, "total_water_m3": fp.total_water_m3, "annual_co2_kg": fp.annual_co2_kg, "score_grade": score.grade, "score_100": score.score_100, "timestamp": timestamp})
+    flat_row.update({"run_hash": run_hash(inputs, assumptions), "save_count": 1, "first_saved": timestamp})
+    return flat_row
+
+@timed("save_project")
+def save_project(inputs: ProjectInputs, fp: FootprintResult, score: ScoreResult, assumptions: Assumptions | None = None) -> str:
+    """Saves a run; saving an identical run again only updates its row (see app/retention.py)."""
+    flat_row = flatten_project_row(inputs, fp, score, assumptions)
+    version = _write("append", flat_row)
+    incr("projects_saved")
+    return version
+
+def save_custom_row(row_data: dict, expected_version: str | None = None) -> str:
+    return _write("append", row_data, expected_version)
+
+# Result columns summed when combining projects into a complex one
+AGGREGATE_COLUMNS = ['total_co2_kg', 'total_energy_kwh', 'total_water_m3', 'co2_dev', 'co2_training_usage', 'co2_training_embodied', 'co2_inference_usage', 'co2_inference_embodied', 'co2_storage_network', 'annual_co2_kg']
+
+_DEFAULT_YEARS = ProjectInputs.model_fields["project_duration_years"].default
+
+def annual_co2(df: pd.DataFrame) -> np.ndarray:
+    """
+    Annual CO₂ (kg/year) of saved rows: the stored `annual_co2_kg`, else
+    `total_co2_kg / project_duration_years` as in the calculator. A stored 0
+    with a non-zero total (complex projects combined from parts that did not
+    store it) is ignored.
+    """
+    nan = pd.Series(np.nan, index=df.index)
+    total = pd.to_numeric(df.get("total_co2_kg", nan), errors="coerce").astype(np.float64)
+    years = pd.to_numeric(df.get("project_duration_years", nan), errors="coerce").astype(np.float64).fillna(_DEFAULT_YEARS)
+    annual = total / np.maximum(0.1, years)
+    if "annual_co2_kg" in df.columns:
+        stored = pd.to_numeric(df["annual_co2_kg"], errors="coerce").astype(np.float64)
+        annual = stored.where(stored.notna() & ((stored != 0) | (total.fillna(0.0) == 0)), annual)
+    return annual.fillna(0.0).to_numpy(dtype=np.float64)
+
+def aggregate_projects(df: pd.DataFrame, project_names, new_name: str) -> dict:
+    """Sums the saved results of several projects into a single 'complex project' row."""
+    # Filter and Sum
+    sub_df = df[df["project_name"].isin(project_names)]
+    # Ensure columns exist (fill 0 if missing)
+    sub_df = sub_df.reindex(columns=sub_df.columns.union(AGGREGATE_COLUMNS, sort=False))
+    aggregated = sub_df[AGGREGATE_COLUMNS].sum()
+    aggregated["annual_co2_kg"] = annual_co2(sub_df).sum()  # parts saved without it: total / duration
+
+    # Recalculate Score
+    # We create a dummy FootprintResult with summed values
+    fp_agg = FootprintResult(**aggregated.to_dict())
+    score_agg = calculate_score(fp_agg)
+
+    new_row = aggregated.to_dict()
+    new_row["project_name"] = new_name
+    new_row["project_type"] = "Complex / Aggregated"
+    new_row["environment"] = "Mixed"
+    new_row["score_grade"] = score_agg.grade
+    new_row["score_100"] = score_agg.score_100
+    new_row["timestamp"] = datetime.now().isoformat()
+    return new_row
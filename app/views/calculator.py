@@ -0,0 +1,527 @@
+# app/views/calculator.py
+"""Calculator page: project inputs, footprint, what-if levers, comparison matrix and report."""
+import streamlit as st
+import pandas as pd
+from pydantic import ValidationError
+
+from app.models import ProjectInputs
+from app.calculator import calculate_score, simulate_what_if, IncrementalFootprint
+from app.utils import save_project
+from app.hardware import get_catalog
+from app.charts import build_waterfall_figure, build_simulator_figure
+from app.instrumentation import span, incr
+
+from app.constants import PROJECT_TYPES, INFRASTRUCTURE_PROFILES, DEFAULT_GRID_INTENSITY, API_MODELS, TRAFFIC_PROFILES, AUTOSCALING_POLICIES, QUANTIZATION_PROFILES
+from app.capacity import plan_capacity
+from app.throughput import has_curve, serving_profile, tradeoff_table
+
+# def pour les kpis
+def kpi_card(title: str, value: str, subtitle: str = "", badge: str = ""):
+    st.markdown(f"""
+    <div class="kpi-card">
+      <div class="kpi-title">{title} {"<span class='badge'>"+badge+"</span>" if badge else ""}</div>
+      <div class="kpi-value">{value}</div>
+      <div class="kpi-sub">{subtitle}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+def update_input(section, key, widget_key):
+    val = st.session_state[widget_key]
+    if section:
+        st.session_state["inputs"][section][key] = val
+    else:
+        st.session_state["inputs"][key] = val
+
+# Above this many eligible models, a search box narrows the hardware selectbox
+HARDWARE_SEARCH_THRESHOLD = 200
+
+def hardware_selectbox(label, ids, section, widget_key, help):
+    catalog = get_catalog()
+    current = st.session_state["inputs"][section]["hardware_id"]
+    options = list(ids)
+    if len(ids) > HARDWARE_SEARCH_THRESHOLD:
+        query = st.text_input(f"Search {label}", key=f"{widget_key}_query", placeholder=f"{len(ids):,} models — type to filter")
+        options = catalog.search(query, ids, limit=HARDWARE_SEARCH_THRESHOLD)
+        # Keep the current choice selectable while searching
+        if current not in options and current in catalog.by_id:
+            options.insert(0, current)
+    index = options.index(current) if current in options else 0
+    st.selectbox(label, options, format_func=catalog.name, index=index, key=widget_key, on_change=update_input, args=(section, "hardware_id", widget_key), help=help)
+# --- Calculator fragments ---
+# Slider moves only rerun the simulator fragment (simulate_what_if + fig_sim),
+# not the inputs, validation, compute_footprint and the rest of the dashboard.
+WHAT_IF_DEFAULTS = {"wi_token": 5, "wi_traffic": 5, "wi_region": 5, "wi_pue": 5, "wi_train_freq": 0}
+WHAT_IF_LEVER_ARGS = {
+    "wi_token": "token_reduction_pct",
+    "wi_traffic": "traffic_reduction_pct",
+    "wi_region": "region_gain_pct",
+    "wi_pue": "pue_improvement_pct",
+    "wi_train_freq": "training_freq_reduction_pct",
+}
+
+def current_levers():
+    """simulate_what_if lever arguments: the levers applied from the browser simulator, else the sliders."""
+    if st.session_state.get("wi_client_side") and st.session_state.get("wi_client"):
+        return dict(st.session_state["wi_client"])
+    return {arg: st.session_state.get(k, WHAT_IF_DEFAULTS[k]) for k, arg in WHAT_IF_LEVER_ARGS.items()}
+
+def current_what_if(res):
+    """What-if result for the lever values currently held in session state."""
+    return simulate_what_if(res, **current_levers())
+
+@st.fragment
+def render_what_if_simulator(res, project_years):
+    st.subheader("🎛️ CO₂ Optimization Levers (What-If Simulator)")
+    st.caption(
+        "Explore how realistic operational decisions can reduce the carbon footprint. "
+        "Sliders allow up to 100% for exploration, but recommended realistic ranges are indicated."
+    )
+
+    # Browser mode: the levers are evaluated client-side from precomputed
+    # coefficients, so slider moves don't reach the server at all.
+    if st.toggle("Evaluate in browser", key="wi_client_side", help="Moves the sliders without server round-trips. Use the button below the chart to apply the levers to the PDF report."):
+        from app.what_if_component import what_if_component
+        what_if_component(res, project_years, current_levers(), key="wi_client")
+        return
+
+    # Lever ranges and guidance are mirrored by LEVERS in app/frontend/what_if/index.html
+    c1, c2, c3 = st.columns(3)
+
+    # --------------------
+    # COLUMN 1 — USAGE
+    # --------------------
+    with c1:
+        token_reduction = st.slider(
+            "Reduce tokens per request (%)",
+            0, 100, 5, 5,
+            help="Typical realistic range: 10–40%. "
+                "Achieved via prompt compression, RAG, output limits.",
+            key="wi_token"
+        )
+        if token_reduction > 40 and token_reduction != 100:
+            st.warning("⚠️ Above 40% usually requires product redesign or strong constraints.")
+        if token_reduction == 100:
+            st.error(
+                "❌ **100% token reduction is impossible** — "
+                "it would mean no prompt and no model output. "
+                "This scenario cannot exist in a real project."
+            )
+
+        traffic_reduction = st.slider(
+            "Reduce daily traffic (%)",
+            0, 100, 5, 5,
+            help="Typical realistic range: 5–30%. "
+                "Achieved via caching, UX optimization, rate limiting.",
+            key="wi_traffic"
+        )
+        if traffic_reduction > 30:
+            st.warning("⚠️ Large traffic reduction may impact business usage or adoption.")
+
+    # --------------------
+    # COLUMN 2 — INFRA
+    # --------------------
+    with c2:
+        region_gain = st.slider(
+            "Cleaner energy region benefit (%)",
+            0, 100, 5, 5,
+            help="Typical realistic range: 20–60%. "
+                "Represents moving workloads to lower-carbon electricity regions.",
+            key="wi_region"
+        )
+        if region_gain > 60:
+            st.warning("⚠️ Above 60% assumes best-in-class low-carbon regions only.")
+
+        pue_improvement = st.slider(
+            "Datacenter efficiency improvement (PUE) (%)",
+            0, 100, 5, 5,
+            help="Typical realistic range: 5–25%. "
+                "Achieved via better cloud providers or more efficient facilities.",
+            key="wi_pue"
+        )
+        if pue_improvement > 25:
+            st.warning("⚠️ High PUE gains are rarely achievable without infrastructure change.")
+
+    # --------------------
+    # COLUMN 3 — TRAINING
+    # --------------------
+    with c3:
+        training_freq_reduction = st.slider(
+            "Reduce training frequency (%)",
+            0, 100, 0, 10,
+            help="Typical realistic range: 0–50%. "
+                "Achieved by retraining only when data or performance drifts.",
+            key="wi_train_freq"
+        )
+        if training_freq_reduction > 50:
+            st.warning("⚠️ Strong reduction may affect model accuracy or freshness.")
+
+
+    # --- WHAT-IF SIMULATION (Calculator layer) ---
+    what_if = simulate_what_if(
+        res,
+        token_reduction_pct=token_reduction,
+        traffic_reduction_pct=traffic_reduction,
+        region_gain_pct=region_gain,
+        pue_improvement_pct=pue_improvement,
+        training_freq_reduction_pct=training_freq_reduction,
+    )
+    fig_sim = build_simulator_figure(res, what_if, project_years)
+    st.plotly_chart(fig_sim, width="stretch")
+
+# Hardware columns charted in the comparison matrix (all models are evaluated)
+MATRIX_MAX_HARDWARE = 24
+
+@st.fragment
+def render_comparison_matrix(inputs_obj, assumptions):
+    st.subheader("🗺️ Where & On What Should It Run?")
+    if not st.toggle("Compare every region × hardware × infrastructure", key="matrix_on", help="Evaluates this project in all regions, on every eligible hardware and infrastructure at once. Development keeps its own infrastructure and hardware."):
+        return
+    from app.matrix import comparison_matrix
+    from app.charts import build_matrix_figure
+    catalog = get_catalog()
+    with span("comparison_matrix_view"):
+        hardware_ids = catalog.eligible("inference", inputs_obj.project_type)
+        i_in = inputs_obj.inference
+        if inputs_obj.project_type == "genai" and i_in.include_inference and i_in.mode != "SaaS / API" and i_in.throughput_model:
+            # The throughput model cannot be evaluated on hardware without a tokens/s curve
+            skipped = [hw for hw in hardware_ids if not has_curve(hw)]
+            if skipped:
+                hardware_ids = [hw for hw in hardware_ids if has_curve(hw)]
+                names = ", ".join(catalog.name(hw) for hw in skipped[:10]) + (f" and {len(skipped) - 10:,} more" if len(skipped) > 10 else "")
+                st.caption(f"Skipped (no throughput curve): {names}.")
+        matrix = comparison_matrix(inputs_obj, assumptions, hardware_ids=hardware_ids)
+        # Large catalogs: chart the lowest-footprint hardware plus the current choices
+        shown = matrix
+        if matrix["hardware_id"].nunique() > MATRIX_MAX_HARDWARE:
+            best_hw = matrix.groupby("hardware_id", observed=True)["total_co2_kg"].min().nsmallest(MATRIX_MAX_HARDWARE).index
+            keep = set(best_hw) | {inputs_obj.training.hardware_id, inputs_obj.inference.hardware_id}
+            shown = matrix[matrix["hardware_id"].isin(keep)]
+            st.caption(f"Showing the {len(keep)} lowest-footprint / current models out of {matrix['hardware_id'].nunique():,} evaluated.")
+        fig_matrix = build_matrix_figure(
+            shown,
+            hardware_names=catalog.names,
+            infra_names={k: v["name"] for k, v in INFRASTRUCTURE_PROFILES.items()},
+        )
+        st.plotly_chart(fig_matrix, width="stretch")
+    best = matrix.loc[matrix["total_co2_kg"].idxmin()]
+    st.caption(
+        f"Lowest footprint: **{best['region']}** · {catalog.name(best['hardware_id'])} · "
+        f"{INFRASTRUCTURE_PROFILES[best['infra_type']]['name']} — {best['total_co2_kg']:,.0f} kg CO₂ (grade {best['score_grade']})."
+    )
+
+@st.fragment
+def render_report_actions(inputs_obj, res, score, fig_wf, assumptions):
+    action_col1, action_col2 = st.columns(2)
+    
+    with action_col1:
+        if st.button("💾 Save Project Result"):
+            save_project(inputs_obj, res, score, assumptions)
+            st.success("Project saved to CSV!")
+
+    with action_col2:
+        # The PDF (and its kaleido chart export) is only built on demand
+        report_key = (inputs_obj.model_dump_json(), tuple(current_levers().items()))
+        cached = st.session_state.get("pdf_report")
+        if cached is None or cached[0] != report_key:
+            if st.button("📄 Prepare PDF Report"):
+                try:
+                    # fpdf (and kaleido, for the charts) are only loaded for the report
+                    from app.report import create_robust_pdf
+                    with st.spinner("Generating report..."):
+                        fig_sim = build_simulator_figure(res, current_what_if(res), inputs_obj.project_duration_years)
+                        pdf_bytes = create_robust_pdf(inputs_obj, res, score, fig_wf, fig_sim)
+                    incr("pdf_reports")
+                    st.session_state["pdf_report"] = (report_key, pdf_bytes)
+                    cached = st.session_state["pdf_report"]
+                except Exception as e:
+                    st.error(f"Cannot generate PDF: {e}")
+                    st.info("Check if 'kaleido' is installed: pip install kaleido")
+        if cached is not None and cached[0] == report_key:
+            st.download_button(
+                label="📄 Export Report as PDF",
+                data=cached[1],
+                file_name=f"EcoMetrics_{inputs_obj.project_name.replace(' ', '_')}.pdf",
+                mime="application/pdf",
+                on_click="ignore"
+            )
+
+def render(assumptions):
+    if "footprint" not in st.session_state:
+        # Per-session phase cache: a widget change only recomputes the phase it belongs to
+        st.session_state["footprint"] = IncrementalFootprint()
+    inputs_data = st.session_state["inputs"]
+
+    st.markdown(
+        "<h1 style='text-align:center;'>AI Project Footprint Calculator</h1>",
+        unsafe_allow_html=True
+    )
+
+
+ # --- STEP 1: GLOBAL PROFILE ---
+    st.subheader("1. Global Profile")
+    st.caption(
+        "This section defines the overall context of the project (type, environment and expected duration). "
+        "These selections allow the tool to automatically adjust calculation logic and assumptions, "
+        "ensuring consistent and comparable environmental assessments across projects."
+    )
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        st.text_input("Project Name", value=inputs_data["project_name"], key="p_name", on_change=update_input, args=(None, "project_name", "p_name"), help="A unique name to identify this simulation.")
+        st.selectbox("Project Environment", ["Dev/PoC", "Production"], index=0 if inputs_data["environment"] == "Dev/PoC" else 1, key="p_env", on_change=update_input, args=(None, "environment", "p_env"), help="Categorizes the project context. 'Dev/PoC' implies short-term experiments, while 'Production' implies long-term deployment.")
+    with c2:
+        # Project Type Selection
+        p_types = list(PROJECT_TYPES.keys())
+        p_labels = [PROJECT_TYPES[k] for k in p_types]
+        curr_type = inputs_data["project_type"]
+        idx = p_types.index(curr_type) if curr_type in p_types else 2
+        
+        def update_type():
+            st.session_state["inputs"]["project_type"] = st.session_state["p_type_sel"]
+            
+        st.selectbox("Project Type", p_types, format_func=lambda x: PROJECT_TYPES[x], index=idx, key="p_type_sel", on_change=update_type, help="Select the archetype that best fits your project:\n- **Classic ML**: Low compute, often CPU-based (e.g., XGBoost).\n- **Deep Learning**: High compute, GPU-based training (e.g., ResNet, BERT).\n- **GenAI**: Large Language Models, either via API or self-hosted.")
+        st.text_input("Owner", value=inputs_data["owner"], key="p_owner", on_change=update_input, args=(None, "owner", "p_owner"), help="Team or person responsible for the project. Used to search and group saved projects.")
+        
+    with c3:
+        st.number_input("Project Duration (years)", value=float(inputs_data["project_duration_years"]), min_value=0.1, step=0.5, key="p_duration", on_change=update_input, args=(None, "project_duration_years", "p_duration"), help="How long will this project run? This is crucial to calculate the share of hardware manufacturing (amortization) attributed to this project.")
+        st.text_input("Tags", value=inputs_data["tags"], key="p_tags", on_change=update_input, args=(None, "tags", "p_tags"), help="Optional comma-separated keywords (e.g. 'rag, customer-care') to find this project later.")
+    
+
+    # --- STEP 2: DEVELOPMENT & TRAINING ---
+    st.subheader("2. Development & Training (MLOps)")
+    st.caption(
+        "This section captures the resources used during the development and training phases. "
+        "It covers exploratory work, model training and retraining activities. "
+        "The information provided here is used to estimate both operational emissions and the "
+        "allocated share of hardware manufacturing impact over the project lifecycle."
+    )
+
+    # Development Phase
+    st.markdown("**🛠️ Development Phase (Exploration)**")
+    d1, d2, d3 = st.columns(3)
+    with d1:
+        st.selectbox("Dev Infrastructure", list(INFRASTRUCTURE_PROFILES.keys()), format_func=lambda x: INFRASTRUCTURE_PROFILES[x]["name"], index=list(INFRASTRUCTURE_PROFILES.keys()).index(inputs_data["development"]["infra_type"]), key="d_infra", on_change=update_input, args=("development", "infra_type", "d_infra"), help="The environment where development takes place. Affects energy efficiency (PUE). 'Local' = 1.0, 'Cloud' = 1.2.")
+    with d2:
+        # Filter hardware for Dev (mostly laptops/CPU)
+        hardware_selectbox("Dev Hardware", get_catalog().eligible("dev", inputs_data["project_type"]), "development", "d_hw", "The primary hardware used by data scientists. Laptops have high embodied carbon relative to their energy usage.")
+    with d3:
+        st.number_input("Dev Hours (Coding/Testing)", value=float(inputs_data["development"]["dev_hours"]), min_value=0.0, step=10.0, key="d_hours", on_change=update_input, args=("development", "dev_hours", "d_hours"), help="Total estimated hours spent by the team on exploration, coding, and debugging.")
+    
+    # --- PIVOT QUESTION (Training Phase Visibility) ---
+    st.markdown("---")
+    
+    def update_training_visibility():
+        val = st.session_state["train_vis_radio"]
+        if val == "Yes":
+            st.session_state["inputs"]["training"]["include_training"] = True
+            # GenAI Constraint: Training implies Self-Hosted Inference
+            if st.session_state["inputs"]["project_type"] == "genai":
+                st.session_state["inputs"]["inference"]["mode"] = "Self-Hosted"
+        else:
+            st.session_state["inputs"]["training"]["include_training"] = False
+
+    st.radio(
+        "Do you have a Training or Fine-tuning phase?", 
+        ["Yes", "No (Inference Only)"], 
+        index=0 if inputs_data["training"]["include_training"] else 1, 
+        horizontal=True,
+        key="train_vis_radio",
+        on_change=update_training_visibility
+    )
+
+    # Training (Conditional)
+    if inputs_data["training"]["include_training"]:
+        st.markdown("**🏋️ Training Phase (Runs)**")
+        t_c1, t_c2, t_c3, t_c4 = st.columns(4)
+        
+        with t_c1:
+            st.selectbox("Training Region", list(DEFAULT_GRID_INTENSITY.keys()), index=list(DEFAULT_GRID_INTENSITY.keys()).index(inputs_data["training"]["region"]), key="t_reg", on_change=update_input, args=("training", "region", "t_reg"), help="The geographical location of the datacenter. This determines the carbon intensity of the electricity (gCO2e/kWh).")
+            st.selectbox("Training Infra", list(INFRASTRUCTURE_PROFILES.keys()), format_func=lambda x: INFRASTRUCTURE_PROFILES[x]["name"], index=list(INFRASTRUCTURE_PROFILES.keys()).index(inputs_data["training"]["infra_type"]), key="t_infra", on_change=update_input, args=("training", "infra_type", "t_infra"), help="The facility type. Cloud datacenters are typically more energy-efficient (lower PUE) than average on-premise server rooms.")
+        with t_c2:
+            # Hardware filtered by project type
+            hardware_selectbox("Training Hardware", get_catalog().eligible("training", inputs_data["project_type"]), "training", "t_hw", "The GPU/TPU model used. High-end GPUs (e.g., A100) consume more power and have a higher manufacturing footprint.")
+            st.number_input("Device Count", value=int(inputs_data["training"]["hardware_count"]), min_value=1, key="t_count", on_change=update_input, args=("training", "hardware_count", "t_count"), help="Number of GPUs running in parallel during a training session.")
+        with t_c3:
+            st.number_input("Duration per Run (hours)", value=float(inputs_data["training"]["duration_run_hours"]), min_value=0.0, key="t_dur", on_change=update_input, args=("training", "duration_run_hours", "t_dur"), help="Time taken to complete one full training run (in hours).")
+        with t_c4:
+            st.selectbox("Frequency", ["One-off", "Weekly", "Monthly", "Daily"], index=["One-off", "Weekly", "Monthly", "Daily"].index(inputs_data["training"]["frequency"]), key="t_freq", on_change=update_input, args=("training", "frequency", "t_freq"), help="How often is the model retrained? This multiplies the training impact over the project duration.")
+
+    # --- STEP 3: INFERENCE ---
+    st.subheader("3. Inference / Production")
+
+    st.caption(
+        "This section describes how the model is used in production. "
+        "Depending on the deployment strategy (API-based or self-hosted), the tool applies different "
+        "calculation approaches to estimate usage-related energy consumption and emissions. "
+        "This phase often represents the main long-term environmental impact of the project."
+    )
+
+    # Logic: GenAI can be SaaS or Self-Hosted. ML/DL is always Compute (Self-Hosted logic).
+    is_genai = inputs_data["project_type"] == "genai"
+    
+    if is_genai:
+        # Lock to Self-Hosted if Training is active
+        is_locked = inputs_data["training"]["include_training"]
+        st.radio(
+            "Inference Mode", 
+            ["SaaS / API", "Self-Hosted"], 
+            index=0 if inputs_data["inference"]["mode"] == "SaaS / API" else 1, 
+            key="inf_mode", 
+            on_change=update_input, 
+            args=("inference", "mode", "inf_mode"), 
+            disabled=is_locked,
+            help="**SaaS/API**: Emissions calculated based on token volume (Black-box).\n**Self-Hosted**: Emissions calculated based on hardware power and active time (White-box)."
+        )
+        if is_locked:
+            st.caption("🔒 Inference is set to **Self-Hosted** because a training phase is included.")
+
+    if is_genai and inputs_data["inference"]["mode"] == "SaaS / API":
+        # SaaS Flow
+        i_c1, i_c2 = st.columns(2)
+        with i_c1:
+            curr_model = inputs_data["inference"]["api_model"]
+            # Safe index
+            try: idx_mod = list(API_MODELS.keys()).index(curr_model)
+            except ValueError: idx_mod = 0
+            st.selectbox("GenAI Model", list(API_MODELS.keys()), index=idx_mod, key="inf_model", on_change=update_input, args=("inference", "api_model", "inf_model"), help="The specific model used. Larger models (e.g., GPT-4) require more energy per token than smaller ones (e.g., Haiku).")
+            st.number_input("Requests per Day", value=int(inputs_data["inference"]["req_per_day"]), min_value=1, key="inf_reqs", on_change=update_input, args=("inference", "req_per_day", "inf_reqs"), help="Average number of API calls per day.")
+        with i_c2:
+            st.number_input("Avg Tokens per Request", value=int(inputs_data["inference"]["tokens_per_req"]), key="inf_tokens", on_change=update_input, args=("inference", "tokens_per_req", "inf_tokens"), help="Sum of Input (Prompt) and Output (Completion) tokens. 1k tokens ≈ 750 words.")
+            st.number_input("Traffic Growth (%/year)", value=float(inputs_data["inference"]["traffic_growth_pct_per_year"]), min_value=-99.0, step=5.0, key="inf_growth", on_change=update_input, args=("inference", "traffic_growth_pct_per_year", "inf_growth"), help="Yearly growth of the request volume, used by the monthly emissions timeline (Projects page). 'Requests per Day' is the average over the project life, so totals are unchanged.")
+    else:
+        # Compute Flow (ML/DL or Self-Hosted GenAI)
+        i_c1, i_c2, i_c3 = st.columns(3)
+        
+        with i_c1:
+            st.selectbox("Inference Region", list(DEFAULT_GRID_INTENSITY.keys()), index=list(DEFAULT_GRID_INTENSITY.keys()).index(inputs_data["inference"]["region"]), key="inf_reg", on_change=update_input, args=("inference", "region", "inf_reg"), help="Location of the production servers. Choosing a low-carbon region (e.g., France, Sweden) is the most effective way to reduce usage emissions.")
+            st.selectbox("Inference Infra", list(INFRASTRUCTURE_PROFILES.keys()), format_func=lambda x: INFRASTRUCTURE_PROFILES[x]["name"], index=list(INFRASTRUCTURE_PROFILES.keys()).index(inputs_data["inference"]["infra_type"]), key="inf_infra", on_change=update_input, args=("inference", "infra_type", "inf_infra"), help="Facility efficiency for production.")
+        with i_c2:
+            hardware_selectbox("Inference Hardware", get_catalog().eligible("inference", inputs_data["project_type"]), "inference", "inf_hw", "The hardware used to serve requests.")
+            st.number_input("Device Count", value=int(inputs_data["inference"]["hardware_count"]), min_value=1, key="inf_cnt", on_change=update_input, args=("inference", "hardware_count", "inf_cnt"), help="Number of GPUs/Servers provisioned for inference.")
+        with i_c3:
+            st.number_input("Requests per Day", value=int(inputs_data["inference"]["req_per_day"]), min_value=1, key="inf_reqs", on_change=update_input, args=("inference", "req_per_day", "inf_reqs"), help="Daily traffic volume.")
+            # Default latency based on type
+            default_lat = 100.0 if inputs_data["project_type"] != "genai" else 2000.0
+            st.number_input("Avg Latency (ms)", value=float(inputs_data["inference"]["latency_ms"]), min_value=1.0, step=10.0, key="inf_lat", on_change=update_input, args=("inference", "latency_ms", "inf_lat"), help="Average time to process one request. Used to calculate the total 'Active Compute Time' per year.")
+            st.number_input("Traffic Growth (%/year)", value=float(inputs_data["inference"]["traffic_growth_pct_per_year"]), min_value=-99.0, step=5.0, key="inf_growth", on_change=update_input, args=("inference", "traffic_growth_pct_per_year", "inf_growth"), help="Yearly growth of the request volume, used by the monthly emissions timeline (Projects page). 'Requests per Day' is the average over the project life, so totals are unchanged.")
+
+        # Capacity model: size replicas for traffic peaks and a latency SLO
+        inf_data = inputs_data["inference"]
+        if st.checkbox("Size replicas for a latency SLO (capacity model)", value=inf_data["capacity_model"], key="inf_cap", on_change=update_input, args=("inference", "capacity_model", "inf_cap"), help="Replaces the declared always-on / active time with the replica-hours needed to serve the traffic profile within the p99 latency target (M/M/c queue). 'Device Count' then becomes the number of devices per replica."):
+            c_c1, c_c2, c_c3, c_c4 = st.columns(4)
+            with c_c1:
+                st.selectbox("Traffic Profile", list(TRAFFIC_PROFILES.keys()), format_func=lambda x: TRAFFIC_PROFILES[x]["name"], index=list(TRAFFIC_PROFILES.keys()).index(inf_data["traffic_profile"]), key="inf_profile", on_change=update_input, args=("inference", "traffic_profile", "inf_profile"), help="How the daily requests are spread over the hours of the day.")
+            with c_c2:
+                st.number_input("Peak Factor", value=float(inf_data["peak_factor"]), min_value=1.0, step=0.1, key="inf_peak", on_change=update_input, args=("inference", "peak_factor", "inf_peak"), help="Burst rate relative to the hourly average. Replicas are sized for the burst rate.")
+            with c_c3:
+                st.number_input("p99 Latency Target (ms)", value=float(inf_data["p99_latency_ms"]), min_value=1.0, step=50.0, key="inf_p99", on_change=update_input, args=("inference", "p99_latency_ms", "inf_p99"), help="99% of the requests must wait less than this target minus the average latency before being served.")
+            with c_c4:
+                st.selectbox("Autoscaling", list(AUTOSCALING_POLICIES.keys()), format_func=lambda x: AUTOSCALING_POLICIES[x], index=list(AUTOSCALING_POLICIES.keys()).index(inf_data["autoscaling"]), key="inf_autoscaling", on_change=update_input, args=("inference", "autoscaling", "inf_autoscaling"), help="Fixed: the peak-hour fleet runs all day. Hourly: replicas follow the traffic, keeping at least one. Scale-to-zero: no replica in hours without traffic.")
+            plan = plan_capacity(inf_data["req_per_day"], inf_data["latency_ms"], inf_data["peak_factor"], inf_data["p99_latency_ms"], inf_data["traffic_profile"], inf_data["autoscaling"])
+            st.caption(f"Peak: **{plan.peak_replicas} replica(s)** · {plan.replica_hours_per_year:,.0f} replica-hours/year · average utilization {plan.utilization:.1%}")
+
+        # Throughput model: self-hosted LLM serving (tokens/s vs batch size)
+        if is_genai and st.checkbox("Token-throughput model (LLM serving)", value=inf_data["throughput_model"], key="inf_tput", on_change=update_input, args=("inference", "throughput_model", "inf_tput"), help="Derives busy time from the token volume and the tokens/s of the hardware at this batch size, with a power draw that depends on utilization instead of the flat TDP. 'Avg Latency' is then ignored for energy."):
+            tp_c1, tp_c2, tp_c3, tp_c4 = st.columns(4)
+            with tp_c1:
+                st.number_input("Avg Tokens per Request", value=int(inf_data["tokens_per_req"]), min_value=1, key="inf_tokens_sh", on_change=update_input, args=("inference", "tokens_per_req", "inf_tokens_sh"), help="Sum of Input (Prompt) and Output (Completion) tokens.")
+            with tp_c2:
+                st.number_input("Batch Size", value=int(inf_data["batch_size"]), min_value=1, step=1, key="inf_batch", on_change=update_input, args=("inference", "batch_size", "inf_batch"), help="Concurrent sequences decoded per device. Larger batches raise throughput per watt until the device saturates.")
+            with tp_c3:
+                st.selectbox("Quantization", list(QUANTIZATION_PROFILES.keys()), format_func=lambda x: QUANTIZATION_PROFILES[x]["name"], index=list(QUANTIZATION_PROFILES.keys()).index(inf_data["quantization"]), key="inf_quant", on_change=update_input, args=("inference", "quantization", "inf_quant"), help="Weight precision. Lower precision moves less memory per token, hence more tokens/s.")
+            with tp_c4:
+                st.number_input("Model Size (B params)", value=float(inf_data["model_params_b"]), min_value=0.1, step=1.0, key="inf_params", on_change=update_input, args=("inference", "model_params_b", "inf_params"), help="Throughput scales inversely with the number of parameters (reference: 8B).")
+            if not has_curve(inf_data["hardware_id"]):
+                st.warning(f"No throughput curve for **{inf_data['hardware_id']}**: add `tokens_per_s` and `idle_watts` to its SKU record, or pick another hardware.")
+            else:
+                serving = serving_profile(inf_data["hardware_id"], inf_data["batch_size"], inf_data["quantization"], inf_data["model_params_b"])
+                st.caption(f"{serving.tokens_per_s:,.0f} tokens/s per device · utilization {serving.utilization:.0%} · {serving.active_watts:,.0f} W · **{serving.kwh_per_1k_tokens * 1000:.3f} Wh / 1k tokens**")
+                with st.expander("Batching & quantization trade-offs (Wh / 1k tokens)"):
+                    st.dataframe(pd.DataFrame(tradeoff_table(inf_data["hardware_id"], inf_data["model_params_b"])).set_index("batch_size"), width="stretch")
+
+    # Storage (Expander)
+    with st.expander("💾 Storage & Network (Optional)"):
+        if st.checkbox("Include Storage & Network", value=inputs_data["storage_network"]["include_storage_network"], key="sn_include", on_change=update_input, args=("storage_network", "include_storage_network", "sn_include")):
+            st.number_input("Dataset Size (GB)", value=float(inputs_data["storage_network"]["dataset_gb"]), key="sn_gb", on_change=update_input, args=("storage_network", "dataset_gb", "sn_gb"), help="Total volume of data stored (Datasets + Models).")
+            st.number_input("Data Transfer (GB/day)", value=float(inputs_data["storage_network"]["transfer_gb_per_day"]), key="sn_tr", on_change=update_input, args=("storage_network", "transfer_gb_per_day", "sn_tr"), help="Average daily data transfer (Inbound + Outbound).")
+
+    # --- Results ---
+    st.divider()
+    st.markdown("<h1 style='text-align:center;'>Results & Analysis</h1>", unsafe_allow_html=True)
+    st.markdown("<br>", unsafe_allow_html=True)
+    try:
+        with span("validation"):
+            inputs_obj = ProjectInputs(**inputs_data)
+        res = st.session_state["footprint"].compute(inputs_obj, assumptions)
+        score = calculate_score(res)
+        
+        col_score, col_kpi = st.columns([1, 3])
+        with col_score:
+                    st.markdown(
+                f"""
+                <div style="
+                    height: 100%;
+                    min-height: 300px;
+                    display: flex;
+                    flex-direction: column;
+                    justify-content: center;
+                    align-items: center;
+                    background-color: {score.color}20;
+                    border: 2px solid {score.color};
+                    border-radius: 12px;
+                    padding: 30px;
+                    text-align: center;
+                ">
+                    <h3 style="color: {score.color}; margin:0;">Grade</h3>
+                    <h1 style="font-size: 3.5em; margin:0;">{score.grade}</h1>
+                    <h2 style="margin:0;">{score.score_100}/100</h2>
+                    <p style="margin-top:8px;"><b>{score.label}</b></p>
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
+        with col_kpi:
+            k1, k2, k3 = st.columns(3)
+            with k1: kpi_card("Total CO₂ (lifecycle)", f"{res.total_co2_kg:,.0f} kg", "All phases combined")
+            with k2: kpi_card("Total Energy", f"{res.total_energy_kwh:,.0f} kWh", "Usage energy")
+            with k3: kpi_card("Total Water", f"{res.total_water_m3:,.1f} m³", "Cooling + electricity proxy")
+            st.markdown("<br>", unsafe_allow_html=True)
+            st.divider()
+            st.markdown("<br>", unsafe_allow_html=True)
+            kpi_card(f"<div style='text-align:center'>Annual CO₂", f"<div style='text-align:center'>{res.annual_co2_kg:.0f} kg/y</div>")
+
+        st.divider()
+        st.subheader("Impact Dashboard")
+
+        fig_wf = build_waterfall_figure(res)
+
+        st.plotly_chart(fig_wf, width="stretch")
+
+
+        # Executive insight
+        impact_by_phase = {
+            "Development": res.co2_dev,
+            "Training": res.co2_training_usage + res.co2_training_embodied,
+            "Inference": res.co2_inference_usage + res.co2_inference_embodied,
+            "Storage & Network": res.co2_storage_network
+        }
+
+        main_driver = max(impact_by_phase, key=impact_by_phase.get)
+        main_value = impact_by_phase[main_driver]
+        pct = (main_value / res.total_co2_kg) * 100 if res.total_co2_kg > 0 else 0
+
+        st.info(
+            f"🔍 **Key insight** — The main contributor to the environmental footprint is "
+            f"**{main_driver}**, representing **{pct:.0f}%** of total CO₂ emissions. "
+            f"This phase should be prioritized for optimization."
+        )
+
+        render_what_if_simulator(res, inputs_obj.project_duration_years)
+
+        st.divider()
+        render_comparison_matrix(inputs_obj, assumptions)
+
+        st.divider()
+        render_report_actions(inputs_obj, res, score, fig_wf, assumptions)
+
+    except ValidationError as e:
+        st.error(f"Input Validation Error: {e}")
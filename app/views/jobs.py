@@ -0,0 +1,214 @@
+# app/views/jobs.py
+"""Jobs page: submits long-running analyses to the background workers (app/jobs.py) and follows them."""
+from datetime import datetime
+from pathlib import Path
+
+import streamlit as st
+import pandas as pd
+from pydantic import ValidationError
+
+from app.models import ProjectInputs
+from app.jobs import JobPool, JobStore, JOB_KINDS, DONE, FAILED, WORKERS_ENV
+from app.utils import load_projects, projects_version
+from app.fleet import AGGREGATED_TYPE
+from app.constants import DEFAULT_GRID_INTENSITY
+from app.export import FORMATS, FORMAT_REQUIREMENTS, COMPRESSIONS, TEXT_FORMATS, available_formats
+
+# The job table polls the store at this period (seconds)
+JOBS_REFRESH_S = 2.0
+JOBS_LISTED = 50
+# Rows of a tabular result shown on the page (the download has all of them)
+RESULT_PREVIEW_ROWS = 200
+
+@st.cache_resource
+def get_job_store() -> JobStore:
+    return JobStore()
+
+@st.cache_resource
+def start_job_workers() -> JobPool:
+    """Background job workers of this server, started on the first visit of this page (not on every cold start)."""
+    return JobPool().start()
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def saved_project_names(version: str) -> list[str]:
+    df = load_projects()
+    if df.empty:
+        return []
+    if "project_type" in df.columns:
+        df = df[df["project_type"] != AGGREGATED_TYPE]
+    return sorted(df["project_name"].dropna().astype(str).unique())
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def saved_values(version: str, column: str) -> list[str]:
+    df = load_projects()
+    return sorted(df[column].dropna().astype(str).unique()) if column in df.columns else []
+
+@st.cache_resource(max_entries=4, show_spinner="Loading job result...")
+def job_result(_store: JobStore, job_id: int, key: str):
+    # Keyed by the result key: a finished result never changes
+    return _store.result(_store.get(job_id))
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def job_download(_store: JobStore, job_id: int, key: str) -> bytes:
+    result = job_result(_store, job_id, key)
+    return result.to_csv(index=False).encode("utf-8") if isinstance(result, pd.DataFrame) else result
+
+def kind_label(kind: str) -> str:
+    return JOB_KINDS[kind].label if kind in JOB_KINDS else kind
+
+def submitted(job):
+    if job.status == DONE:
+        st.success(f"Result already available (job #{job.id}).")
+    else:
+        st.success(f"Job #{job.id} {job.status}.")
+
+def render_submit(store: JobStore, assumptions):
+    assumptions_dump = assumptions.model_dump()
+    tabs = st.tabs([kind.label for kind in JOB_KINDS.values()])
+    tab = dict(zip(JOB_KINDS, tabs))
+
+    with tab["monte_carlo"]:
+        try:
+            inputs = ProjectInputs(**st.session_state["inputs"])
+        except ValidationError:
+            inputs = None
+            st.warning("The project of the Calculator page has invalid inputs.")
+        if inputs is not None:
+            st.caption(f"Emission factor uncertainty on **{inputs.project_name}** (Calculator page inputs).")
+            c1, c2 = st.columns(2)
+            draws = c1.number_input("Draws", min_value=10, max_value=100_000, value=1_000, step=100, key="job_mc_draws")
+            seed = c2.number_input("Seed", min_value=0, value=42, step=1, key="job_mc_seed")
+            if st.button("Run Monte Carlo", key="job_mc_submit"):
+                params = {"inputs": inputs.model_dump(exclude={"created_at"}), "assumptions": assumptions_dump, "draws": int(draws), "seed": int(seed)}
+                submitted(store.submit("monte_carlo", params))
+
+    version = projects_version()
+    with tab["rescore"]:
+        st.caption("Recompute every saved run with the current emission factors and assumptions, next to its stored result.")
+        if st.button("Re-score history", key="job_rescore_submit"):
+            submitted(store.submit("rescore", {"assumptions": assumptions_dump, "history_version": version}))
+
+    with tab["portfolio_pdf"]:
+        st.caption("One PDF report per project (latest saved version), in a zip archive.")
+        selected = st.multiselect("Projects", saved_project_names(version), key="job_pdf_projects", placeholder="All projects")
+        if st.button("Generate reports", key="job_pdf_submit"):
+            params = {"assumptions": assumptions_dump, "history_version": version, "projects": sorted(selected) or None}
+            submitted(store.submit("portfolio_pdf", params))
+
+    with tab["sweep"]:
+        st.caption("Synthetic portfolio × regions × Monte Carlo draws (see `python -m app.sweep` for distributed runs).")
+        c1, c2, c3 = st.columns(3)
+        rows = c1.number_input("Projects", min_value=1_000, max_value=10_000_000, value=100_000, step=10_000, key="job_sweep_rows")
+        draws = c2.number_input("Draws", min_value=0, max_value=1_000, value=10, step=1, key="job_sweep_draws")
+        seed = c3.number_input("Seed", min_value=0, value=42, step=1, key="job_sweep_seed")
+        regions = st.multiselect("Regions", list(DEFAULT_GRID_INTENSITY), key="job_sweep_regions", placeholder="Each project's own regions")
+        if st.button("Run sweep", key="job_sweep_submit"):
+            params = {"rows": int(rows), "draws": int(draws), "seed": int(seed), "regions": regions or [None], "assumptions": assumptions_dump}
+            submitted(store.submit("sweep", params))
+
+    with tab["export"]:
+        st.caption("Filtered history streamed to a file, for BI tools (see `python -m app.export` for scheduled exports).")
+        c1, c2, c3 = st.columns(3)
+        types = c1.multiselect("Type", saved_values(version, "project_type"), key="job_export_types")
+        grades = c2.multiselect("Grade", list("ABCDEFG"), key="job_export_grades")
+        owners = c3.multiselect("Owner", saved_values(version, "owner"), key="job_export_owners")
+        c4, c5 = st.columns(2)
+        query = c4.text_input("Name, owner or tags contain", key="job_export_query")
+        dates = c5.date_input("Saved between", value=(), key="job_export_dates")
+        c6, c7, c8 = st.columns(3)
+        formats = available_formats()
+        fmt = c6.selectbox("Format", formats, format_func=str.upper, key="job_export_format")
+        if missing := [f for f in FORMATS if f not in formats]:
+            c6.caption(" · ".join(f"{f.upper()} needs `pip install {FORMAT_REQUIREMENTS[f]}`" for f in missing))
+        compression = c7.selectbox("Compression", list(COMPRESSIONS), key="job_export_compression", disabled=fmt not in TEXT_FORMATS,
+                                   help="CSV and JSONL only: Parquet and XLSX files are compressed by their format.")
+        latest_only = c8.checkbox("Latest version of each project only", key="job_export_latest")
+        breakdown = c8.checkbox("Per-phase breakdown", key="job_export_breakdown", help="Recomputed with the current assumptions for runs saved without it.")
+        if st.button("Export history", key="job_export_submit"):
+            filters = {
+                "query": query, "project_types": types, "owners": owners, "grades": grades, "latest_only": latest_only,
+                "date_from": dates[0].isoformat() if len(dates) > 0 else None,
+                "date_to": dates[1].isoformat() if len(dates) > 1 else None,
+            }
+            params = {
+                "format": fmt, "compression": compression if fmt in TEXT_FORMATS else "none", "filters": filters,
+                "breakdown": breakdown, "history_version": version,
+            }
+            if breakdown:
+                params["assumptions"] = assumptions_dump  # only then does the export depend on them
+            submitted(store.submit("export", params))
+
+def render_result(store: JobStore, job):
+    kind = JOB_KINDS.get(job.kind)
+    result = job_result(store, job.id, job.key)
+    if isinstance(result, pd.DataFrame):
+        if job.kind == "monte_carlo":
+            co2 = result["total_co2_kg"]
+            k1, k2, k3 = st.columns(3)
+            k1.metric("Mean CO₂", f"{co2.mean():,.0f} kg")
+            k2.metric("P5 – P95", f"{co2.quantile(0.05):,.0f} – {co2.quantile(0.95):,.0f} kg")
+            k3.metric("Most frequent grade", str(result["score_grade"].mode().iloc[0]))
+        st.dataframe(result.head(RESULT_PREVIEW_ROWS), width="stretch", hide_index=True)
+        if len(result) > RESULT_PREVIEW_ROWS:
+            st.caption(f"First {RESULT_PREVIEW_ROWS} of {len(result):,} rows.")
+    if isinstance(result, dict):
+        # Result file of an export: read only when the button is clicked
+        path = Path(result["path"])
+        if not path.exists():
+            st.warning("The exported file was removed; submit the export again.")
+            return
+        st.caption(f"{result['rows']:,} rows, {path.stat().st_size / 1e6:,.1f} MB.")
+        st.download_button(f"📥 Download {result['file_name']}", lambda: path.read_bytes(), file_name=result["file_name"],
+                           mime="application/octet-stream", key=f"job_download_{job.id}")
+        return
+    mime = "text/csv" if isinstance(result, pd.DataFrame) else "application/zip"
+    st.download_button(f"📥 Download {kind.result_name if kind else 'result'}", job_download(store, job.id, job.key),
+                       file_name=kind.result_name if kind else f"job_{job.id}", mime=mime, key=f"job_download_{job.id}")
+
+@st.fragment(run_every=JOBS_REFRESH_S)
+def render_jobs(store: JobStore):
+    jobs = store.list_jobs(JOBS_LISTED)
+    if not jobs:
+        st.info("No jobs yet.")
+        return
+    table = pd.DataFrame([{
+        "Job": j.id,
+        "Kind": kind_label(j.kind),
+        "Status": j.status,
+        "Progress": j.progress,
+        "Message": j.message,
+        "Submitted": datetime.fromtimestamp(j.created_at).strftime("%Y-%m-%d %H:%M:%S"),
+        "Duration (s)": round(j.duration_s, 1) if j.duration_s is not None else None,
+    } for j in jobs])
+    st.dataframe(
+        table, width="stretch", hide_index=True,
+        column_config={"Progress": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="percent")},
+    )
+
+    by_id = {j.id: j for j in jobs}
+    job_id = st.selectbox("Job", list(by_id), format_func=lambda i: f"#{i} {kind_label(by_id[i].kind)} ({by_id[i].status})", key="job_selected")
+    job = by_id[job_id]
+    if job.active:
+        label = "Cancelling..." if job.cancel_requested else "Cancel job"
+        if st.button(label, disabled=job.cancel_requested, key="job_cancel"):
+            store.cancel(job.id)
+            st.rerun()
+        return
+    if job.status == DONE and store.result_path(job.key).exists():
+        render_result(store, job)
+    elif job.status == FAILED:
+        st.error("The job failed.")
+        st.code(job.error or "", language="text")
+    if st.button("🗑️ Delete job", key="job_delete"):
+        store.delete(job.id)
+        st.rerun()
+
+def render(assumptions):
+    st.header("Background Jobs")
+    st.caption(f"Jobs run in background worker processes and keep running (or stay queued) across page changes and app restarts. Workers per server: `{WORKERS_ENV}`.")
+    start_job_workers()
+    store = get_job_store()
+    render_submit(store, assumptions)
+    st.divider()
+    st.subheader("📋 Jobs")
+    render_jobs(store)
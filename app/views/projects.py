@@ -0,0 +1,287 @@
+# app/views/projects.py
+"""Projects page: search, comparison, aggregation, shared fleets, carbon budgets and deletion of saved projects."""
+import json
+
+import streamlit as st
+import pandas as pd
+from pydantic import ValidationError
+
+from app.models import Assumptions, FleetPool, CarbonBudget
+from app.utils import load_projects, release_freed_memory, delete_project, compact_projects, save_custom_row, aggregate_projects, StaleProjectsError, projects_version
+from app.retention import RetentionPolicy
+from app.search import ProjectIndex
+from app.hardware import get_catalog
+from app.fleet import allocate_fleet, load_pools, save_pools
+from app.timeline import portfolio_timeline
+from app.budgets import BUDGET_SCOPES, WARNING_RATIO, BudgetTracker, load_budgets, save_budgets, recent_alerts
+from app.constants import INFRASTRUCTURE_PROFILES, DEFAULT_GRID_INTENSITY
+
+@st.cache_resource(max_entries=2, show_spinner="Indexing saved projects...")
+def get_project_index(version: str) -> ProjectIndex:
+    # One index per store version, shared by every session of the server
+    index = ProjectIndex(load_projects())
+    release_freed_memory()
+    return index
+
+@st.cache_data(max_entries=4, show_spinner="Allocating shared fleets...")
+def get_fleet_allocation(version: str, pools_json: str, assumptions_json: str):
+    # Latest version of each project, allocated over the configured pools
+    df = get_project_index(version).df
+    if "project_name" in df.columns:
+        df = df.drop_duplicates("project_name", keep="last")
+    pools = [FleetPool(**p) for p in json.loads(pools_json)]
+    return allocate_fleet(df, pools, Assumptions.model_validate_json(assumptions_json))
+
+@st.cache_data(max_entries=4, show_spinner="Projecting monthly emissions...")
+def get_timeline(version: str, assumptions_json: str):
+    # Latest version of each project on a shared monthly calendar
+    df = get_project_index(version).df
+    if "project_name" in df.columns:
+        df = df.drop_duplicates("project_name", keep="last")
+    return portfolio_timeline(df, Assumptions.model_validate_json(assumptions_json))
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_budget_report(version: str, budgets_json: str) -> pd.DataFrame:
+    # Latest version of each project against every budget
+    budgets = [CarbonBudget(**b) for b in json.loads(budgets_json)]
+    return BudgetTracker.from_history(get_project_index(version).df).evaluate(budgets)
+
+# Projects drawn by default in the per-project timeline
+TIMELINE_TOP_PROJECTS = 5
+
+def render(assumptions):
+    st.header("Projects")
+    index = get_project_index(projects_version())
+    df = index.df
+    if df.empty:
+        st.info("No saved projects yet.")
+    else:
+        # --- 1. Search & Display Projects (Formatted, paginated) ---
+        query = st.text_input("🔎 Search projects", placeholder="Name, owner, type, grade or tags (typos tolerated)", key="proj_query")
+        with st.expander("Filters"):
+            f1, f2, f3 = st.columns(3)
+            f_types = f1.multiselect("Type", index.values("project_type"), key="proj_f_types")
+            f_grades = f2.multiselect("Grade", list("ABCDEFG"), key="proj_f_grades")
+            f_owners = f3.multiselect("Owner", index.values("owner"), key="proj_f_owners")
+            f4, f5, f6 = st.columns(3)
+            co2_min = f4.number_input("Min CO2 (kg)", value=None, min_value=0.0, key="proj_f_co2_min")
+            co2_max = f5.number_input("Max CO2 (kg)", value=None, min_value=0.0, key="proj_f_co2_max")
+            date_range = f6.date_input("Saved between", value=(), key="proj_f_dates")
+            latest_only = st.checkbox("Latest version of each project only", value=True, key="proj_f_latest")
+
+        p_col1, p_col2 = st.columns([1, 3])
+        page_size = p_col1.selectbox("Rows per page", [25, 50, 100, 250], index=1, key="proj_page_size")
+        result = index.search(
+            query,
+            project_types=f_types, grades=f_grades, owners=f_owners,
+            co2_min=co2_min, co2_max=co2_max,
+            date_from=date_range[0] if len(date_range) > 0 else None,
+            date_to=date_range[1] if len(date_range) > 1 else None,
+            latest_only=latest_only,
+            page=st.session_state.get("proj_page", 1) - 1,
+            page_size=page_size,
+        )
+        # Clamp the requested page when the filters shrink the result set
+        st.session_state["proj_page"] = result.page + 1
+        p_col2.number_input("Page", min_value=1, max_value=result.pages, key="proj_page")
+        st.caption(f"{result.total:,} matching entries out of {len(index):,} saved — page {result.page + 1} of {result.pages}.")
+
+        display_df = result.rows.copy()
+        
+        # Format Date
+        if "timestamp" in display_df.columns:
+            display_df["timestamp"] = pd.to_datetime(display_df["timestamp"], format="ISO8601").dt.strftime("%Y-%m-%d %H:%M")
+
+        # Rename Columns for readability
+        column_map = {
+            "project_name": "Project Name",
+            "owner": "Owner",
+            "project_type": "Type",
+            "environment": "Env",
+            "project_duration_years": "Duration (y)",
+            "total_co2_kg": "Total CO2 (kg)",
+            "total_energy_kwh": "Total Energy (kWh)",
+            "total_water_m3": "Total Water (m³)",
+            "score_grade": "Grade",
+            "score_100": "Score (/100)",
+            "tags": "Tags",
+            "save_count": "Saves",
+            "timestamp": "Date Created"
+        }
+        
+        # Select and rename columns that exist in the dataframe
+        cols_to_show = [c for c in column_map.keys() if c in display_df.columns]
+        st.dataframe(display_df[cols_to_show].rename(columns=column_map), width="stretch", hide_index=True)
+
+        # Selection widgets only list the projects of the current result page
+        projects_list = list(dict.fromkeys(result.rows["project_name"].dropna().astype(str)))
+
+        # --- 2. Comparison Logic ---
+        if len(projects_list) >= 2:
+            st.divider()
+            st.subheader("⚔️ Side-by-Side Comparison")
+            projects = projects_list
+            c_comp1, c_comp2 = st.columns(2)
+            p1 = c_comp1.selectbox("Project A", projects, index=0)
+            p2 = c_comp2.selectbox("Project B", projects, index=1 if len(projects) > 1 else 0)
+            
+            if p1 and p2:
+                # Get latest entry for selected projects
+                row1 = df[df["project_name"] == p1].iloc[-1]
+                row2 = df[df["project_name"] == p2].iloc[-1]
+                
+                k1, k2, k3 = st.columns(3)
+                k1.metric(f"{p1} (CO₂)", f"{row1['total_co2_kg']:.0f} kg")
+                k2.metric(f"{p2} (CO₂)", f"{row2['total_co2_kg']:.0f} kg")
+                delta = row2['total_co2_kg'] - row1['total_co2_kg']
+                k3.metric("Delta (B - A)", f"{delta:+.0f} kg", delta_color="inverse")
+
+        # --- 3. Complex Project Creation ---
+        st.divider()
+        st.subheader("🧩 Create Complex Project (Aggregation)")
+        st.caption("Combine multiple existing projects (e.g., a Training project + an Inference project) into a single aggregated result.")
+        
+        # Keep earlier picks selectable while the search changes
+        combine_options = list(dict.fromkeys(st.session_state.get("combine_sel", []) + projects_list))
+        selected_projects = st.multiselect("Select projects to combine", combine_options, key="combine_sel", help="Use the search above to find projects; selections are kept across searches.")
+        new_complex_name = st.text_input("New Complex Project Name", value="Combined Project")
+        
+        if st.button("Merge & Save Complex Project"):
+            if len(selected_projects) < 2:
+                st.error("Please select at least 2 projects to combine.")
+            elif not new_complex_name:
+                st.error("Please provide a name for the complex project.")
+            else:
+                new_row = aggregate_projects(df, selected_projects, new_complex_name)
+                try:
+                    save_custom_row(new_row, expected_version=df.attrs.get("version"))
+                    st.success(f"Complex project '{new_complex_name}' created successfully!")
+                    st.rerun()
+                except StaleProjectsError as e:
+                    st.warning(str(e))
+
+        # --- 4. Shared Fleet ---
+        st.divider()
+        st.subheader("🏭 Shared Fleet")
+        st.caption("Define the device pools shared by several projects. Training and self-hosted inference phases running on the same hardware, region and infrastructure as a pool are charged their busy hours plus a proportional share of the pool's idle energy and manufacturing, instead of full dedicated devices.")
+        pools_df = pd.DataFrame([p.model_dump() for p in load_pools()], columns=list(FleetPool.model_fields))
+        edited_pools = st.data_editor(
+            pools_df, num_rows="dynamic", width="stretch", hide_index=True, key="fleet_pools_editor",
+            column_config={
+                "name": st.column_config.TextColumn("Pool", required=True),
+                "hardware_id": st.column_config.SelectboxColumn("Hardware", options=list(get_catalog().ids), required=True),
+                "region": st.column_config.SelectboxColumn("Region", options=list(DEFAULT_GRID_INTENSITY.keys()), required=True),
+                "infra_type": st.column_config.SelectboxColumn("Infra", options=list(INFRASTRUCTURE_PROFILES.keys()), required=True),
+                "device_count": st.column_config.NumberColumn("Devices", min_value=1, step=1, required=True),
+            },
+        )
+        if st.button("Save Pools"):
+            try:
+                save_pools([FleetPool(**row) for row in edited_pools.dropna(how="all").to_dict("records")])
+                st.success("Fleet pools saved.")
+            except ValidationError as e:
+                st.error(f"Invalid pool definition: {e}")
+
+        if not pools_df.empty:
+            fleet = get_fleet_allocation(df.attrs.get("version"), json.dumps(pools_df.to_dict("records")), assumptions.model_dump_json())
+            f_k1, f_k2, f_k3 = st.columns(3)
+            standalone_total = fleet.projects["standalone_co2_kg"].sum()
+            fleet_total = fleet.projects["fleet_co2_kg"].sum()
+            f_k1.metric("Portfolio CO₂ (standalone)", f"{standalone_total:,.0f} kg")
+            f_k2.metric("Portfolio CO₂ (fleet-consistent)", f"{fleet_total:,.0f} kg", f"{fleet_total - standalone_total:+,.0f} kg", delta_color="inverse")
+            f_k3.metric("Unused pools overhead", f"{fleet.unallocated_co2_kg_per_year:,.0f} kg/year")
+            pool_view = fleet.pools.assign(utilization=fleet.pools["utilization"] * 100)
+            st.dataframe(
+                pool_view.rename(columns={
+                    "pool": "Pool", "hardware_id": "Hardware", "region": "Region", "devices": "Devices", "users": "Phases",
+                    "busy_device_hours": "Busy (device-h/year)", "utilization": "Utilization (%)",
+                    "idle_kwh_per_year": "Idle (kWh/year)", "embodied_co2_kg_per_year": "Embodied (kg/year)",
+                    "overhead_co2_kg_per_year": "Shared overhead (kg/year)",
+                }),
+                width="stretch", hide_index=True,
+            )
+            if (fleet.pools["utilization"] > 1).any():
+                st.warning("Some pools are busier than their device count allows: their declared size is too small for the projects assigned to them.")
+
+        # --- 5. Carbon Budgets ---
+        st.divider()
+        st.subheader("💰 Carbon Budgets")
+        st.caption(f"Annual CO₂ budgets per owner (all their projects, aggregated ones excepted) or per project, against the latest saved version of each project. A budget is in warning from {WARNING_RATIO:.0%} of its amount; every change of status on save is appended to `budget_alerts.jsonl` and posted to the `ECOMETRICS_BUDGET_WEBHOOK` URL when set. Grades apply the score thresholds to annual CO₂.")
+        budgets_df = pd.DataFrame([b.model_dump() for b in load_budgets()], columns=list(CarbonBudget.model_fields))
+        edited_budgets = st.data_editor(
+            budgets_df, num_rows="dynamic", width="stretch", hide_index=True, key="budgets_editor",
+            column_config={
+                "scope": st.column_config.SelectboxColumn("Scope", options=list(BUDGET_SCOPES), required=True),
+                "name": st.column_config.TextColumn("Owner / project", required=True),
+                "annual_co2_kg": st.column_config.NumberColumn("Budget (kg CO₂/year)", min_value=0.0, step=100.0, required=True),
+            },
+        )
+        if st.button("Save Budgets"):
+            try:
+                save_budgets([CarbonBudget(**row) for row in edited_budgets.dropna(how="all").to_dict("records")])
+                st.success("Budgets saved.")
+            except ValidationError as e:
+                st.error(f"Invalid budget: {e}")
+
+        if not budgets_df.empty:
+            report = get_budget_report(df.attrs.get("version"), json.dumps(budgets_df.to_dict("records")))
+            b_k1, b_k2, b_k3 = st.columns(3)
+            b_k1.metric("Over budget", int((report["status"] == "over").sum()))
+            b_k2.metric("In warning", int((report["status"] == "warning").sum()))
+            b_k3.metric("Within budget", int((report["status"] == "ok").sum()))
+            st.dataframe(
+                report.assign(used_pct=report["used_pct"] / 100).rename(columns={
+                    "scope": "Scope", "name": "Owner / project", "budget_co2_kg": "Budget (kg/year)", "used_co2_kg": "Used (kg/year)",
+                    "used_pct": "Used", "status": "Status", "grade": "Grade (used)", "budget_grade": "Grade (budget)",
+                }),
+                width="stretch", hide_index=True,
+                column_config={
+                    "Budget (kg/year)": st.column_config.NumberColumn(format="localized"),
+                    "Used (kg/year)": st.column_config.NumberColumn(format="localized"),
+                    "Used": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="percent"),
+                },
+            )
+        alerts = recent_alerts()
+        if alerts:
+            with st.expander(f"Recent budget alerts ({len(alerts)})"):
+                st.dataframe(pd.DataFrame(alerts)[["time", "scope", "name", "previous_status", "status", "annual_co2_kg", "budget_co2_kg", "used_pct"]], width="stretch", hide_index=True)
+
+        # --- 6. Emissions Timeline ---
+        st.divider()
+        st.subheader("📈 Emissions Timeline")
+        st.caption("Month-by-month emissions from each project's start: development in the first month, training at each run, inference following its traffic growth, storage spread evenly. Curves are cumulative.")
+        if st.toggle("Show monthly timeline", key="timeline_on"):
+            from app.charts import build_timeline_figure
+            timeline = get_timeline(df.attrs.get("version"), assumptions.model_dump_json())
+            if not timeline.projects:
+                st.info("No individual projects to project (aggregated projects are not repeated).")
+            else:
+                st.plotly_chart(build_timeline_figure(timeline.portfolio(), "Portfolio — Cumulative CO₂ by Phase"), width="stretch")
+                by_project = timeline.by_project()
+                top = by_project.sum().nlargest(TIMELINE_TOP_PROJECTS).index.tolist()
+                shown = st.multiselect("Projects", timeline.projects, default=top, key="timeline_projects")
+                if shown:
+                    st.plotly_chart(build_timeline_figure(by_project[shown], "Cumulative CO₂ per Project", stacked=False), width="stretch")
+
+        # --- 7. Delete Project ---
+        st.divider()
+        st.subheader("🗑️ Manage Projects")
+        p_to_delete = st.selectbox("Select project to delete", projects_list, key="del_sel")
+        if st.button("Delete Project", type="secondary"):
+            try:
+                delete_project(p_to_delete, expected_version=df.attrs.get("version"))
+                st.success(f"Project '{p_to_delete}' deleted.")
+                st.rerun()
+            except StaleProjectsError as e:
+                st.warning(str(e))
+
+        # Identical runs are stored once; compaction also thins out old versions
+        c_keep, c_btn = st.columns([1, 1])
+        keep_days = c_keep.number_input("Keep every version of the last (days)", min_value=0, value=RetentionPolicy.keep_days, step=7, key="compact_days", help="Older versions are reduced to the last version of each project per month. The latest version of every project is always kept.")
+        if c_btn.button("Compact History", help="Folds identical saved runs into one row and downsamples old versions."):
+            try:
+                compact_projects(RetentionPolicy(keep_days=int(keep_days)), expected_version=df.attrs.get("version"))
+                st.success(f"History compacted: {len(df):,} rows before.")
+                st.rerun()
+            except StaleProjectsError as e:
+                st.warning(str(e))
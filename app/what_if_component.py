@@ -0,0 +1,34 @@
+# app/what_if_component.py
+"""
+Browser-side What-If simulator.
+
+The server sends the lever coefficients of the current footprint once
+(`what_if_coefficients`); the component evaluates the linear what-if model
+and redraws the chart in the browser on every slider move. It only talks back
+to the server when the user applies a lever configuration (e.g. for the PDF).
+"""
+from pathlib import Path
+
+import streamlit.components.v1 as components
+
+from app.models import FootprintResult
+from app.calculator import what_if_coefficients
+
+_FRONTEND_DIR = Path(__file__).parent / "frontend" / "what_if"
+_component = components.declare_component("ecometrics_what_if", path=str(_FRONTEND_DIR))
+
+
+def what_if_component(res: FootprintResult, project_years: float, levers: dict, key: str = None):
+    """
+    Renders the browser-side simulator. `levers` holds the initial slider values
+    (keyword names of `simulate_what_if`). Returns the last applied levers, or None.
+    """
+    return _component(
+        coefficients=what_if_coefficients(res),
+        baseline_co2_kg=res.total_co2_kg,
+        annual_co2_kg=res.annual_co2_kg,
+        project_years=project_years,
+        levers=levers,
+        key=key,
+        default=None,
+    )
@@ -0,0 +1,78 @@
+# benchmarks/bench_cold_start.py
+"""
+Cold start and first paint of each page of the Streamlit app.
+
+    python -m benchmarks.bench_cold_start [--repeat 3] [--script path/to/main.py]
+
+Every sample runs in a fresh interpreter, so nothing is imported or cached yet:
+
+- cold start  : first script run of the page (imports of the page and its
+                dependencies, cached CSS/logo, first render),
+- warm rerun  : the next run of the same page in the same process,
+- heavy deps  : which of plotly.express / fpdf the page had to load.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+APP_SCRIPT = ROOT / "app" / "main.py"
+PAGES = ("Calculator", "Projects", "Jobs")
+HEAVY_MODULES = ("plotly.express", "fpdf")
+
+# Runs in the child interpreter: streamlit itself is imported before timing
+_CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({script!r}, default_timeout=120)
+app.session_state["page"] = {page!r}
+start = time.perf_counter()
+app.run()
+cold = time.perf_counter() - start
+start = time.perf_counter()
+app.run()
+warm = time.perf_counter() - start
+print(json.dumps({{
+    "cold_ms": cold * 1000, "warm_ms": warm * 1000,
+    "errors": len(app.exception),
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(script: Path, page: str) -> dict:
+    code = _CHILD.format(script=str(script), page=page, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tempfile.mkdtemp(prefix="ecometrics-cold-"),  # empty data/ for every sample
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", type=Path, default=APP_SCRIPT)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'page':<12} {'cold start':>12} {'warm rerun':>12}  heavy deps loaded")
+    for page in PAGES:
+        samples = [measure(args.script.resolve(), page) for _ in range(args.repeat)]
+        if any(s["errors"] for s in samples):
+            print(f"{page:<12} script raised an exception", file=sys.stderr)
+            return 1
+        cold = statistics.median(s["cold_ms"] for s in samples)
+        warm = statistics.median(s["warm_ms"] for s in samples)
+        print(f"{page:<12} {cold:9.0f} ms {warm:9.0f} ms  {', '.join(samples[0]['heavy']) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# benchmarks/bench_memory.py
+"""
+Memory of the loaded project history: untyped CSV read vs. `load_projects`
+(typed schema, `apply_history_schema`).
+
+    python -m benchmarks.bench_memory [--rows 100000] [--top 15]
+
+Prints the DataFrame size (deep) before/after with the largest columns, and
+the RSS held by a fresh process once the history and its search index are
+loaded (what the Streamlit server keeps for the Projects page).
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from app import utils  # noqa: E402
+from benchmarks.cases import make_history  # noqa: E402
+
+# Runs in the child interpreter: RSS growth from loading the history + index
+_CHILD = """
+import gc, json, sys
+from pathlib import Path
+from app import utils
+from app.search import ProjectIndex
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        return next(int(l.split()[1]) for l in f if l.startswith("VmRSS")) / 1024
+
+utils.PROJECTS_CSV = Path({store!r})
+gc.collect()
+base = rss_mb()
+df = utils.load_projects() if {typed!r} else utils._read_projects_csv()
+gc.collect()
+history = rss_mb() - base
+index = ProjectIndex(df)
+if {typed!r}:
+    utils.release_freed_memory()  # as get_project_index does
+gc.collect()
+print(json.dumps({{"history": history, "index": rss_mb() - base - history}}))
+"""
+
+
+def held_rss_mb(store: Path, typed: bool) -> dict | None:
+    if not Path("/proc/self/status").exists():
+        return None  # Linux only
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(store=str(store), typed=typed)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--top", type=int, default=15, help="Largest columns listed.")
+    args = parser.parse_args(argv)
+
+    store = Path(tempfile.mkdtemp(prefix="ecometrics-mem-")) / "projects.csv"
+    make_history(args.rows).to_csv(store, index=False)
+    raw = pd.read_csv(store)
+    with pd.option_context("future.infer_string", False):
+        raw_object = pd.read_csv(store)
+    typed = utils.apply_history_schema(raw)
+
+    sizes = pd.DataFrame({
+        "object (MB)": raw_object.memory_usage(deep=True, index=False) / 1e6,
+        "untyped (MB)": raw.memory_usage(deep=True, index=False) / 1e6,
+        "typed (MB)": typed.memory_usage(deep=True, index=False) / 1e6,
+        "dtype": typed.dtypes.astype(str),
+    })
+    print(f"{args.rows:,}-row history, largest columns (untyped):")
+    print(sizes.sort_values("untyped (MB)", ascending=False).head(args.top).to_string(float_format="{:.2f}".format))
+    total = sizes[["object (MB)", "untyped (MB)", "typed (MB)"]].sum()
+    print(f"\nDataFrame: object strings {total.iloc[0]:.1f} MB, untyped {total.iloc[1]:.1f} MB -> typed {total.iloc[2]:.1f} MB"
+          f"  (x{total.iloc[0] / total.iloc[2]:.1f} / x{total.iloc[1] / total.iloc[2]:.1f})")
+
+    before, after = held_rss_mb(store, typed=False), held_rss_mb(store, typed=True)
+    if before is not None:
+        for part in ("history", "index"):
+            print(f"RSS held ({part}): untyped {before[part]:.1f} MB -> typed {after[part]:.1f} MB  (x{before[part] / after[part]:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# benchmarks/bench_pool.py
+"""
+Process-pool dispatch overhead: pickled chunks vs shared memory.
+
+    python -m benchmarks.bench_pool                      # 2M rows
+    python -m benchmarks.bench_pool --rows 10000000 --workers 4
+
+Both modes evaluate the same rows with `compute_footprint_arrays`:
+- pickled: each task ships a DataFrame chunk to a worker, which encodes it
+  with its own factor tables and pickles the results back;
+- shared: factor tables, encoded inputs and results live in shared memory,
+  tasks are `(start, stop)` ranges.
+Both then sum the total CO₂ (results are consumed, not just computed).
+Overhead is the pool wall time minus the single-process compute time.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd  # noqa: E402
+
+from app.models import Assumptions  # noqa: E402
+from app.batch import compute_footprint_batch, compute_footprint_arrays, encode_inputs, factor_tables  # noqa: E402
+from app.shared_batch import SharedBatch, DEFAULT_CHUNK_ROWS  # noqa: E402
+from app.synthetic import iter_flat_rows, DEFAULT_SEED  # noqa: E402
+
+ASSUMPTIONS = Assumptions()
+
+
+def _pickled_task(chunk: pd.DataFrame) -> pd.DataFrame:
+    return compute_footprint_batch(chunk, ASSUMPTIONS)
+
+
+def run(n_rows: int, workers: int, chunk_rows: int):
+    base = pd.DataFrame(iter_flat_rows(chunk_rows, seed=DEFAULT_SEED))
+    n_chunks = -(-n_rows // chunk_rows)
+    n_rows = n_chunks * chunk_rows
+    print(f"{n_rows} rows, {n_chunks} chunks of {chunk_rows}, {workers} worker(s), {os.cpu_count()} CPU(s)")
+
+    # Reference: single-process compute on encoded arrays (no dispatch at all)
+    tables = factor_tables()
+    cols = encode_inputs(base, tables)
+    start = time.perf_counter()
+    compute_footprint_arrays(cols, tables, ASSUMPTIONS)
+    t_compute = (time.perf_counter() - start) * n_chunks
+    print(f"  compute only:  {t_compute:7.2f} s")
+
+    # Pickled DataFrame chunks
+    with ProcessPoolExecutor(workers) as pool:
+        list(pool.map(_pickled_task, [base.iloc[:1]] * workers))  # pool start-up excluded
+        start = time.perf_counter()
+        total = 0.0
+        for res in pool.map(_pickled_task, [base] * n_chunks):
+            total += res["total_co2_kg"].sum()
+        t_pickled = time.perf_counter() - start
+    print(f"  pickled:       {t_pickled:7.2f} s  overhead {t_pickled - t_compute / workers:6.2f} s")
+
+    # Shared memory (inputs streamed into the batch chunk by chunk)
+    with SharedBatch(n_rows) as batch:
+        offset = 0
+        start = time.perf_counter()
+        for _ in range(n_chunks):
+            offset = batch.fill(offset, base)
+        t_fill = time.perf_counter() - start
+        start = time.perf_counter()
+        batch.evaluate(ASSUMPTIONS, workers=workers, chunk_rows=chunk_rows)
+        batch.results.arrays["total_co2_kg"].sum()
+        t_shared = time.perf_counter() - start
+        print(f"  shared:        {t_shared:7.2f} s  overhead {t_shared - t_compute / workers:6.2f} s"
+              f"  (one-off encode {t_fill:.2f} s, {batch.nbytes / 1e6:.0f} MB shared)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare process-pool dispatch strategies.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+    run(args.rows, args.workers, args.chunk_rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
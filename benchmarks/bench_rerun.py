@@ -0,0 +1,85 @@
+# benchmarks/bench_rerun.py
+"""
+Calculator rerun latency: full-page rerun vs. What-If fragment rerun.
+
+    python -m benchmarks.bench_rerun [--script path/to/main.py]
+
+A slider move used to rerun the whole script (inputs, validation,
+compute_footprint, both figures and the PDF). It now only reruns the
+simulator fragment: simulate_what_if + fig_sim + its serialization.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models import ProjectInputs, Assumptions, InferenceInputs, TrainingInputs  # noqa: E402
+from app.calculator import compute_footprint, simulate_what_if  # noqa: E402
+from app.charts import build_simulator_figure  # noqa: E402
+
+APP_SCRIPT = Path(__file__).parent.parent / "app" / "main.py"
+
+# Realistic self-hosted GenAI project with monthly fine-tuning
+REALISTIC_PROJECT = ProjectInputs(
+    project_name="Customer Care Copilot",
+    project_type="genai",
+    training=TrainingInputs(frequency="Monthly", hardware_count=8, duration_run_hours=12.0),
+    inference=InferenceInputs(mode="Self-Hosted", hardware_id="gpu_a100", hardware_count=2, latency_ms=1800.0, req_per_day=20_000),
+)
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def full_rerun_ms(script: Path, repeat: int) -> float:
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(str(script), default_timeout=120)
+    app.session_state["inputs"] = REALISTIC_PROJECT.model_dump()
+    app.run()
+    slider = app.slider[0]
+    values = iter(range(repeat * 2))
+
+    def move_slider():
+        slider.set_value(5 * (next(values) % 8)).run()
+    return _median_ms(move_slider, repeat)
+
+
+def fragment_rerun_ms(repeat: int) -> float:
+    res = compute_footprint(REALISTIC_PROJECT, Assumptions())
+    values = iter(range(repeat * 2))
+
+    def fragment():
+        what_if = simulate_what_if(res, token_reduction_pct=5 * (next(values) % 8), traffic_reduction_pct=5, region_gain_pct=5, pue_improvement_pct=5)
+        build_simulator_figure(res, what_if, REALISTIC_PROJECT.project_duration_years).to_json()
+    fragment()  # warm up plotly
+    return _median_ms(fragment, repeat)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", type=Path, default=APP_SCRIPT, help="Streamlit script for the full-rerun measurement.")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    os.chdir(tempfile.mkdtemp(prefix="ecometrics-rerun-"))  # keep data/ out of the repo
+    full = full_rerun_ms(args.script.resolve(), args.repeat)
+    frag = fragment_rerun_ms(args.repeat)
+    print(f"full-page rerun on slider move : {full:8.1f} ms  ({args.script})")
+    print(f"what-if fragment rerun          : {frag:8.1f} ms")
+    print(f"speed-up                        : x{full / frag:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
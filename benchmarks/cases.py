@@ -0,0 +1,332 @@
+# benchmarks/cases.py
+import atexit
+import itertools
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app import utils
+from app.models import ProjectInputs, Assumptions, TrainingInputs, InferenceInputs
+from app.calculator import compute_footprint, calculate_score, simulate_what_if, IncrementalFootprint
+from app.synthetic import iter_flat_rows, DEFAULT_SEED
+from benchmarks.harness import benchmark
+
+ASSUMPTIONS = Assumptions()
+STORE_SIZES = (1_000, 10_000, 100_000)
+
+_TMP_DIR = Path(tempfile.mkdtemp(prefix="ecometrics-bench-"))
+atexit.register(shutil.rmtree, _TMP_DIR, ignore_errors=True)
+
+
+# --- compute_footprint branches (project_type x inference mode x flags) ---
+BRANCH_INPUTS = {
+    "genai_api": ProjectInputs(project_type="genai", training=TrainingInputs(include_training=False)),
+    "genai_api_finetune": ProjectInputs(project_type="genai", training=TrainingInputs(frequency="Monthly")),
+    "genai_self_hosted": ProjectInputs(project_type="genai", inference=InferenceInputs(mode="Self-Hosted", latency_ms=2000.0)),
+    "genai_capacity_model": ProjectInputs(project_type="genai", inference=InferenceInputs(mode="Self-Hosted", latency_ms=2000.0, req_per_day=200_000, capacity_model=True, traffic_profile="business_hours")),
+    "genai_throughput_model": ProjectInputs(project_type="genai", inference=InferenceInputs(mode="Self-Hosted", hardware_id="gpu_a100", throughput_model=True, batch_size=32, quantization="int8")),
+    "genai_serverless": ProjectInputs(project_type="genai", inference=InferenceInputs(mode="Self-Hosted", infra_type="cloud_serverless")),
+    "ml_classic_daily": ProjectInputs(project_type="ml_classic", training=TrainingInputs(hardware_id="server_cpu", frequency="Daily"), inference=InferenceInputs(hardware_id="server_cpu", server_24_7=False)),
+    "deep_learning_weekly": ProjectInputs(project_type="deep_learning", training=TrainingInputs(frequency="Weekly")),
+    "inference_only": ProjectInputs(project_type="deep_learning", training=TrainingInputs(include_training=False), inference=InferenceInputs(mode="Self-Hosted")),
+    "dev_only": ProjectInputs(training=TrainingInputs(include_training=False), inference=InferenceInputs(include_inference=False)),
+}
+
+for _branch, _inputs in BRANCH_INPUTS.items():
+    benchmark(f"compute_footprint[{_branch}]", setup=lambda i=_inputs: (i, ASSUMPTIONS))(compute_footprint)
+
+_REFERENCE_FP = compute_footprint(BRANCH_INPUTS["genai_self_hosted"], ASSUMPTIONS)
+
+
+def _incremental_setup():
+    # Warm evaluator; every call then edits the dataset size, which only dirties the storage phase
+    evaluator = IncrementalFootprint()
+    inputs = BRANCH_INPUTS["genai_self_hosted"]
+    evaluator.compute(inputs, ASSUMPTIONS)
+    return evaluator, inputs, itertools.count(1)
+
+
+@benchmark("incremental_footprint[one_phase]", setup=_incremental_setup)
+def bench_incremental_footprint(evaluator, inputs, counter):
+    storage = inputs.storage_network.model_copy(update={"dataset_gb": 50.0 + next(counter)})
+    evaluator.compute(inputs.model_copy(update={"storage_network": storage}), ASSUMPTIONS)
+
+
+@benchmark("calculate_score")
+def bench_calculate_score():
+    calculate_score(_REFERENCE_FP)
+
+
+@benchmark("simulate_what_if")
+def bench_simulate_what_if():
+    simulate_what_if(
+        _REFERENCE_FP,
+        token_reduction_pct=20, traffic_reduction_pct=10, region_gain_pct=30,
+        pue_improvement_pct=10, training_freq_reduction_pct=20,
+    )
+
+
+@benchmark("validation[ProjectInputs]")
+def bench_validation():
+    ProjectInputs(**BRANCH_INPUTS["genai_self_hosted"].model_dump())
+
+
+# --- Region x hardware x infra comparison matrix (target: < 200 ms with its figure) ---
+def _matrix_view(inputs):
+    from app.matrix import comparison_matrix
+    from app.charts import build_matrix_figure
+    build_matrix_figure(comparison_matrix(inputs, ASSUMPTIONS)).to_json()
+
+
+benchmark("comparison_matrix[view]", setup=lambda: (BRANCH_INPUTS["genai_self_hosted"],), repeat=5, tags=("ui",))(_matrix_view)
+
+
+# --- Hardware catalog (10k SKUs) ---
+def _catalog_setup():
+    from app.hardware import HardwareCatalog
+    skus = [
+        {"id": f"sku_{i}", "name": f"{('AWS', 'Azure', 'GCP')[i % 3]} {('CPU', 'GPU')[i % 2]} instance {i}", "type": ("cpu", "gpu")[i % 2], "watts": 100 + i % 700, "gwp": 300 + i % 2500}
+        for i in range(10_000)
+    ]
+    catalog = HardwareCatalog(skus)
+    return catalog, catalog.eligible("training", "genai")
+
+
+benchmark("hardware_search[10k]", setup=_catalog_setup, repeat=5, tags=("ui",))(lambda catalog, ids: catalog.search("azure gpu 12", ids))
+
+
+# --- Vectorized batch calculator ---
+def _batch_setup(n_rows: int):
+    from app.batch import factor_tables, encode_inputs
+    tables = factor_tables()
+    return encode_inputs(pd.DataFrame(iter_flat_rows(n_rows, seed=DEFAULT_SEED)), tables), tables, ASSUMPTIONS
+
+
+def _compute_footprint_arrays(*args):
+    from app.batch import compute_footprint_arrays
+    compute_footprint_arrays(*args)
+
+
+benchmark("compute_footprint_arrays[100000]", setup=lambda: _batch_setup(100_000), repeat=5, tags=("batch",))(_compute_footprint_arrays)
+
+
+def _capacity_setup(n_rows: int):
+    # Capacity-model deployments up to 1e7 req/day x 60 s latency (offered loads up to ~10^4 per hour)
+    from app.constants import TRAFFIC_PROFILES, AUTOSCALING_POLICIES
+    rng = np.random.default_rng(DEFAULT_SEED)
+    profiles, policies = list(TRAFFIC_PROFILES), list(AUTOSCALING_POLICIES)
+    return (
+        np.exp(rng.uniform(0.0, np.log(1e7), n_rows)).round(), np.exp(rng.uniform(0.0, np.log(6e4), n_rows)).round(1),
+        rng.uniform(1.0, 5.0, n_rows).round(2), np.exp(rng.uniform(np.log(10.0), np.log(1e4), n_rows)).round(1),
+        rng.integers(0, len(profiles), n_rows), rng.integers(0, len(policies), n_rows), profiles, policies,
+    )
+
+
+def _replica_hours(*args):
+    from app.capacity import replica_hours_arrays
+    replica_hours_arrays(*args)
+
+
+benchmark("replica_hours_arrays[10000]", setup=lambda: _capacity_setup(10_000), repeat=5, number=1, tags=("batch",))(_replica_hours)
+
+
+# --- Notebook SDK (df.eco accessor) ---
+def _sdk_setup(n_rows: int):
+    import app.sdk  # noqa: F401 (registers df.eco)
+    base = pd.DataFrame(iter_flat_rows(100_000, seed=DEFAULT_SEED))
+    return pd.concat([base] * (n_rows // len(base)), ignore_index=True), ASSUMPTIONS
+
+
+benchmark("sdk_score[1000000]", setup=lambda: _sdk_setup(1_000_000), repeat=3, number=1, tags=("batch", "slow"))(lambda df, a: df.eco.score(a))
+
+
+# --- Monthly timeline (projects x months) ---
+def _timeline_setup(n_rows: int):
+    # Synthetic projects started over five years, so the calendar spans ~10 years
+    df = pd.DataFrame(iter_flat_rows(n_rows, seed=DEFAULT_SEED))
+    df["created_at"] = [f"{2020 + i % 5}-{1 + i % 12:02d}-01" for i in range(n_rows)]
+    return df, ASSUMPTIONS
+
+
+def _portfolio_timeline(*args):
+    from app.timeline import portfolio_timeline
+    portfolio_timeline(*args)
+
+
+benchmark("portfolio_timeline[10000]", setup=lambda: _timeline_setup(10_000), repeat=5, tags=("batch",))(_portfolio_timeline)
+
+
+# --- Project store (CSV) ---
+def make_history(n_rows: int) -> pd.DataFrame:
+    """Builds an n-row saved history from the seeded synthetic portfolio."""
+    return pd.DataFrame(iter_flat_rows(n_rows, seed=DEFAULT_SEED, with_results=True, assumptions=ASSUMPTIONS))
+
+
+def _use_store(n_rows: int) -> Path:
+    path = _TMP_DIR / f"projects_{n_rows}.csv"
+    if not path.exists():
+        make_history(n_rows).to_csv(path, index=False)
+    utils.PROJECTS_CSV = path
+    return path
+
+
+def _copy_store(n_rows: int) -> Path:
+    src = _use_store(n_rows)
+    dst = _TMP_DIR / f"projects_{n_rows}_rw.csv"
+    shutil.copyfile(src, dst)
+    utils.PROJECTS_CSV = dst
+    return dst
+
+
+_SAVE_INPUTS = BRANCH_INPUTS["genai_api"]
+_SAVE_FP = compute_footprint(_SAVE_INPUTS, ASSUMPTIONS)
+_SAVE_SCORE = calculate_score(_SAVE_FP)
+
+for _n in STORE_SIZES:
+    benchmark(f"load_projects[{_n}]", setup=lambda n=_n: _use_store(n) and (), repeat=3, number=1, tags=("store",))(utils.load_projects)
+    benchmark(f"save_project[{_n}]", setup=lambda n=_n: _copy_store(n) and (_SAVE_INPUTS, _SAVE_FP, _SAVE_SCORE), repeat=3, number=1, tags=("store",))(utils.save_project)
+
+
+def _compact_setup(n_rows: int):
+    from app.retention import RetentionPolicy
+    # Every project saved twice (duplicate clicks), in rows without a run hash
+    df = make_history(n_rows // 2)
+    return pd.concat([df, df], ignore_index=True), RetentionPolicy()
+
+
+def _compact_history(df, policy):
+    from app.retention import compact_history
+    compact_history(df, policy)
+
+
+benchmark("compact_history[100000]", setup=lambda: _compact_setup(100_000), repeat=3, number=1, tags=("store",))(_compact_history)
+
+
+def _budget_setup(n_rows: int):
+    from app.budgets import BudgetTracker, budget_index
+    from app.models import CarbonBudget
+    df = pd.read_csv(_use_store(n_rows))
+    tracker = BudgetTracker.from_history(df)
+    budgets = [CarbonBudget(scope="owner", name=o, annual_co2_kg=max(1.0, v)) for o, v in tracker.owners.items()]
+    budgets += [CarbonBudget(scope="project", name=name, annual_co2_kg=1_000.0) for name in tracker.projects]
+    budgets = budget_index(budgets)
+    tracker.check(budgets)
+    project, (owner, annual) = next(iter(tracker.projects.items()))
+    return df, tracker, budgets, project, owner, annual, itertools.cycle((2.0, 0.5))
+
+
+def _budget_on_save(df, tracker, budgets, project, owner, annual, factors):
+    # One saved version: the project's and its owner's budgets are checked
+    tracker.check(budgets, tracker.update(project, owner, annual * next(factors)))
+
+
+def _budget_rebuild(df, tracker, budgets, *_):
+    # Another process wrote: the tracker starts over from the history
+    from app.budgets import BudgetTracker
+    BudgetTracker.from_history(df).check(budgets)
+
+
+benchmark("budget_check[100000,on_save]", setup=lambda: _budget_setup(100_000), repeat=5, tags=("store", "budgets"))(_budget_on_save)
+benchmark("budget_check[100000,rebuild]", setup=lambda: _budget_setup(100_000), repeat=3, number=1, tags=("store", "budgets"))(_budget_rebuild)
+
+
+def _export_history(fmt, compression, breakdown):
+    from app.export import export_history
+    export_history(_TMP_DIR / "export.out", fmt, breakdown=breakdown, compression=compression)
+
+
+benchmark("export_history[100000,csv.gz]", setup=lambda: _use_store(100_000) and ("csv", "gzip", False), repeat=3, number=1, tags=("store", "export"))(_export_history)
+benchmark("export_history[100000,parquet+breakdown]", setup=lambda: _use_store(100_000) and ("parquet", None, True), repeat=3, number=1, tags=("store", "export"))(_export_history)
+
+
+# --- Golden corpus differential check (benchmarks/golden.py) ---
+def _golden_setup(n_rows: int, engine: str):
+    from benchmarks import golden
+    df, assumption_sets = golden.build_corpus(n_rows)
+    return golden.resolve_engine(engine), golden.Corpus(df, assumption_sets, golden.FACTOR_VERSION, DEFAULT_SEED)
+
+
+def _golden_check(engine, corpus):
+    from benchmarks.golden import check_engine
+    check_engine(engine, corpus)
+
+
+benchmark("golden_check[20000,batch]", setup=lambda: _golden_setup(20_000, "batch"), repeat=3, number=1, tags=("batch", "golden", "slow"))(_golden_check)
+
+
+# --- Complex project aggregation ---
+def _aggregation_setup():
+    df = make_history(10_000)
+    return df, list(df["project_name"].unique()[:50]), "Combined Project"
+
+
+benchmark("aggregate_projects[10000x50]", setup=_aggregation_setup, repeat=5)(utils.aggregate_projects)
+
+
+# --- Project search (1M history rows) ---
+def _search_setup():
+    from app.search import ProjectIndex
+    base = make_history(100_000)
+    parts = []
+    for k in range(10):
+        part = base.copy()
+        part["project_name"] = part["project_name"] + f" v{k}"
+        parts.append(part)
+    return (ProjectIndex(pd.concat(parts, ignore_index=True)),)
+
+
+_SEARCH_INDEX = []
+
+
+def _search_index():
+    if not _SEARCH_INDEX:
+        _SEARCH_INDEX.extend(_search_setup())
+    return tuple(_SEARCH_INDEX)
+
+
+benchmark("search[1M,empty]", setup=_search_index, repeat=5, tags=("search", "slow"))(lambda idx: idx.search(""))
+benchmark("search[1M,prefix]", setup=_search_index, repeat=5, tags=("search", "slow"))(lambda idx: idx.search("chat"))
+benchmark("search[1M,fuzzy]", setup=_search_index, repeat=5, tags=("search", "slow"))(lambda idx: idx.search("chatbto rag"))
+benchmark("search[1M,filters]", setup=_search_index, repeat=5, tags=("search", "slow"))(
+    lambda idx: idx.search("retail", grades=["C", "D"], co2_min=100, co2_max=10_000, date_from="2025-01-01", latest_only=True, page=3)
+)
+
+
+# --- PDF report ---
+def _report_setup(with_charts: bool):
+    from app.report import create_robust_pdf  # noqa: F401 (fpdf import cost excluded)
+    inputs = BRANCH_INPUTS["genai_self_hosted"]
+    fp = compute_footprint(inputs, ASSUMPTIONS)
+    figs = ()
+    if with_charts:
+        import plotly.express as px
+        figs = (px.bar(x=["Development", "Inference"], y=[fp.co2_dev, fp.co2_inference_usage]),)
+    return (inputs, fp, calculate_score(fp)) + figs
+
+
+def _create_pdf(*args):
+    from app.report import create_robust_pdf
+    create_robust_pdf(*args)
+
+
+benchmark("create_robust_pdf[text]", setup=lambda: _report_setup(False), repeat=5, tags=("report",))(_create_pdf)
+benchmark("create_robust_pdf[chart]", setup=lambda: _report_setup(True), repeat=3, number=1, tags=("report", "slow"))(_create_pdf)
+
+
+# --- Full Streamlit rerun of the Calculator page ---
+def _ui_setup():
+    from streamlit.testing.v1 import AppTest
+    _use_store(1_000)
+    app = AppTest.from_file(str(Path(__file__).parent.parent / "app" / "main.py"), default_timeout=120)
+    app.run()
+    return (app,)
+
+
+def _ui_rerun(app):
+    app.run()
+
+
+benchmark("ui_rerun[calculator]", setup=_ui_setup, repeat=5, number=1, tags=("ui", "slow"))(_ui_rerun)
@@ -0,0 +1,448 @@
+# benchmarks/golden.py
+"""
+Golden corpus of the calculator: stored (inputs, assumptions) -> results pairs,
+and a differential checker for any footprint engine.
+
+The corpus (`benchmarks/corpus/golden.parquet`) holds a seeded set of flat
+project rows drawn across every branch of `compute_footprint`: project type,
+SaaS API vs compute inference, always-on / active / serverless override /
+capacity model, throughput model, each training frequency, each include_*
+flag, and the fallbacks for unknown hardware, regions, API models,
+frequencies, traffic profiles and quantizations. Rows also carry a
+set of what-if levers and use one of several assumption sets. Expected
+results come from the scalar reference (`compute_footprint`,
+`calculate_score`, `simulate_what_if`). The assumption sets and the factor
+version are stored in the file metadata.
+
+The Parquet file (~14 bytes per expected value, ~28 MB at 200k rows) is not
+committed: `benchmarks/golden.json` records its rows, seed, factor version and
+a SHA-256 digest of the expected outputs. `build` refuses to overwrite a
+corpus whose outputs no longer match that digest unless `--accept` is given,
+so a rebuilt corpus still holds the reviewed results of the reference.
+
+An engine is `engine(inputs: DataFrame, assumptions: Assumptions) -> DataFrame`
+returning any subset of GOLDEN_OUTPUTS, indexed like `inputs`; outputs it
+does not return are reported as unchecked.
+
+    python -m benchmarks.golden build                     # once per checkout (digest-checked)
+    python -m benchmarks.golden build --accept            # after an intended change of the numbers
+    python -m benchmarks.golden check                     # batch engine, whole corpus: ~1 s engine time, ~3 s wall
+    python -m benchmarks.golden check --engine scalar --sample 20000
+    python -m benchmarks.golden check --engine mypkg.engine:footprint --rtol 1e-6
+    python -m benchmarks.golden profile --engine scalar   # slowest branches
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+# Add project root to sys.path to allow 'app' module imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models import Assumptions, ProjectInputs  # noqa: E402
+from app.constants import FACTOR_VERSION, HARDWARE_DICT, INFRASTRUCTURE_PROFILES, DEFAULT_GRID_INTENSITY, API_MODELS, TRAFFIC_PROFILES, AUTOSCALING_POLICIES, QUANTIZATION_PROFILES  # noqa: E402
+from app.calculator import WHAT_IF_LEVERS, IncrementalFootprint, compute_footprint, calculate_score, simulate_what_if  # noqa: E402
+from app.batch import RESULT_COLUMNS, RUNS_PER_YEAR, factor_tables, encode_inputs, compute_footprint_arrays, score_arrays, simulate_what_if_arrays  # noqa: E402
+from app.synthetic import DEFAULT_SEED  # noqa: E402
+from app.utils import unflatten_inputs  # noqa: E402
+
+CORPUS_PATH = Path(__file__).parent / "corpus" / "golden.parquet"
+MANIFEST_PATH = Path(__file__).parent / "golden.json"
+DEFAULT_ROWS = 200_000
+ASSUMPTION_SETS = 8      # the first one is Assumptions()
+DEFAULT_RTOL = 1e-9
+DEFAULT_ATOL = 1e-9
+WARMUP_ROWS = 256
+METADATA_KEY = b"ecometrics.golden"
+
+LEVER_COLUMNS = [f"whatif_{lever}" for lever in WHAT_IF_LEVERS]
+GOLDEN_OUTPUTS = RESULT_COLUMNS + ["score_100", "score_grade", "whatif_optimized_co2_kg", "whatif_relative_reduction_pct"]
+EXACT_OUTPUTS = ("score_100", "score_grade")
+
+# Keys that no factor table knows: each exercises its calculator fallback
+UNKNOWN = {
+    "hardware": "unknown_hw", "region": "Atlantis", "api_model": "Unknown model", "frequency": "Quarterly",
+    "traffic_profile": "unknown_profile", "autoscaling": "unknown_policy", "quantization": "fp8",
+}
+
+
+# --- Corpus generation ---
+def _log_uniform(rng: np.random.Generator, lo: float, hi: float, n: int, zero_share: float = 0.0) -> np.ndarray:
+    values = np.exp(rng.uniform(np.log(lo), np.log(hi), n))
+    return np.where(rng.random(n) < zero_share, 0.0, values)
+
+
+def _keys(rng: np.random.Generator, keys: list, n: int, unknown: str | None = None, unknown_share: float = 0.03) -> np.ndarray:
+    values = rng.choice(np.array(keys, dtype=object), n)
+    if unknown is not None:
+        values[rng.random(n) < unknown_share] = unknown
+    return values
+
+
+def _flags(rng: np.random.Generator, n: int, share: float = 0.5) -> np.ndarray:
+    return rng.random(n) < share
+
+
+def generate_inputs(n: int, seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """
+    n flat input rows (the `save_project` column layout) plus the what-if
+    levers. Branch flags are drawn independently, so every combination is
+    covered with roughly n / 3000 rows.
+    """
+    rng = np.random.default_rng(seed)
+    hardware, regions, infra = list(HARDWARE_DICT), list(DEFAULT_GRID_INTENSITY), list(INFRASTRUCTURE_PROFILES)
+    project_type = _keys(rng, ["genai", "deep_learning", "ml_classic"], n)
+    df = pd.DataFrame({
+        "project_name": [f"golden {i:07d}" for i in range(n)],
+        "project_type": project_type,
+        "project_duration_years": np.where(_flags(rng, n), rng.choice([0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0], n), np.round(rng.uniform(0.1, 6.0, n), 3)),
+        "development_infra_type": _keys(rng, infra, n),
+        "development_hardware_id": _keys(rng, hardware, n, UNKNOWN["hardware"]),
+        "development_dev_hours": np.round(_log_uniform(rng, 1.0, 5_000.0, n, 0.05), 1),
+        "training_include_training": _flags(rng, n, 0.7),
+        "training_region": _keys(rng, regions, n, UNKNOWN["region"]),
+        "training_infra_type": _keys(rng, infra, n),
+        "training_hardware_id": _keys(rng, hardware, n, UNKNOWN["hardware"]),
+        "training_hardware_count": rng.choice([1, 2, 4, 8, 16, 64], n),
+        "training_duration_run_hours": np.round(_log_uniform(rng, 0.01, 1_000.0, n, 0.02), 3),
+        "training_frequency": _keys(rng, list(RUNS_PER_YEAR), n, UNKNOWN["frequency"]),
+        "inference_include_inference": _flags(rng, n, 0.8),
+        "inference_region": _keys(rng, regions, n, UNKNOWN["region"]),
+        # SaaS API applies to GenAI only; other types with this mode take the compute branch
+        "inference_mode": np.where(_flags(rng, n), "SaaS / API", "Self-Hosted"),
+        "inference_infra_type": _keys(rng, infra, n),
+        "inference_hardware_id": _keys(rng, hardware, n, UNKNOWN["hardware"]),
+        "inference_hardware_count": rng.choice([1, 2, 4, 8, 16], n),
+        "inference_server_24_7": _flags(rng, n),
+        "inference_latency_ms": np.round(_log_uniform(rng, 1.0, 60_000.0, n, 0.02), 1),
+        "inference_capacity_model": _flags(rng, n, 0.25),
+        "inference_traffic_profile": _keys(rng, list(TRAFFIC_PROFILES), n, UNKNOWN["traffic_profile"]),
+        "inference_peak_factor": np.round(rng.uniform(1.0, 5.0, n), 2),
+        "inference_p99_latency_ms": np.round(_log_uniform(rng, 10.0, 10_000.0, n), 1),
+        "inference_autoscaling": _keys(rng, list(AUTOSCALING_POLICIES), n, UNKNOWN["autoscaling"]),
+        "inference_throughput_model": _flags(rng, n, 0.25),
+        "inference_batch_size": rng.choice([1, 2, 4, 8, 16, 32, 64, 128, 256, 512], n),
+        "inference_quantization": _keys(rng, list(QUANTIZATION_PROFILES), n, UNKNOWN["quantization"]),
+        "inference_model_params_b": np.round(_log_uniform(rng, 0.5, 400.0, n), 2),
+        "inference_api_model": _keys(rng, list(API_MODELS), n, UNKNOWN["api_model"]),
+        "inference_req_per_day": _log_uniform(rng, 1.0, 1e7, n, 0.03).astype(np.int64),
+        "inference_tokens_per_req": _log_uniform(rng, 10.0, 32_000.0, n, 0.03).astype(np.int64),
+        "storage_network_include_storage_network": _flags(rng, n),
+        "storage_network_dataset_gb": np.round(_log_uniform(rng, 0.1, 100_000.0, n, 0.03), 1),
+        "storage_network_transfer_gb_per_day": np.round(_log_uniform(rng, 0.01, 10_000.0, n, 0.03), 2),
+    })
+    for col in LEVER_COLUMNS:
+        df[col] = np.where(_flags(rng, n, 0.3), 0.0, np.round(rng.uniform(0.0, 100.0, n), 1))
+    df["assumptions_id"] = rng.integers(0, ASSUMPTION_SETS, n).astype(np.int16)
+    return df
+
+
+def generate_assumptions(seed: int = DEFAULT_SEED, count: int = ASSUMPTION_SETS) -> list[Assumptions]:
+    """`Assumptions()` first, then seeded variants of every field the calculator reads."""
+    rng = np.random.default_rng(seed + 1)
+    sets = [Assumptions()]
+    for _ in range(count - 1):
+        sets.append(Assumptions(
+            api_energy_kwh_per_query=float(_log_uniform(rng, 1e-5, 1e-2, 1)[0]),
+            water_m3_per_mwh=round(float(rng.uniform(0.0, 5.0)), 3),
+            default_gco2_per_gb_transfer=round(float(rng.uniform(0.0, 20.0)), 3),
+            default_kwh_per_gb_year_storage=float(_log_uniform(rng, 1e-4, 1e-2, 1)[0]),
+            hardware_lifespan_years=round(float(rng.uniform(1.0, 8.0)), 2),
+        ))
+    return sets
+
+
+def branch_labels(df: pd.DataFrame) -> pd.Series:
+    """Calculator branch of each row, e.g. `genai | inference=api | training=Weekly | storage=on`."""
+    def flag(col):
+        return df[col].astype(str).str.lower().isin(["true", "1"])
+
+    include_inf = flag("inference_include_inference")
+    api = (df["project_type"] == "genai") & (df["inference_mode"] == "SaaS / API")
+    serverless = df["inference_infra_type"] == "cloud_serverless"
+    always_on = flag("inference_server_24_7")
+    time_model = np.select(
+        [flag("inference_capacity_model"), always_on & serverless, always_on],
+        ["capacity", "serverless_override", "always_on"], "active",
+    )
+    compute = pd.Series(time_model, index=df.index) + np.where(flag("inference_throughput_model") & (df["project_type"] == "genai"), "+throughput", "")
+    inference = np.where(~include_inf, "off", np.where(api, "api", compute))
+    frequency = df["training_frequency"].where(df["training_frequency"].isin(list(RUNS_PER_YEAR)), "other")
+    training = np.where(flag("training_include_training"), frequency, "off")
+    storage = np.where(flag("storage_network_include_storage_network"), "on", "off")
+    return (df["project_type"] + " | inference=" + inference + " | training=" + training + " | storage=" + storage).rename("branch")
+
+
+# --- Engines ---
+def scalar_engine(df: pd.DataFrame, assumptions: Assumptions, incremental: bool = False) -> pd.DataFrame:
+    """Reference: `compute_footprint`, `calculate_score` and `simulate_what_if`, row by row."""
+    evaluator = IncrementalFootprint() if incremental else None
+    rows = []
+    for record in df.to_dict("records"):
+        inputs = ProjectInputs.model_validate(unflatten_inputs(record))
+        fp = evaluator.compute(inputs, assumptions) if evaluator else compute_footprint(inputs, assumptions)
+        score = calculate_score(fp)
+        what_if = simulate_what_if(fp, **{lever: record.get(col, 0.0) for lever, col in zip(WHAT_IF_LEVERS, LEVER_COLUMNS)})
+        row = {c: getattr(fp, c) for c in RESULT_COLUMNS}
+        row.update({
+            "score_100": score.score_100, "score_grade": score.grade,
+            "whatif_optimized_co2_kg": what_if["optimized_co2_kg"], "whatif_relative_reduction_pct": what_if["relative_reduction_pct"],
+        })
+        rows.append(row)
+    return pd.DataFrame(rows, index=df.index, columns=GOLDEN_OUTPUTS)
+
+
+def batch_engine(df: pd.DataFrame, assumptions: Assumptions) -> pd.DataFrame:
+    """Vectorized calculator (app/batch.py)."""
+    tables = factor_tables()
+    res = compute_footprint_arrays(encode_inputs(df, tables), tables, assumptions)
+    res["score_100"], res["score_grade"] = score_arrays(res["total_co2_kg"], res["total_water_m3"])
+    what_if = simulate_what_if_arrays(res, {lever: df[col].to_numpy() for lever, col in zip(WHAT_IF_LEVERS, LEVER_COLUMNS) if col in df.columns})
+    res["whatif_optimized_co2_kg"] = what_if["optimized_co2_kg"]
+    res["whatif_relative_reduction_pct"] = what_if["relative_reduction_pct"]
+    return pd.DataFrame(res, index=df.index)
+
+
+ENGINES: dict[str, Callable] = {
+    "batch": batch_engine,
+    "scalar": scalar_engine,
+    "incremental": lambda df, assumptions: scalar_engine(df, assumptions, incremental=True),
+}
+
+
+def resolve_engine(name: str) -> Callable:
+    """A registered engine name, or `module:function`."""
+    if name in ENGINES:
+        return ENGINES[name]
+    module, _, attr = name.partition(":")
+    if not attr:
+        raise ValueError(f"Unknown engine {name!r} (expected one of {list(ENGINES)} or module:function)")
+    return getattr(importlib.import_module(module), attr)
+
+
+# --- Corpus file ---
+def build_corpus(n: int = DEFAULT_ROWS, seed: int = DEFAULT_SEED, on_progress=None) -> tuple[pd.DataFrame, list[Assumptions]]:
+    """Generated inputs with the expected outputs (`expected_*`) of the scalar reference, and the assumption sets."""
+    df = generate_inputs(n, seed)
+    assumption_sets = generate_assumptions(seed)
+    expected = []
+    for set_id, assumptions in enumerate(assumption_sets):
+        expected.append(scalar_engine(df[df["assumptions_id"] == set_id], assumptions))
+        if on_progress:
+            on_progress(set_id + 1, len(assumption_sets))
+    corpus = df.join(pd.concat(expected).add_prefix("expected_"))
+    corpus["branch"] = branch_labels(corpus)
+    return corpus, assumption_sets
+
+
+def outputs_digest(corpus: pd.DataFrame) -> str:
+    """SHA-256 of the expected outputs, in row order (floats bit for bit)."""
+    digest = hashlib.sha256()
+    for col in GOLDEN_OUTPUTS:
+        values = corpus[f"expected_{col}"]
+        if col == "score_grade":
+            digest.update("".join(values.astype(str)).encode("ascii"))
+        else:
+            digest.update(values.to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def write_corpus(corpus: pd.DataFrame, assumption_sets: list[Assumptions], seed: int, path: Path = CORPUS_PATH):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(corpus, preserve_index=False)
+    metadata = {
+        "rows": len(corpus), "seed": seed, "factor_version": FACTOR_VERSION,
+        "assumptions": [a.model_dump() for a in assumption_sets],
+    }
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata).encode("utf-8")})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    float_columns = [f.name for f in table.schema if pa.types.is_floating(f.type)]
+    pq.write_table(table, path, compression="zstd", compression_level=19,
+                   use_dictionary=[c for c in table.column_names if c not in float_columns], use_byte_stream_split=float_columns)
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> dict | None:
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(corpus: pd.DataFrame, seed: int, path: Path = MANIFEST_PATH):
+    manifest = {"rows": len(corpus), "seed": seed, "factor_version": FACTOR_VERSION, "outputs_sha256": outputs_digest(corpus)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+
+
+@dataclass
+class Corpus:
+    df: pd.DataFrame
+    assumptions: list[Assumptions]
+    factor_version: str
+    seed: int
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> Corpus:
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path)
+    metadata = json.loads(table.schema.metadata[METADATA_KEY])
+    return Corpus(table.to_pandas(), [Assumptions(**a) for a in metadata["assumptions"]], metadata["factor_version"], metadata["seed"])
+
+
+# --- Differential check ---
+@dataclass
+class CheckReport:
+    rows: int
+    seconds: float           # engine time
+    columns: pd.DataFrame    # per output: mismatching rows, max absolute / relative error
+    mismatches: pd.DataFrame  # mismatching rows (first ones): branch, column, expected, actual
+    by_branch: pd.Series     # mismatching rows per branch
+    unchecked: list          # outputs the engine does not return
+
+    @property
+    def ok(self) -> bool:
+        return int(self.columns["mismatches"].sum()) == 0
+
+
+def run_engine(engine: Callable, corpus: Corpus, rows: pd.DataFrame | None = None) -> tuple[pd.DataFrame, float]:
+    """Engine outputs for `rows` of the corpus (default: all), one call per assumption set; and the time spent in the engine."""
+    rows = corpus.df if rows is None else rows
+    inputs = rows.drop(columns=[c for c in rows.columns if c.startswith("expected_") or c in ("branch", "assumptions_id")])
+    parts, seconds = [], 0.0
+    for set_id, index in rows.groupby("assumptions_id", sort=True).groups.items():
+        start = time.perf_counter()
+        out = engine(inputs.loc[index], corpus.assumptions[set_id])
+        seconds += time.perf_counter() - start
+        parts.append(pd.DataFrame(out, index=index) if not isinstance(out, pd.DataFrame) else out)
+    return pd.concat(parts).reindex(rows.index), seconds
+
+
+def check_engine(engine: Callable, corpus: Corpus, rtol: float = DEFAULT_RTOL, atol: float = DEFAULT_ATOL,
+                 sample: int | None = None, max_listed: int = 20) -> CheckReport:
+    """Compares `engine` with the expected outputs (floats: `np.isclose(actual, expected, rtol, atol)`; score and grade: exactly)."""
+    rows = corpus.df
+    if sample and sample < len(rows):
+        rows = rows.sample(sample, random_state=corpus.seed)
+    run_engine(engine, corpus, rows.head(WARMUP_ROWS))  # lazy factor tables and caches stay out of the timing
+    actual, seconds = run_engine(engine, corpus, rows)
+
+    stats, bad_rows, listed = [], np.zeros(len(rows), dtype=bool), []
+    unchecked = [c for c in GOLDEN_OUTPUTS if c not in actual.columns]
+    for col in GOLDEN_OUTPUTS:
+        if col in unchecked:
+            continue
+        expected, got = rows[f"expected_{col}"], actual[col]
+        if col in EXACT_OUTPUTS:
+            bad = (expected.astype(str).to_numpy() != got.astype(str).to_numpy())
+            abs_err = rel_err = float(bad.any())
+        else:
+            e, a = expected.to_numpy(dtype=np.float64), got.to_numpy(dtype=np.float64)
+            bad = ~np.isclose(a, e, rtol=rtol, atol=atol, equal_nan=True)
+            diff = np.abs(a - e)
+            abs_err = float(np.nanmax(diff)) if len(diff) else 0.0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rel_err = float(np.nanmax(np.where(e != 0, diff / np.abs(e), np.where(diff > 0, np.inf, 0.0)))) if len(diff) else 0.0
+        stats.append({"column": col, "mismatches": int(bad.sum()), "max_abs_err": abs_err, "max_rel_err": rel_err})
+        bad_rows |= bad
+        for i in np.flatnonzero(bad)[:max_listed]:
+            listed.append({"row": rows.index[i], "branch": rows["branch"].iat[i], "column": col, "expected": expected.iat[i], "actual": got.iat[i]})
+
+    mismatches = pd.DataFrame(listed, columns=["row", "branch", "column", "expected", "actual"]).head(max_listed)
+    by_branch = rows.loc[bad_rows, "branch"].value_counts()
+    return CheckReport(len(rows), seconds, pd.DataFrame(stats), mismatches, by_branch, unchecked)
+
+
+def profile_branches(engine: Callable, corpus: Corpus, per_branch: int = 500, min_rows: int = 50) -> pd.DataFrame:
+    """
+    Engine time per row of each branch (up to `per_branch` rows each), slowest
+    first. Branches with fewer than `min_rows` rows are left out: per-call
+    overhead would dominate their timing.
+    """
+    rows = corpus.df.groupby("branch", group_keys=False).head(per_branch)
+    rows = rows[rows.groupby("branch")["branch"].transform("size") >= min_rows]
+    run_engine(engine, corpus, rows.head(WARMUP_ROWS))
+    timings = []
+    for branch, group in rows.groupby("branch"):
+        _, seconds = run_engine(engine, corpus, group)
+        timings.append({"branch": branch, "rows": len(group), "seconds": seconds, "us_per_row": seconds / len(group) * 1e6})
+    return pd.DataFrame(timings, columns=["branch", "rows", "seconds", "us_per_row"]).sort_values("us_per_row", ascending=False, ignore_index=True)
+
+
+def _print_report(report: CheckReport, engine: str):
+    print(f"{engine}: {report.rows:,} rows checked in {report.seconds:.2f} s (engine time)")
+    print(report.columns.to_string(index=False))
+    if report.unchecked:
+        print(f"Not returned by the engine (unchecked): {', '.join(report.unchecked)}")
+    if not report.ok:
+        print("\nMismatching rows per branch:")
+        print(report.by_branch.head(20).to_string())
+        print("\nFirst mismatches:")
+        print(report.mismatches.to_string(index=False))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Golden corpus of the calculator and differential checker.")
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH)
+    p_build = sub.add_parser("build", help="Generate the corpus with the scalar reference.")
+    p_build.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    p_build.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    p_build.add_argument("--accept", action="store_true", help="Record the new expected outputs in the manifest (after an intended change of the numbers).")
+    p_check = sub.add_parser("check", help="Compare an engine with the corpus.")
+    p_check.add_argument("--engine", default="batch", help=f"One of {list(ENGINES)}, or module:function.")
+    p_check.add_argument("--rtol", type=float, default=DEFAULT_RTOL)
+    p_check.add_argument("--atol", type=float, default=DEFAULT_ATOL)
+    p_check.add_argument("--sample", type=int, default=None, help="Check a seeded sample of rows (row-by-row engines).")
+    p_profile = sub.add_parser("profile", help="Report the slowest branches of an engine.")
+    p_profile.add_argument("--engine", default="scalar", help=f"One of {list(ENGINES)}, or module:function.")
+    p_profile.add_argument("--per-branch", type=int, default=500)
+    p_profile.add_argument("--min-rows", type=int, default=50)
+    p_profile.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        corpus, assumption_sets = build_corpus(args.rows, args.seed, on_progress=lambda done, total: print(f"assumption set {done}/{total}", file=sys.stderr))
+        manifest = load_manifest(args.manifest)
+        pinned = manifest is not None and (manifest["rows"], manifest["seed"]) == (args.rows, args.seed)
+        if pinned and not args.accept and manifest["outputs_sha256"] != outputs_digest(corpus):
+            print(f"The reference results differ from {args.manifest} (factor version {manifest['factor_version']} -> {FACTOR_VERSION}): "
+                  "check the current engine against the previous corpus first, then rebuild with --accept.", file=sys.stderr)
+            return 1
+        write_corpus(corpus, assumption_sets, args.seed, args.corpus)
+        if args.accept or manifest is None:
+            save_manifest(corpus, args.seed, args.manifest)
+        print(f"{len(corpus):,} rows -> {args.corpus} ({args.corpus.stat().st_size / 1e6:.1f} MB, {time.perf_counter() - start:.0f} s)"
+              + ("" if pinned or args.accept or manifest is None else f", not pinned by {args.manifest}"))
+        return 0
+
+    corpus = load_corpus(args.corpus)
+    if corpus.factor_version != FACTOR_VERSION:
+        parser.error(f"the corpus was built with factor version {corpus.factor_version}, not the current {FACTOR_VERSION}: "
+                     "review the factor change, then rebuild the corpus")
+    engine = resolve_engine(args.engine)
+    if args.command == "check":
+        report = check_engine(engine, corpus, args.rtol, args.atol, args.sample)
+        _print_report(report, args.engine)
+        return 0 if report.ok else 1
+    timings = profile_branches(engine, corpus, args.per_branch, args.min_rows)
+    print(f"{args.engine}: {len(timings)} branches of {args.min_rows}+ rows, slowest first")
+    print(timings.head(args.top).to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# benchmarks/harness.py
+import gc
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.20   # +20% on the median is considered a regression
+MIN_REPEAT_SECONDS = 0.05  # auto-calibration target for one repeat
+
+
+@dataclass
+class Benchmark:
+    name: str
+    fn: Callable
+    setup: Callable | None = None  # returns the positional args passed to fn
+    repeat: int = 5
+    number: int | None = None      # calls per repeat; None = auto-calibrate
+    tags: tuple = field(default_factory=tuple)
+
+
+BENCHMARKS: list[Benchmark] = []
+
+
+def benchmark(name: str, *, setup: Callable | None = None, repeat: int = 5, number: int | None = None, tags=()):
+    """Registers a benchmark case. The timed function receives setup()'s result as arguments."""
+    def decorator(fn):
+        BENCHMARKS.append(Benchmark(name, fn, setup, repeat, number, tuple(tags)))
+        return fn
+    return decorator
+
+
+def _calibrate(fn, args) -> int:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        if time.perf_counter() - start >= MIN_REPEAT_SECONDS or number >= 100_000:
+            return number
+        number *= 10
+
+
+def measure(b: Benchmark) -> dict:
+    """Runs one benchmark and returns per-call timings (seconds)."""
+    args = b.setup() if b.setup else ()
+    if not isinstance(args, tuple):
+        args = (args,)
+    number = b.number or _calibrate(b.fn, args)
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(b.repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                b.fn(*args)
+            samples.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "repeat": b.repeat,
+        "number": number,
+    }
+
+
+def load_baseline(path: Path) -> dict:
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def save_baseline(path: Path, results: dict):
+    payload = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "node": platform.node()},
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns the names of benchmarks whose median regressed beyond the threshold."""
+    regressions = []
+    base_results = baseline.get("results", {})
+    for name, r in results.items():
+        ref = base_results.get(name)
+        if ref and r["median_s"] > ref["median_s"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds:8.2f} s "
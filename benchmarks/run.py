@@ -0,0 +1,65 @@
+# benchmarks/run.py
+"""
+EcoMetrics benchmark suite.
+
+    python -m benchmarks.run                     # run and compare to benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline     # record a new baseline
+    python -m benchmarks.run -k store --skip slow
+
+Exits with status 1 when a benchmark median regresses beyond --threshold.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to sys.path to allow 'app' module imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks import harness  # noqa: E402
+from benchmarks import cases  # noqa: E402,F401  (registers the benchmarks)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the EcoMetrics benchmarks.")
+    parser.add_argument("-k", "--keyword", action="append", default=[], help="Only run benchmarks whose name or tag contains this keyword.")
+    parser.add_argument("--skip", action="append", default=[], help="Skip benchmarks carrying this tag (e.g. slow, ui).")
+    parser.add_argument("--baseline", type=Path, default=harness.DEFAULT_BASELINE, help="Baseline JSON file.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=harness.DEFAULT_THRESHOLD, help="Allowed relative slowdown of the median (0.2 = +20%%).")
+    args = parser.parse_args(argv)
+
+    selected = [
+        b for b in harness.BENCHMARKS
+        if (not args.keyword or any(k in b.name or k in b.tags for k in args.keyword))
+        and not any(t in b.tags for t in args.skip)
+    ]
+    baseline = harness.load_baseline(args.baseline)
+    base_results = baseline.get("results", {})
+
+    results = {}
+    for b in selected:
+        try:
+            r = harness.measure(b)
+        except ImportError as e:
+            print(f"{b.name:<40} skipped ({e})")
+            continue
+        results[b.name] = r
+        ref = base_results.get(b.name)
+        delta = f"{(r['median_s'] / ref['median_s'] - 1) * 100:+6.1f}%" if ref else "   new"
+        print(f"{b.name:<40} {harness.format_duration(r['median_s'])}  (min {harness.format_duration(r['min_s']).strip()}, n={r['number']}x{r['repeat']})  {delta}")
+
+    if args.save_baseline:
+        merged = {**base_results, **results}
+        harness.save_baseline(args.baseline, merged)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = harness.compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond +{args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# benchmarks/stress_store.py
+"""
+Concurrency stress test of the project store.
+
+    python -m benchmarks.stress_store                  # 50 writer threads x 10 saves
+    python -m benchmarks.stress_store --processes      # 50 writer processes (file lock path)
+
+Checks that no update is lost, that concurrent readers never see a partial
+file, and compares throughput with serialized full rewrites (one locked
+read + rewrite per save, the pre-batching behaviour).
+"""
+import argparse
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd  # noqa: E402
+
+from app import utils  # noqa: E402
+from app.models import ProjectInputs, Assumptions  # noqa: E402
+from app.calculator import compute_footprint, calculate_score  # noqa: E402
+from benchmarks.cases import make_history  # noqa: E402
+
+_legacy_lock = threading.Lock()
+
+
+def _save_rows(writer_id: int, saves: int):
+    assumptions = Assumptions()
+    for i in range(saves):
+        inputs = ProjectInputs(project_name=f"writer-{writer_id:03d}-save-{i:03d}")
+        fp = compute_footprint(inputs, assumptions)
+        utils.save_project(inputs, fp, calculate_score(fp))
+
+
+def _warm_up(_):
+    time.sleep(0.5)  # importing this module in the worker loads pandas/app
+
+
+def _save_rows_in_process(store: str, writer_id: int, saves: int):
+    utils.PROJECTS_CSV = Path(store)
+    _save_rows(writer_id, saves)
+
+
+def _save_rows_serialized(writer_id: int, saves: int):
+    """Legacy path: every save re-reads and rewrites the whole CSV under one lock."""
+    assumptions = Assumptions()
+    for i in range(saves):
+        inputs = ProjectInputs(project_name=f"writer-{writer_id:03d}-save-{i:03d}")
+        fp = compute_footprint(inputs, assumptions)
+        row = utils.flatten_project_row(inputs, fp, calculate_score(fp))
+        with _legacy_lock:
+            df = pd.read_csv(utils.PROJECTS_CSV)
+            df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+            df.to_csv(utils.PROJECTS_CSV, index=False)
+
+
+def _reader(stop: threading.Event, errors: list, counts: list):
+    while not stop.is_set():
+        try:
+            counts.append(len(utils.load_projects()))
+        except Exception as e:  # a half-written file would fail to parse
+            errors.append(repr(e))
+
+
+def run(writers: int, saves: int, initial_rows: int, use_processes: bool) -> bool:
+    tmp_dir = Path(tempfile.mkdtemp(prefix="ecometrics-stress-"))
+    try:
+        seed_df = make_history(initial_rows)
+        expected = initial_rows + writers * saves
+
+        # 1. Serialized full rewrites (reference)
+        utils.PROJECTS_CSV = tmp_dir / "serialized.csv"
+        seed_df.to_csv(utils.PROJECTS_CSV, index=False)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(writers) as pool:
+            list(pool.map(_save_rows_serialized, range(writers), [saves] * writers))
+        t_serial = time.perf_counter() - start
+
+        # 2. Batched writer + atomic replace, with concurrent readers
+        utils.PROJECTS_CSV = tmp_dir / "projects.csv"
+        seed_df.to_csv(utils.PROJECTS_CSV, index=False)
+        stop, read_errors, read_counts = threading.Event(), [], []
+        readers = [threading.Thread(target=_reader, args=(stop, read_errors, read_counts)) for _ in range(4)]
+        for r in readers:
+            r.start()
+        if use_processes:
+            # Each process runs its own writer thread; processes serialize on the file lock
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(writers, mp_context=ctx) as pool:
+                list(pool.map(_warm_up, range(writers)))  # exclude interpreter start-up and imports
+                start = time.perf_counter()
+                list(pool.map(_save_rows_in_process, [str(utils.PROJECTS_CSV)] * writers, range(writers), [saves] * writers))
+                t_batched = time.perf_counter() - start
+        else:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(writers) as pool:
+                list(pool.map(_save_rows, range(writers), [saves] * writers))
+            t_batched = time.perf_counter() - start
+        stop.set()
+        for r in readers:
+            r.join()
+
+        df = utils.load_projects()
+        names = set(df["project_name"])
+        missing = [f"writer-{w:03d}-save-{i:03d}" for w in range(writers) for i in range(saves) if f"writer-{w:03d}-save-{i:03d}" not in names]
+
+        mode = "processes" if use_processes else "threads"
+        print(f"{writers} writer {mode} x {saves} saves on a {initial_rows}-row store")
+        print(f"  rows: {len(df)} / expected {expected}, lost updates: {len(missing)}")
+        print(f"  concurrent reads: {len(read_counts)}, failed reads: {len(read_errors)}")
+        print(f"  serialized rewrites: {t_serial:6.2f} s ({writers * saves / t_serial:7.1f} saves/s)")
+        print(f"  batched writer:      {t_batched:6.2f} s ({writers * saves / t_batched:7.1f} saves/s)  x{t_serial / t_batched:.1f}")
+        return len(df) == expected and not missing and not read_errors
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Stress test concurrent project saves.")
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--saves", type=int, default=10, help="Saves per writer.")
+    parser.add_argument("--rows", type=int, default=5_000, help="Initial store size.")
+    parser.add_argument("--processes", action="store_true", help="Use one process per writer instead of threads.")
+    args = parser.parse_args(argv)
+    ok = run(args.writers, args.saves, args.rows, args.processes)
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
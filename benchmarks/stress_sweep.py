@@ -0,0 +1,141 @@
+# benchmarks/stress_sweep.py
+"""
+Failure handling of distributed sweeps (app/sweep.py), on localhost.
+
+    python -m benchmarks.stress_sweep
+
+- a worker killed in the middle of a shard: the shard is re-queued and the
+  merged result equals `run_local`;
+- a portfolio row that fails in every worker (unknown infra type): the sweep
+  fails with the worker's error after `max_attempts`, instead of waiting;
+- every local worker killed with no restart left: the sweep fails;
+- an overall timeout.
+Exits with 1 if a check fails.
+"""
+import argparse
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from app.sweep import SweepSpec, SweepFailed, run_sweep, run_local, _CoordinatorClient  # noqa: E402
+from app.synthetic import PortfolioGenerator  # noqa: E402
+from app.utils import flatten_inputs  # noqa: E402
+
+LEASE_TIMEOUT = 2.0
+
+
+def _kill_when_leased(address, authkey: bytes, processes, victims: int, killed: list):
+    """Kills the first `victims` local workers as soon as each holds a shard."""
+    client = _CoordinatorClient(address=address, authkey=authkey)
+    client.connect()
+    coordinator = client.coordinator()
+    deadline = time.monotonic() + 60
+    targets = list(processes[:victims])
+    while targets and time.monotonic() < deadline:
+        holders = set(coordinator.leases().values())
+        for p in list(targets):
+            if any(h.endswith(f"-{p.pid}") for h in holders):
+                p.kill()
+                killed.append(p.pid)
+                targets.remove(p)
+        time.sleep(0.02)
+
+
+def _on_start(authkey: bytes, victims: int, killed: list):
+    def on_start(address, processes):
+        threading.Thread(target=_kill_when_leased, args=(address, authkey, processes, victims, killed), daemon=True).start()
+    return on_start
+
+
+def check_killed_worker(rows: int) -> str | None:
+    spec = SweepSpec(rows=rows, shard_rows=max(1, rows // 8), regions=(None, "France (FR)"), draws=2)
+    authkey, killed = secrets.token_bytes(16), []
+    result, coordinator = run_sweep(spec, local_workers=2, authkey=authkey, lease_timeout=LEASE_TIMEOUT, timeout=300,
+                                    on_start=_on_start(authkey, 1, killed))
+    expected = run_local(spec)
+    if not killed:
+        return "no worker was killed mid-shard"
+    if coordinator.requeued < 1:
+        return "the killed worker's shard was not re-queued"
+    # Shards merge in another order than run_local: sums may differ in the last bits
+    numeric = expected.select_dtypes("number").columns
+    if not result["projects"].equals(expected["projects"]) or not np.allclose(result[numeric], expected[numeric], rtol=1e-12, atol=0.0):
+        return f"result differs from run_local:\n{result}\n{expected}"
+    print(f"  {coordinator.requeued} shard(s) re-queued, result equals run_local")
+    return None
+
+
+def check_failing_shard(tmp: Path) -> str | None:
+    records = [flatten_inputs(r) for r in PortfolioGenerator(seed=1).records(20)]
+    records[7]["inference_infra_type"] = "mars"
+    portfolio = tmp / "poisoned.csv"
+    pd.DataFrame(records).to_csv(portfolio, index=False)
+    start = time.perf_counter()
+    try:
+        run_sweep(SweepSpec(portfolio=str(portfolio), shard_rows=10), local_workers=2, lease_timeout=LEASE_TIMEOUT, timeout=120)
+    except SweepFailed as e:
+        if "KeyError" not in str(e):
+            return f"SweepFailed without the worker's error: {e}"
+        print(f"  failed after {time.perf_counter() - start:.1f} s: {str(e).splitlines()[0]}")
+        return None
+    return "the sweep completed despite a failing shard"
+
+
+def check_no_worker_left(rows: int) -> str | None:
+    spec = SweepSpec(rows=rows, shard_rows=max(1, rows // 8))
+    authkey, killed = secrets.token_bytes(16), []
+    try:
+        run_sweep(spec, local_workers=2, authkey=authkey, lease_timeout=LEASE_TIMEOUT, max_restarts=0, max_attempts=10, timeout=120,
+                  on_start=_on_start(authkey, 2, killed))
+    except SweepFailed as e:
+        if "timed out" in str(e):
+            return f"waited until the timeout instead of failing: {e}"
+        print(f"  {e}")
+        return None
+    return "the sweep completed although every worker was killed" if len(killed) == 2 else "workers finished before they could be killed"
+
+
+def check_timeout(rows: int) -> str | None:
+    try:
+        run_sweep(SweepSpec(rows=rows * 20, shard_rows=rows), local_workers=1, lease_timeout=LEASE_TIMEOUT, timeout=1.0)
+    except SweepFailed as e:
+        if "timed out" not in str(e):
+            return f"unexpected failure: {e}"
+        print(f"  {e}")
+        return None
+    return "the sweep completed before the timeout"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Failure handling of distributed sweeps on localhost.")
+    parser.add_argument("--rows", type=int, default=40_000, help="Synthetic portfolio size (8 shards).")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix="ecometrics-sweep-") as tmp:
+        checks = {
+            "killed worker": lambda: check_killed_worker(args.rows),
+            "failing shard": lambda: check_failing_shard(Path(tmp)),
+            "no worker left": lambda: check_no_worker_left(args.rows),
+            "timeout": lambda: check_timeout(args.rows),
+        }
+        for name, check in checks.items():
+            print(f"{name}:")
+            error = check()
+            if error:
+                failures += 1
+                print(f"  FAILED: {error}")
+    print("OK" if not failures else f"{failures} check(s) failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())